@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Compare repeated calls on the same immutable inputs with and without a ResultCache.
+
+Run with: python benchmarks/bench_cache.py
+"""
+
+import functools
+import operator
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyaoi  # noqa: E402
+import pyaoi.cache  # noqa: E402
+from common import measure, report  # noqa: E402
+
+ITEMS = 100_000
+
+
+def main() -> None:
+    values = tuple(random.randrange(100) for _ in range(ITEMS))
+    data = bytes(values)
+    is_large = functools.partial(operator.lt, 90)
+    results = pyaoi.cache.ResultCache()
+
+    for title, function, args in (
+        ("count_if on a tuple", pyaoi.count_if, (values, is_large)),
+        ("find_end on a tuple", pyaoi.find_end, (values, values[-3:])),
+        ("mismatch on bytes", pyaoi.mismatch, (data, data)),
+    ):
+        results.call(function, *args)
+        report(
+            "{}, {} items".format(title, ITEMS),
+            [
+                ("uncached", *measure(lambda: function(*args), 3)),
+                ("cached", *measure(lambda: results.call(function, *args), 1000)),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()
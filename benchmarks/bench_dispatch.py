@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Measure what choosing a backend adds to small calls and what the chosen backends save on large ones.
+
+Run with: python benchmarks/bench_dispatch.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyaoi  # noqa: E402
+from common import measure, report  # noqa: E402
+
+
+def main() -> None:
+    small = [1, 2, 3]
+    report(
+        "Small calls, dispatched and calling the pure Python implementation",
+        [
+            ("count, dispatched", *measure(lambda: pyaoi.count(small, 2), 100_000)),
+            (
+                "count, direct",
+                *measure(lambda: pyaoi.count.__wrapped__(small, 2), 100_000),
+            ),
+            (
+                "search, dispatched",
+                *measure(lambda: pyaoi.search(small, [2]), 100_000),
+            ),
+            (
+                "search, direct",
+                *measure(lambda: pyaoi.search.__wrapped__(small, [2]), 100_000),
+            ),
+        ],
+    )
+
+    haystack = b"abcdefgh" * 100_000
+    print(pyaoi.explain(pyaoi.search, haystack, b"needle"))
+    report(
+        "Searching {} bytes".format(len(haystack)),
+        [
+            (
+                "search, dispatched",
+                *measure(lambda: pyaoi.search(haystack, b"needle"), 10),
+            ),
+            (
+                "search, pure Python",
+                *measure(lambda: pyaoi.search.__wrapped__(haystack, b"needle"), 1),
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Measure how long importing pyaoi takes in a fresh interpreter and fail if it exceeds its budget.
+
+The standard library modules every pyaoi module needs anyway, like typing, are imported first,
+so only the cost of pyaoi itself is measured.
+
+Run with: python benchmarks/bench_import.py [--budget MILLISECONDS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PRELOADED = "import typing, collections, functools, itertools, operator, array"
+HEAVY_MODULES = ("numpy", "pyarrow", "multiprocessing", "sqlite3", "json")
+RUNS = 20
+
+DEFAULT_BUDGET_MS = 2.0
+"""The median import time in milliseconds, above which the benchmark fails, about 25% above the measured 1.6 ms"""
+
+
+def import_microseconds() -> int:
+    """Import pyaoi in a fresh interpreter, returning its cumulative time from python -X importtime."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PRELOADED + "; import pyaoi"],
+        cwd=ROOT,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    for line in completed.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+
+        if len(fields) == 3 and fields[2] == "pyaoi":
+            return int(fields[1])
+
+    raise RuntimeError("python -X importtime did not report pyaoi")
+
+
+def loaded_heavy_modules() -> List[str]:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, pyaoi; print(' '.join(sorted(sys.modules)))",
+        ],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = completed.stdout.split()
+
+    return [name for name in HEAVY_MODULES if name in modules]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS)
+    options = parser.parse_args()
+
+    # The first run may have to compile the modules
+    import_microseconds()
+    times = sorted(import_microseconds() for _ in range(RUNS))
+    median = statistics.median(times) / 1000
+    heavy = loaded_heavy_modules()
+
+    print("import pyaoi, {} runs".format(RUNS))
+    print("median {:.2f} ms, fastest {:.2f} ms".format(median, times[0] / 1000))
+    print("budget {:.2f} ms".format(options.budget))
+    print("heavy modules imported: {}".format(", ".join(heavy) or "none"))
+
+    if median > options.budget or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare the copying sequence modifications with their in-place counterparts.
+
+Run with: python benchmarks/bench_inplace.py
+"""
+
+import array
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyaoi  # noqa: E402
+from common import measure, report  # noqa: E402
+
+SIZE = 100_000
+
+
+def main() -> None:
+    ring = list(range(SIZE))
+    typed = array.array("q", range(SIZE))
+
+    report(
+        "rotate by 10 places, {} elements".format(SIZE),
+        [
+            ("rotate_copy(list)", *measure(lambda: pyaoi.rotate_copy(ring, 10), 200)),
+            ("rotate(list)", *measure(lambda: pyaoi.rotate(ring, 10), 200)),
+            ("rotate(array)", *measure(lambda: pyaoi.rotate(typed, 10), 200)),
+        ],
+    )
+    # Rotating by a third of the size moves two large blocks, which no chunk holds completely
+    third = SIZE // 3
+    report(
+        "rotate by {} places, {} elements".format(third, SIZE),
+        [
+            (
+                "rotate_copy(list)",
+                *measure(lambda: pyaoi.rotate_copy(ring, third), 200),
+            ),
+            ("rotate(list)", *measure(lambda: pyaoi.rotate(ring, third), 200)),
+            ("rotate(array)", *measure(lambda: pyaoi.rotate(typed, third), 200)),
+        ],
+    )
+    report(
+        "shift by 10 places, {} elements".format(SIZE),
+        [
+            ("shift_left(list)", *measure(lambda: pyaoi.shift_left(ring, 10), 200)),
+            (
+                "shift_left_inplace(list)",
+                *measure(lambda: pyaoi.shift_left_inplace(ring, 10), 200),
+            ),
+            (
+                "shift_right_inplace(array)",
+                *measure(lambda: pyaoi.shift_right_inplace(typed, 10, 0), 200),
+            ),
+        ],
+    )
+    report(
+        "fill and transform the first 10 elements, {} elements".format(SIZE),
+        [
+            (
+                "list(fill_n(list))",
+                *measure(lambda: list(pyaoi.fill_n(ring, 0, 10)), 200),
+            ),
+            (
+                "fill_n_inplace(list)",
+                *measure(lambda: pyaoi.fill_n_inplace(ring, 0, 10), 200),
+            ),
+            (
+                "list(map_n(list))",
+                *measure(lambda: list(pyaoi.map_n(ring, abs, 10)), 200),
+            ),
+            (
+                "transform_n_inplace(list)",
+                *measure(lambda: pyaoi.transform_n_inplace(ring, abs, 10), 200),
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare copy_replace_many() with chaining one copy_replace() call per replaced value.
+
+Run with: python benchmarks/bench_replace_many.py
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyaoi  # noqa: E402
+from common import measure, report  # noqa: E402
+
+ITEMS = 10_000
+
+
+def chained(values: list, mapping: dict) -> list:
+    result = values
+
+    for old_val, new_val in mapping.items():
+        result = pyaoi.copy_replace(result, old_val, new_val)
+
+    return list(result)
+
+
+def main() -> None:
+    # Chaining much more generators exceeds the recursion limit
+    for categories in (10, 100, 500):
+        values = [random.randrange(categories * 2) for _ in range(ITEMS)]
+        mapping = {code: code + 10_000 for code in range(categories)}
+        rows = [
+            ("chained copy_replace", *measure(lambda: chained(values, mapping), 1)),
+            (
+                "copy_replace_many, list",
+                *measure(lambda: list(pyaoi.copy_replace_many(values, mapping)), 10),
+            ),
+        ]
+
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        if numpy is not None:
+            array_values = numpy.array(values)
+            rows.append(
+                (
+                    "copy_replace_many, NumPy",
+                    *measure(
+                        lambda: pyaoi.copy_replace_many(array_values, mapping), 10
+                    ),
+                )
+            )
+
+        report("{} items, {} replaced codes".format(ITEMS, categories), rows)
+
+    text = "".join(random.choice("abcdefghij") for _ in range(ITEMS * 10))
+    letters = {letter: letter.upper() for letter in "abcde"}
+    report(
+        "{} characters, {} replaced letters".format(len(text), len(letters)),
+        [
+            (
+                "chained str.replace",
+                *measure(lambda: chained_str(text, letters), 10),
+            ),
+            (
+                "copy_replace_many, str",
+                *measure(lambda: pyaoi.copy_replace_many(text, letters), 10),
+            ),
+        ],
+    )
+
+
+def chained_str(text: str, mapping: dict) -> str:
+    for old_val, new_val in mapping.items():
+        text = text.replace(old_val, new_val)
+
+    return text
+
+
+if __name__ == "__main__":
+    main()
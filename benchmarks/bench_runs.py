@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare scanning bursty data item by item with scanning its run-length encoding.
+
+Run with: python benchmarks/bench_runs.py
+"""
+
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyaoi  # noqa: E402
+from common import measure, report  # noqa: E402
+
+ITEMS = 1_000_000
+
+
+def bursty(items: int, mean_run: int) -> list:
+    """Return items values in runs of random length around mean_run."""
+
+    values: list = []
+
+    while len(values) < items:
+        values += [random.randrange(8)] * random.randint(1, mean_run * 2)
+
+    return values[:items]
+
+
+def main() -> None:
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    for mean_run in (10, 1000):
+        values = bursty(ITEMS, mean_run)
+        encoded = pyaoi.RunLength.encode(values)
+        rows = [
+            (
+                "run_length_encode, list",
+                *measure(lambda: list(pyaoi.run_length_encode(values)), 1),
+            ),
+            (
+                "itertools.groupby, list",
+                *measure(
+                    lambda: [
+                        (key, len(list(group)))
+                        for key, group in itertools.groupby(values)
+                    ],
+                    1,
+                ),
+            ),
+        ]
+
+        if numpy is not None:
+            array_values = numpy.array(values)
+            rows.append(
+                (
+                    "run_length_encode, NumPy",
+                    *measure(lambda: list(pyaoi.run_length_encode(array_values)), 1),
+                )
+            )
+
+        rows += [
+            ("count, list", *measure(lambda: pyaoi.count(values, 9), 10)),
+            ("count, RunLength", *measure(lambda: pyaoi.count(encoded, 9), 10)),
+            ("search_n, list", *measure(lambda: pyaoi.search_n(values, 9, 3), 1)),
+            (
+                "search_n, RunLength",
+                *measure(lambda: pyaoi.search_n(encoded, 9, 3), 10),
+            ),
+        ]
+
+        report("{} items, mean run length {}".format(ITEMS, mean_run), rows)
+
+
+if __name__ == "__main__":
+    main()
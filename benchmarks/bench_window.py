@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare incremental sliding window aggregates with rescanning the window after every event.
+
+Run with: python benchmarks/bench_window.py
+"""
+
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pyaoi  # noqa: E402
+import pyaoi.window  # noqa: E402
+from common import measure, report  # noqa: E402
+
+EVENTS = 10_000
+
+
+def is_error(event: int) -> bool:
+    return event > 90
+
+
+def naive_count(events: list, size: int) -> None:
+    window: deque = deque(maxlen=size)
+
+    for event in events:
+        window.append(event)
+        pyaoi.count_if(window, is_error)
+
+
+def naive_minmax(events: list, size: int) -> None:
+    window: deque = deque(maxlen=size)
+
+    for event in events:
+        window.append(event)
+        min(window), max(window)
+
+
+def incremental(events: list, window: pyaoi.window.SlidingWindow) -> None:
+    push = window.push
+
+    for event in events:
+        push(event)
+
+
+def main() -> None:
+    events = [random.randrange(100) for _ in range(EVENTS)]
+
+    for size in (10, 100, 1000):
+        report(
+            "{} events, window of {}".format(EVENTS, size),
+            [
+                ("naive count_if", *measure(lambda: naive_count(events, size), 3)),
+                (
+                    "SlidingCount",
+                    *measure(
+                        lambda: incremental(
+                            events, pyaoi.window.SlidingCount(is_error, size)
+                        ),
+                        3,
+                    ),
+                ),
+                ("naive min/max", *measure(lambda: naive_minmax(events, size), 3)),
+                (
+                    "SlidingMinMax",
+                    *measure(
+                        lambda: incremental(events, pyaoi.window.SlidingMinMax(size)),
+                        3,
+                    ),
+                ),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Helpers shared by the benchmark scripts."""
+
+import timeit
+import tracemalloc
+from typing import Callable, Iterable, Tuple
+
+Row = Tuple[str, float, int]
+
+
+def measure(function: Callable[[], object], number: int = 1000) -> Tuple[float, int]:
+    """Measure the time and the peak of memory allocated by a single call of function.
+
+    Args:
+        function: A callable taking no arguments to benchmark
+        number: How many calls to average the time over
+
+    Returns:
+        The average time per call in seconds and the peak number of bytes allocated during one call
+    """
+
+    seconds = timeit.timeit(function, number=number) / number
+
+    tracemalloc.start()
+    # The first call may populate caches, only the second one is measured
+    function()
+
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+    baseline = tracemalloc.get_traced_memory()[0]
+    function()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return seconds, max(peak, 0)
+
+
+def report(title: str, rows: Iterable[Row]) -> None:
+    """Print the results of measure() as a table."""
+
+    print(title)
+    print("{:<40} {:>12} {:>16}".format("case", "us/call", "bytes/call"))
+
+    for name, seconds, peak in rows:
+        print("{:<40} {:>12.2f} {:>16}".format(name, seconds * 1e6, peak))
+
+    print()
@@ -0,0 +1,1537 @@
+#!/usr/bin/env python3
+"""A collection of functions operating on iterables."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import abc
+import collections
+import itertools
+import operator
+import sys
+from array import array
+from collections import deque
+from itertools import chain
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Deque,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Sized,
+    Tuple,
+    Union,
+)
+
+from pyaoi._compat import as_array, as_items, dispatched, is_arrow, is_ndarray
+
+# Exports which are imported from their module on first access, so importing pyaoi stays cheap
+_LAZY_EXPORTS = {
+    "SharedArray": "pyaoi.shared",
+    "SharedPool": "pyaoi.shared",
+    "diff": "pyaoi._diff",
+    "explain": "pyaoi.dispatch",
+    "RunLength": "pyaoi.runs",
+    "SequenceView": "pyaoi.runs",
+    "group_consecutive": "pyaoi.runs",
+    "run_length_decode": "pyaoi.runs",
+    "run_length_encode": "pyaoi.runs",
+}
+_SUBMODULES = frozenset(
+    (
+        "arrow",
+        "cache",
+        "calibrate",
+        "columns",
+        "dispatch",
+        "io",
+        "pred",
+        "runs",
+        "shared",
+        "sketch",
+        "window",
+    )
+)
+# Third party packages and standard library modules pyaoi only imports when a backend needs them
+_OPTIONAL_BACKENDS = ("numpy", "pyarrow", "xxhash", "multiprocessing", "sqlite3")
+
+
+def __getattr__(name: str) -> Any:
+    """Import lazy exports and submodules on first access, see PEP 562."""
+
+    import importlib  # noqa: PLC0415
+
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+
+        return value
+
+    if name in _SUBMODULES:
+        return importlib.import_module("{}.{}".format(__name__, name))
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS) | _SUBMODULES)
+
+
+# Module level __getattr__ is ignored before Python 3.7
+if sys.version_info < (3, 7):
+    for _name in _LAZY_EXPORTS:
+        __getattr__(_name)
+
+    del _name
+
+
+def backends_loaded() -> dict:
+    """Report which optional backends and submodules of pyaoi have been imported so far.
+
+    Returns:
+        A dict mapping the names of optional packages, like "numpy" or "pyarrow",
+            and of pyaoi's submodules, like "pyaoi.shared", to whether they are imported
+
+    Example:
+        import pyaoi
+
+        pyaoi.backends_loaded()["pyaoi.shared"]  # False until a SharedPool is used
+    """
+
+    names = list(_OPTIONAL_BACKENDS)
+    names += sorted("{}.{}".format(__name__, name) for name in _SUBMODULES)
+
+    return {name: name in sys.modules for name in names}
+
+
+def _is_column_query(iterable: Any, predicate: Any) -> bool:
+    """Check if predicate is a ColumnPredicate and iterable a Table, without importing pyaoi.columns.
+
+    If pyaoi.columns was never imported, no object can be one of both.
+    """
+
+    columns = sys.modules.get("pyaoi.columns")
+
+    return (
+        columns is not None
+        and isinstance(predicate, columns.ColumnPredicate)
+        and isinstance(iterable, columns.Table)
+    )
+
+
+UnaryPredicate = Callable[[Any], bool]
+"""A callable that takes one argument and returns a bool"""
+
+BinaryPredicate = Callable[[Any, Any], bool]
+"""A callable that takes two arguments and returns a bool"""
+
+UnaryFunction = Callable[[Any], None]
+"""A callable that takes one argument and returns none"""
+
+MOVE_CHUNK_SIZE: int = 4096
+"""How many elements rotate() copies at once, which bounds the extra memory it needs"""
+
+DEFAULT_BATCH_SIZE: int = 1024
+"""How many elements are passed to a BatchPredicate at once, unless it sets its own batch_size"""
+
+
+class BatchPredicate(abc.ABC):
+    """A predicate which evaluates whole chunks of elements at once.
+
+    Functions taking predicates detect objects implementing __call_batch__() and pass them
+    chunks of up to batch_size elements instead of calling them once per element.
+    Chunks for binary predicates contain tuples of both arguments.
+    Functions which can stop early, do so after the chunk containing the deciding element.
+    Any object with a __call_batch__() method is considered a BatchPredicate, subclassing is optional.
+    """
+
+    batch_size: int = DEFAULT_BATCH_SIZE
+
+    @abc.abstractmethod
+    def __call_batch__(self, chunk: Sequence) -> Sequence[bool]:
+        """Evaluate the predicate for every element in chunk, returning one bool per element."""
+
+    def __call__(self, *args: Any) -> bool:
+        return bool(self.__call_batch__([args[0] if len(args) == 1 else args])[0])
+
+    @classmethod
+    def __subclasshook__(cls, subclass: type) -> bool:
+        if cls is BatchPredicate and hasattr(subclass, "__call_batch__"):
+            return True
+
+        return NotImplemented
+
+
+class _FunctionBatchPredicate(BatchPredicate):
+    def __init__(
+        self, function: Callable[[Sequence], Sequence[bool]], batch_size: int
+    ) -> None:
+        self.function = function
+        self.batch_size = batch_size
+
+    def __call_batch__(self, chunk: Sequence) -> Sequence[bool]:
+        return self.function(chunk)
+
+
+def batch_predicate(
+    function: Callable[[Sequence], Sequence[bool]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> BatchPredicate:
+    """Turn a function evaluating a whole chunk of elements into a BatchPredicate.
+
+    Args:
+        function: A function taking a list of elements and returning one bool per element
+        batch_size: The maximum number of elements to pass to function at once
+
+    Returns:
+        A BatchPredicate calling function
+    """
+
+    return _FunctionBatchPredicate(function, batch_size)
+
+
+def _is_batch_predicate(predicate: Any) -> bool:
+    return hasattr(predicate, "__call_batch__")
+
+
+def _batch_chunks(
+    iterable: Iterable, predicate: Any
+) -> Iterator[Tuple[list, Sequence]]:
+    """Yield chunks of iterable together with the results of predicate for them."""
+
+    batch_size = max(1, getattr(predicate, "batch_size", DEFAULT_BATCH_SIZE))
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(itertools.islice(iterator, batch_size))
+
+        if not chunk:
+            return
+
+        yield chunk, predicate.__call_batch__(chunk)
+
+
+def _predicate_results(iterable: Iterable, predicate: Any) -> Iterator[bool]:
+    """Lazily apply predicate to all elements of iterable, in chunks if it is a BatchPredicate."""
+
+    if not _is_batch_predicate(predicate):
+        return map(predicate, iterable)
+
+    return (
+        result
+        for _, results in _batch_chunks(iterable, predicate)
+        for result in results
+    )
+
+
+def _with_results(iterable: Iterable, predicate: Any) -> Iterator[Tuple[Any, bool]]:
+    """Lazily pair all elements of iterable with the results of the BatchPredicate predicate."""
+
+    return (
+        pair
+        for chunk, results in _batch_chunks(iterable, predicate)
+        for pair in zip(chunk, results)
+    )
+
+
+def all_of(iterable: Iterable, unary_predicate: UnaryPredicate) -> bool:
+    """Check if an unary predicate returns True for all elements in the iterable.
+
+    Args:
+        iterable: An iterable to apply the unary_predicate to
+        unary_predicate: An unary predicate to apply to each element in the iterable
+
+    Returns:
+        True if the predicate evaluates to True for every element in the iterable, False otherwise or if the iterable is empty
+    """
+
+    return False if not iterable else all(_predicate_results(iterable, unary_predicate))
+
+
+def any_of(iterable: Iterable, unary_predicate: UnaryPredicate) -> bool:
+    """Check if an unary predicate returns True for any elements in the iterable.
+
+    Args:
+        iterable: An iterable to apply the unary_predicate to
+        unary_predicate: An unary predicate to apply to each element in the iterable
+
+    Returns:
+        True if the predicate evaluates to True for any element in the iterable, False otherwise or if the iterable is empty
+    """
+
+    return False if not iterable else any(_predicate_results(iterable, unary_predicate))
+
+
+def none_of(iterable: Iterable, unary_predicate: UnaryPredicate) -> bool:
+    """Check if an unary predicate returns True for no elements in the iterable.
+
+    Args:
+        iterable: An iterable to apply the unary_predicate to
+        unary_predicate: An unary predicate to apply to each element in the iterable
+
+    Returns:
+        True if the predicate evaluates to True for no element in the iterable or if the iterable is empty, False otherwise
+    """
+
+    return (
+        True if not iterable else not all(_predicate_results(iterable, unary_predicate))
+    )
+
+
+def for_each(
+    iterable: Iterable,
+    unary_function: UnaryFunction,
+) -> None:
+    """Apply an unary function to each element in the iterable.
+
+    This function has read-only access to the iterable
+
+    Args:
+        iterable: An iterable to apply the unary_function to
+        unary_function: An unary function to apply to each element in the iterable
+    """
+
+    for element in iterable:
+        unary_function(element)
+
+
+def for_each_n(
+    sequence: Sequence,
+    unary_function: UnaryFunction,
+    num_elements: int,  # noqa: VNE001,C0103
+) -> None:
+    """Apply an unary function to the first num_elements elements in the sequence, modifying the elements.
+
+    This function has read-only access to the sequence
+
+    Args:
+        sequence: A sequence to apply the unary_function to
+        unary_function: An unary function to apply to each element in the sequence
+        num_elements: A number indicating the number of elements (counted from the start) to apply the unary_function to
+    """
+
+    for element in sequence[:num_elements]:
+        unary_function(element)
+
+
+@dispatched("count")
+def count(sequence: Sequence, target: Any) -> int:
+    """Count how often target appears in sequence.
+
+    Args:
+        sequence: An iterable in which occurrences of target are counted
+        target: A value/object, which occurrences will be counted
+
+    Returns:
+        How often target appeared in sequence
+    """
+
+    items = as_items(sequence)
+
+    if items is not sequence:
+        return count(as_array(items), target)
+
+    if not hasattr(sequence, "count"):
+        return operator.countOf(sequence, target)
+
+    return sequence.count(target)
+
+
+def count_if(iterable: Iterable, unary_predicate: UnaryPredicate) -> int:
+    """Count for how many elements in a iterable an unary predicate returns True.
+
+    Args:
+        iterable: An iterable for which to count for how many elements unary_predicate returns True
+        unary_predicate: A value/object, for which to count for how many items in the iterable it returns True
+
+    Returns:
+        For how many items unary predicate returned True
+    """
+
+    if is_arrow(iterable):
+        from pyaoi import arrow  # noqa: PLC0415
+
+        return arrow.count_if(iterable, unary_predicate)
+
+    if _is_column_query(iterable, unary_predicate):
+        return iterable.count_where(unary_predicate)
+
+    return sum(_predicate_results(as_items(iterable), unary_predicate))
+
+
+def count_if_not(collection: Collection, unary_predicate: UnaryPredicate) -> int:
+    """Count for how many elements in a collection an unary predicate returns False.
+
+    Args:
+        collection: An collection for which to count for how many elements unary_predicate returns False
+        unary_predicate: A value/object, for which to count for how many items in the collection it returns False
+
+    Returns:
+        For how many items unary predicate returned False
+    """
+
+    if is_arrow(collection):
+        from pyaoi import arrow  # noqa: PLC0415
+
+        return arrow.count_if(collection, unary_predicate, False)
+
+    if _is_column_query(collection, unary_predicate):
+        return collection.count_where(unary_predicate, False)
+
+    collection = as_items(collection)
+
+    return len(collection) - sum(_predicate_results(collection, unary_predicate))
+
+
+def mismatch(
+    sequence1: Sequence,
+    sequence2: Sequence,
+    binary_predicate: BinaryPredicate = operator.eq,
+    return_index: bool = False,
+) -> Union[Optional[Tuple[Any, Any]], int]:  # noqa E1136
+    """Find the first pair of elements from both sequences, that are considered not equal.
+
+    Only indices until the last one of the shortest sequence are compared.
+
+    Args:
+        sequence1: First sequence to use for comparison
+        sequence2: Second sequence to use for comparison
+        binary_predicate: A binary predicate, that returns true if the elements from both sequences are considered equal
+           Defaults to: operator.eq
+        return_index: Return the index of the first pair instead of the pair itself
+
+    Returns:
+        None, if one or more sequences is empty, or they do not differ until the end of the shortest sequence.
+            If one index has elements that are not considered equal, a Tuple of those elements will be returned.
+            If return_index is True, the index of those elements or -1 is returned instead
+
+    Example:
+        mismatch([], []) returns None since both sequences are empty
+
+        mismatch([1, 2, 3, 4, 5], []) returns None, since one sequence is empty
+
+        mismatch([1, 2, 3, 4, 5], [1, 2, 3, 4, 5]) returns None, since both sequences are considered equal
+
+        mismatch([1, 2, 3, 4, 5], [1, 2, 3, 4, 6]) returns (5, 6), the values at the fifth index, since  their fifth index is considered not equal
+
+        mismatch([1, 2, 3, 4, 5], [1, 2, 3, 4, 6, 7, 8, 9]) returns (5, 6) for the same reason.
+            Since one sequence is longer, it's additional elements are not compared
+
+        mismatch([1, 2, 3, 4, 5], [1, 2, 3, 4, 6], return_index=True) returns 4
+    """
+
+    first = next(mismatch_all(sequence1, sequence2, binary_predicate), None)
+
+    if return_index:
+        return -1 if first is None else first[0]
+
+    return None if first is None else first[1:]
+
+
+def mismatch_all(
+    sequence1: Sequence,
+    sequence2: Sequence,
+    binary_predicate: BinaryPredicate = operator.eq,
+) -> Iterator[Tuple[int, Any, Any]]:
+    """Find all pairs of elements from both sequences at the same index, that are considered not equal.
+
+    Only indices until the last one of the shortest sequence are compared, see diff() for comparing whole sequences.
+
+    Args:
+        sequence1: First sequence to use for comparison
+        sequence2: Second sequence to use for comparison
+        binary_predicate: A binary predicate, that returns true if the elements from both sequences are considered equal
+           Defaults to: operator.eq
+
+    Returns:
+        A generator yielding an (index, element1, element2) tuple for every index at which the elements differ
+
+    Example:
+        list(mismatch_all([1, 2, 3, 4], [1, 5, 3, 6, 7])) returns [(1, 2, 5), (3, 4, 6)]
+    """
+
+    if not sequence1 or not sequence2:
+        return
+
+    pairs = zip(sequence1, sequence2)
+
+    if _is_batch_predicate(binary_predicate):
+        for index, (pair, result) in enumerate(_with_results(pairs, binary_predicate)):
+            if not result:
+                yield (index, *pair)
+
+        return
+
+    for index, (element1, element2) in enumerate(pairs):
+        if not binary_predicate(element1, element2):
+            yield index, element1, element2
+
+
+# Tuples and lists compare their items with == before <, so NaN would not be ordered like in the item-by-item loop
+_NATIVELY_COMPARABLE = (bytes, bytearray, str)
+
+
+def _native_threeway(iterable1: Any, iterable2: Any) -> Optional[int]:
+    """Compare two iterables with a native implementation, if one exists for their types.
+
+    Returns:
+        -1, 0 or 1 like lexicographical_compare_threeway(), or None if no native implementation applies
+    """
+
+    if type(iterable1) is type(iterable2) and type(iterable1) in _NATIVELY_COMPARABLE:
+        return (iterable1 > iterable2) - (iterable1 < iterable2)
+
+    if not is_ndarray(iterable1) or not is_ndarray(iterable2):
+        return None
+
+    if iterable1.ndim != 1 or iterable2.ndim != 1:
+        return None
+
+    length1, length2 = len(iterable1), len(iterable2)
+    common = min(length1, length2)
+
+    if common:
+        head1, head2 = iterable1[:common], iterable2[:common]
+        # Elements are equivalent unless one is less than the other, like in the pure Python loop,
+        # so NaN, which is unequal to everything, does not end the comparison
+        less = head1 < head2
+        differences = less | (head2 < head1)
+        index = int(differences.argmax())
+
+        if differences[index]:
+            return -1 if less[index] else 1
+
+    return (length1 > length2) - (length1 < length2)
+
+
+def lexicographical_compare_threeway(
+    iterable1: Iterable,
+    iterable2: Iterable,
+    binary_predicate: BinaryPredicate = operator.lt,
+) -> int:
+    """Compare two iterables lexicographically, stopping at the first pair of elements that are not equivalent.
+
+    Two elements a and b are equivalent if neither binary_predicate(a, b) nor binary_predicate(b, a) is True.
+    If one iterable is a prefix of the other, the shorter one is considered less.
+    With the default binary_predicate, bytes, str and one dimensional NumPy arrays
+    of the same type are compared natively.
+
+    Args:
+        iterable1: First iterable to compare
+        iterable2: Second iterable to compare
+        binary_predicate: A binary predicate, that returns True if its first argument is considered less than its second one
+           Defaults to: operator.lt
+
+    Returns:
+        -1 if iterable1 is less than iterable2, 1 if it is greater and 0 if both are equivalent
+
+    Example:
+        lexicographical_compare_threeway([1, 2, 3], [1, 2, 4]) returns -1, since 3 is less than 4
+
+        lexicographical_compare_threeway([1, 2, 3], [1, 2]) returns 1, since [1, 2] is a prefix of [1, 2, 3]
+    """
+
+    if binary_predicate is operator.lt:
+        native = _native_threeway(iterable1, iterable2)
+
+        if native is not None:
+            return native
+
+    exhausted = object()
+
+    for element1, element2 in itertools.zip_longest(
+        iterable1, iterable2, fillvalue=exhausted
+    ):
+        if element1 is exhausted:
+            return -1
+
+        if element2 is exhausted:
+            return 1
+
+        if binary_predicate(element1, element2):
+            return -1
+
+        if binary_predicate(element2, element1):
+            return 1
+
+    return 0
+
+
+def lexicographical_compare(
+    iterable1: Iterable,
+    iterable2: Iterable,
+    binary_predicate: BinaryPredicate = operator.lt,
+) -> bool:
+    """Check if iterable1 is lexicographically less than iterable2.
+
+    Args:
+        iterable1: First iterable to compare
+        iterable2: Second iterable to compare
+        binary_predicate: A binary predicate, that returns True if its first argument is considered less than its second one
+           Defaults to: operator.lt
+
+    Returns:
+        True if the first element of iterable1 not equivalent to its counterpart in iterable2 is less than it,
+            or iterable1 is a proper prefix of iterable2, False otherwise
+    """
+
+    return lexicographical_compare_threeway(iterable1, iterable2, binary_predicate) < 0
+
+
+@dispatched("find")
+def find(sequence: Sequence, target_element: Any) -> int:
+    """Find the index of the first occurrence of target_element in sequence.
+
+    Args:
+        sequence: A sequence which to search through
+        target_element: An element to search in the sequence
+
+    Returns:
+        The index of target_element's first occurrence, -1 if it was not found or the sequence is empty
+    """
+
+    items = as_items(sequence)
+
+    if items is not sequence:
+        return find(as_array(items), target_element)
+
+    if not sequence:
+        return -1
+
+    try:
+        if not hasattr(sequence, "index"):
+            return operator.indexOf(sequence, target_element)
+
+        return sequence.index(target_element)
+
+    except ValueError:
+        return -1
+
+
+def find_if(iterable: Iterable, unary_predicate: UnaryPredicate) -> int:
+    """Find the index of the first element in iterable satisfying unary_predicate.
+
+    Args:
+        iterable: A iterable which to search through
+        unary_predicate: An UnaryPredicate, which determines if the current value is our target
+
+    Returns:
+        The index of the first element which satisfies unary_predicate, -1 if no element satisfies unary_predicate or the iterable is empty
+    """
+
+    if is_arrow(iterable):
+        from pyaoi import arrow  # noqa: PLC0415
+
+        return arrow.find_if(iterable, unary_predicate)
+
+    iterable = as_items(iterable)
+
+    if not iterable:
+        return -1
+
+    if _is_column_query(iterable, unary_predicate):
+        return iterable.find_where(unary_predicate)
+
+    if _is_batch_predicate(unary_predicate):
+        return next(
+            (
+                i
+                for i, result in enumerate(  # noqa: VNE002
+                    _predicate_results(iterable, unary_predicate)
+                )
+                if result
+            ),
+            -1,
+        )
+
+    for i, val in enumerate(iterable):  # noqa: VNE002
+        if unary_predicate(val):
+            return i
+
+    return -1
+
+
+def find_if_not(iterable: Iterable, unary_predicate: UnaryPredicate) -> int:
+    """Find the index of the first element in iterable NOT satisfying unary_predicate.
+
+    Args:
+        iterable: A iterable which to search through
+        unary_predicate: An UnaryPredicate, which determines if the current value is NOT our target
+
+    Returns:
+        The index of the first element which DOES NOT satisfy unary_predicate, -1 if all elements satisfy unary_predicate or the iterable is empty
+    """
+
+    if is_arrow(iterable):
+        from pyaoi import arrow  # noqa: PLC0415
+
+        return arrow.find_if(iterable, unary_predicate, False)
+
+    iterable = as_items(iterable)
+
+    if not iterable:
+        return -1
+
+    if _is_column_query(iterable, unary_predicate):
+        return iterable.find_where(unary_predicate, False)
+
+    if _is_batch_predicate(unary_predicate):
+        return next(
+            (
+                i
+                for i, result in enumerate(  # noqa: VNE002
+                    _predicate_results(iterable, unary_predicate)
+                )
+                if not result
+            ),
+            -1,
+        )
+
+    for i, val in enumerate(iterable):  # noqa: VNE002
+        if not unary_predicate(val):
+            return i
+
+    return -1
+
+
+def find_end(
+    collection_super: Collection,
+    collection_sub: Collection,
+    binary_predicate: BinaryPredicate = operator.eq,
+) -> int:
+    """Find index of the beginning of the last occurrence of collection_sub in collection_super.
+
+    Args:
+        collection_super: A Collection in which to search for the collection_sub
+        collection_sub: A Collection to search for in collection_super
+        binary_predicate: A BinaryPredicate used to check if an index's elements of both collections are considered equal, defaults to: operator.eq
+
+    Returns:
+        The index of the beginning of the last occurrence of collection_sub in collection_super,
+            -1 if any of the two collections is empty, or collection_sub does not occur once in collection_super
+
+    """
+
+    if not collection_super or not collection_sub:
+        return -1
+
+    for i in range(  # noqa: VNE001
+        (len(collection_super) - 1) - (len(collection_sub) - 1), -1, -1
+    ):
+        if binary_predicate(
+            collection_super[i : i + len(collection_sub)], collection_sub  # noqa E203
+        ):
+            return i
+
+    return -1
+
+
+def find_first_of(
+    iterable_super: Iterable,
+    iterable_sub: Iterable,
+    binary_predicate: BinaryPredicate = operator.eq,
+) -> int:
+    """Find first index in values_in at which an element of iterable_sub occurs.
+
+    Args:
+        iterable_super: A Iterable in which to search for values of iterable_sub
+        iterable_sub: A Iterable of values to search for in values_in
+        binary_predicate: A BinaryPredicate used to check if an index's elements of both Iterables are considered equal, defaults to: operator.eq
+
+    Returns:
+        The first index in values_in at which an element of iterable_sub occurs,
+            or -1 if any of the two iterables is empty or iterable_sub does not occur once in iterable_super
+    """
+
+    if not iterable_super or not iterable_sub:
+        return -1
+
+    if _is_batch_predicate(binary_predicate):
+        iterable_sub = list(iterable_sub)
+        pairs = itertools.product(iterable_super, iterable_sub)
+
+        return next(
+            (
+                i // len(iterable_sub)
+                for i, result in enumerate(  # noqa: VNE001
+                    _predicate_results(pairs, binary_predicate)
+                )
+                if result
+            ),
+            -1,
+        )
+
+    for i, element_super in enumerate(iterable_super):  # noqa: VNE001
+        for element_sub in iterable_sub:
+            if binary_predicate(element_super, element_sub):
+                return i
+
+    return -1
+
+
+@dispatched("adjacent_find")
+def adjacent_find(
+    sequence: Sequence, binary_predicate: BinaryPredicate = operator.eq
+) -> int:
+    """Find the first index at which two adjacent elements are considered equal.
+
+    Args:
+        sequence: a sequence to search through
+        binary_predicate: a binary predicate to evaluate the equality of adjacent elements, defaults to: operator.eq
+
+    Returns:
+        The first index at which two adjacent elements are considered equal,
+            or -1 if the sequence is empty or no two adjacent elements are considered equal
+    """
+
+    items = as_items(sequence)
+
+    if items is not sequence:
+        return adjacent_find(as_array(items), binary_predicate)
+
+    if not sequence:
+        return -1
+
+    return next(
+        (
+            i
+            for i, is_pair in enumerate(  # noqa: VNE001
+                map(binary_predicate, sequence, itertools.islice(sequence, 1, None))
+            )
+            if is_pair
+        ),
+        -1,
+    )
+
+
+@dispatched("search")
+def search(
+    sequence_super: Sequence,
+    sequence_sub: Sequence,
+    binary_predicate: BinaryPredicate = operator.eq,
+) -> int:
+    """Search for the first occurrence of sequence_sub in sequence_super.
+
+    Args:
+        sequence_super: A sequence to search in
+        sequence_sub: A sequence to search for in sequence_super
+        binary_predicate: A binary predicate to evaluate the equality of compared items, defaults to: operator.eq
+
+    Returns:
+        The index of the beginning of the first occurrence of sequence_sub in sequence_super,
+            or -1 if any sequence_super or sequence_sub is empty or sequence_sub does not occur once in sequence_super
+    """
+
+    items = as_items(sequence_super)
+
+    if items is not sequence_super:
+        return search(as_array(items), sequence_sub, binary_predicate)
+
+    if not sequence_super or not sequence_sub:
+        return -1
+
+    for i in range(len(sequence_super) - len(sequence_sub) + 1):  # noqa: VNE001
+        if all(
+            map(
+                binary_predicate,
+                sequence_super[i : i + len(sequence_sub)],  # noqa: E203
+                sequence_sub,
+            )
+        ):
+            return i
+
+    return -1
+
+
+def search_n(
+    sequence: Sequence,
+    value: Any,  # noqa: VNE002
+    num_elements: int,  # noqa: VNE001
+    binary_predicate: BinaryPredicate = operator.eq,
+) -> int:
+    """Search for the first occurrence of num_elements repetitions of value in sequence.
+
+    Args:
+        sequence: A sequence to search in
+        value: any object to search for in collection
+        num_elements: How many times, counting from the beginning, value has to be repeated
+        binary_predicate: A binary predicate to evaluate the equality of consecutive items, defaults to: operator.eq
+
+    Returns:
+        The index of the beginning of the first num_elements repetitions of value in sequence,
+            or -1 if sequence is empty or has no num_elements consecutive repetitions of value
+    """
+
+    runs = sys.modules.get("pyaoi.runs")
+
+    # If pyaoi.runs was never imported, no sequence can be a RunLength
+    if runs is not None and isinstance(sequence, runs.RunLength):
+        return sequence.search_n(value, num_elements, binary_predicate)
+
+    if not sequence:
+        return -1
+
+    if num_elements <= 0:
+        return 0
+
+    # Only full windows count, the last one starts num_elements before the end
+    for i in range(len(sequence) - num_elements + 1):  # noqa: VNE001
+        for element in sequence[i : i + num_elements]:  # noqa: E203
+            if not binary_predicate(element, value):
+                break
+        else:
+            return i
+
+    return -1
+
+
+def copy_replace(iterable: Iterable, old_val: Any, new_val: Any) -> Iterable:
+    """Copy iterable while replacing all occurrences of old_val with new_val.
+
+    Args:
+        iterable: An iterable to copy
+        old_val: A value to replace
+        new_val: A value serving as the replacement
+
+    Returns:
+        A generator yielding the values of iterable with all occurrences of old_val replaced with new_val
+    """
+
+    return (val if val != old_val else new_val for val in iterable)
+
+
+def copy_replace_if(
+    iterable: Iterable, unary_predicate: UnaryPredicate, new_val: Any
+) -> Iterable:
+    """Copy iterable while replacing all values satisfying unary_predicate with new_val.
+
+    Args:
+        iterable: An iterable to copy
+        unary_predicate: An unary predicate deciding whether to replace an item
+        new_val: A value serving as the replacement
+
+    Returns:
+        A generator yielding the values of iterable with all values satisfying unary_predicate replaced with new_val
+    """
+
+    if _is_batch_predicate(unary_predicate):
+        return (
+            new_val if result else val
+            for val, result in _with_results(iterable, unary_predicate)
+        )
+
+    return (new_val if unary_predicate(val) else val for val in iterable)
+
+
+def copy_replace_if_not(
+    iterable: Iterable, unary_predicate: UnaryPredicate, new_val: Any
+) -> Iterable:
+    """Copy iterable while replacing all values not satisfying unary_predicate with new_val.
+
+    Args:
+        iterable: An iterable to copy
+        unary_predicate: An unary predicate deciding whether to replace an item
+        new_val: A value serving as the replacement
+
+    Returns:
+        A generator yielding the values of iterable with all values not satisfying unary_predicate replaced with new_val
+    """
+
+    if _is_batch_predicate(unary_predicate):
+        return (
+            new_val if not result else val
+            for val, result in _with_results(iterable, unary_predicate)
+        )
+
+    return (new_val if not unary_predicate(val) else val for val in iterable)
+
+
+_KEEP = object()
+
+
+class _TranslationTable(dict):
+    """A str.translate() table, which maps characters without an entry to a default."""
+
+    def __init__(self, table: dict, default: str) -> None:
+        super().__init__(table)
+        self.default = default
+
+    def __missing__(self, key: int) -> str:
+        return self.default
+
+
+def _str_table(mapping: Mapping, default: Any) -> Optional[dict]:
+    """Build a str.translate() table from mapping, None if it does not map characters to strings."""
+
+    table = {}
+
+    for key, value in mapping.items():
+        # Other keys can never be equal to a character of the string
+        if isinstance(key, str) and len(key) == 1:
+            if not isinstance(value, str):
+                return None
+
+            table[ord(key)] = value
+
+    if default is _KEEP:
+        return table
+
+    return _TranslationTable(table, default) if isinstance(default, str) else None
+
+
+def _byte_table(mapping: Mapping, default: Any) -> Optional[bytes]:
+    """Build a bytes.translate() table from mapping, None if it does not map byte values to byte values."""
+
+    def is_byte(value: Any) -> bool:
+        return isinstance(value, int) and 0 <= value < 256
+
+    if default is _KEEP:
+        table = bytearray(range(256))
+    elif is_byte(default):
+        table = bytearray((default,)) * 256
+    else:
+        return None
+
+    for key, value in mapping.items():
+        if is_byte(key):
+            if not is_byte(value):
+                return None
+
+            table[key] = value
+
+    return bytes(table)
+
+
+def _replace_many_ndarray(values: Any, mapping: Mapping, default: Any) -> Any:
+    """Replace the items of a NumPy array by looking all of them up at once.
+
+    Dense integer keys are looked up in a table indexed by value with numpy.take(),
+    other keys are located by binary search in their sorted array.
+    """
+
+    import numpy  # noqa: PLC0415
+
+    keys = numpy.array(list(mapping.keys()))
+    replacements = numpy.array(list(mapping.values()))
+
+    if not len(keys) or keys.dtype.kind == "O" or replacements.dtype.kind == "O":
+        return numpy.array(
+            list(copy_replace_many(values.ravel().tolist(), mapping, default))
+        ).reshape(values.shape)
+
+    fallback = values if default is _KEEP else numpy.asarray(default)
+    dtype = numpy.result_type(replacements, fallback)
+
+    if values.dtype.kind in "iu" and keys.dtype.kind in "iu" and values.size:
+        low = min(int(values.min()), int(keys.min()))
+        high = max(int(values.max()), int(keys.max()))
+
+        if high - low <= 2 * (values.size + len(keys)) + 1024:
+            if default is _KEEP:
+                table = numpy.arange(low, high + 1).astype(dtype)
+            else:
+                table = numpy.full(high - low + 1, default, dtype)
+
+            table[keys - low] = replacements
+
+            return numpy.take(table, values.astype(numpy.int64) - low)
+
+    order = numpy.argsort(keys, kind="stable")
+    keys, replacements = keys[order], replacements[order]
+    positions = numpy.searchsorted(keys, values).clip(0, len(keys) - 1)
+    found = keys[positions] == values
+
+    return numpy.where(found, replacements[positions], fallback).astype(dtype)
+
+
+def copy_replace_many(
+    iterable: Iterable, mapping: Mapping, default: Any = _KEEP
+) -> Iterable:
+    """Copy iterable while replacing every value which is a key of mapping with the value it maps to.
+
+    Unlike chaining copy_replace() calls, every value is looked up once: str and bytes objects are
+    converted with str.translate() and bytes.translate(), NumPy arrays with a lookup table or a binary
+    search of all values at once and other iterables with a single dictionary lookup per value.
+
+    Args:
+        iterable: An iterable to copy
+        mapping: A mapping from the values to replace to their replacements
+        default: A replacement for all values which are not keys of mapping, they are kept if it is not given
+
+    Returns:
+        A str, bytes, bytearray or NumPy array for inputs of these types, an iterator otherwise
+
+    Example:
+        list(copy_replace_many([1, 2, 3, 2], {2: 20, 3: 30})) returns [1, 20, 30, 20]
+
+        copy_replace_many("hello", {"l": "L", "o": ""}) returns "heLL"
+    """
+
+    if isinstance(iterable, str):
+        str_table = _str_table(mapping, default)
+
+        if str_table is not None:
+            return iterable.translate(str_table)
+
+    elif isinstance(iterable, (bytes, bytearray)):
+        byte_table = _byte_table(mapping, default)
+
+        if byte_table is not None:
+            return iterable.translate(byte_table)
+
+    elif is_ndarray(iterable):
+        return _replace_many_ndarray(iterable, mapping, default)
+
+    get = mapping.get
+
+    if default is not _KEEP:
+        return map(get, iterable, itertools.repeat(default))
+
+    return (get(val, val) for val in iterable)
+
+
+def replace_many_inplace(
+    sequence: MutableSequence, mapping: Mapping, default: Any = _KEEP
+) -> None:
+    """Replace every value of sequence which is a key of mapping with the value it maps to, see copy_replace_many().
+
+    Args:
+        sequence: A mutable sequence to modify
+        mapping: A mapping from the values to replace to their replacements
+        default: A replacement for all values which are not keys of mapping, they are kept if it is not given
+    """
+
+    if is_ndarray(sequence):
+        sequence[...] = _replace_many_ndarray(sequence, mapping, default)
+    elif isinstance(sequence, bytearray):
+        sequence[:] = copy_replace_many(sequence, mapping, default)  # type: ignore
+    elif isinstance(sequence, array):
+        sequence[:] = array(
+            sequence.typecode, copy_replace_many(sequence, mapping, default)
+        )
+    elif isinstance(sequence, list):
+        sequence[:] = copy_replace_many(sequence, mapping, default)  # type: ignore
+    else:
+        for i, val in enumerate(  # noqa: VNE001
+            copy_replace_many(list(sequence), mapping, default)
+        ):
+            sequence[i] = val
+
+
+def copy_except(iterable: Iterable, exclude: Any) -> Iterable:
+    """Copy iterable while excluding all occurrences of exclude.
+
+    Args:
+        iterable: An iterable to copy
+        exclude: A value to exclude
+
+    Returns:
+        A generator yielding the values of iterable except exclude
+    """
+
+    return (val for val in iterable if val != exclude)
+
+
+def copy_except_if(iterable: Iterable, unary_predicate: UnaryPredicate) -> Iterable:
+    """Copy iterable while excluding all values satisfying unary_predicate.
+
+    Args:
+        iterable: An iterable to copy
+        unary_predicate: An unary predicate deciding whether to exclude a value
+
+    Returns:
+        A generator yielding the values of iterable except the ones satisfying unary_predicate,
+            or Arrow data of the same kind as iterable if it is an Arrow array, chunked array, table or record batch
+    """
+
+    if is_arrow(iterable):
+        from pyaoi import arrow  # noqa: PLC0415
+
+        return arrow.filter_mask(iterable, unary_predicate, False)
+
+    iterable = as_items(iterable)
+
+    if _is_column_query(iterable, unary_predicate):
+        return iterable.rows_where(unary_predicate, False)
+
+    if _is_batch_predicate(unary_predicate):
+        return (
+            val
+            for val, result in _with_results(iterable, unary_predicate)
+            if not result
+        )
+
+    return (val for val in iterable if not unary_predicate(val))
+
+
+def copy_except_if_not(iterable: Iterable, unary_predicate: UnaryPredicate) -> Iterable:
+    """Copy iterable while excluding all values not satisfying unary_predicate.
+
+    Args:
+        iterable: An iterable to copy
+        unary_predicate: An unary predicate deciding whether to exclude a value
+
+    Returns:
+        A generator yielding the values of iterable except the ones not satisfying unary_predicate,
+            or Arrow data of the same kind as iterable if it is an Arrow array, chunked array, table or record batch
+    """
+
+    if is_arrow(iterable):
+        from pyaoi import arrow  # noqa: PLC0415
+
+        return arrow.filter_mask(iterable, unary_predicate)
+
+    iterable = as_items(iterable)
+
+    if _is_column_query(iterable, unary_predicate):
+        return iterable.rows_where(unary_predicate)
+
+    if _is_batch_predicate(unary_predicate):
+        return (
+            val for val, result in _with_results(iterable, unary_predicate) if result
+        )
+
+    return (val for val in iterable if unary_predicate(val))
+
+
+def fill_n(sequence: Sequence, val: Any, num_elements: int) -> chain:  # noqa: VNE002
+    """Set the first num_elements indices of sequence to val.
+    Args:
+        sequence: A sequence to fill
+        val: A value to set indices of sequence to
+        num_elements: A value indicating how many indices(counted from the beginning) to set to val
+    Returns:
+        An iterable with the first num_elements elements changed to val
+    """
+
+    return itertools.chain(
+        itertools.repeat(
+            val,
+            num_elements if num_elements < len(sequence) else len(sequence),
+        ),
+        sequence[num_elements:],
+    )
+
+
+def map_n(
+    sequence: Sequence, unary_function: UnaryFunction, num_elements: int
+) -> chain:
+    """Change the first num_elements elements in sequence by passing them to unary_function and replacing them by the return values.
+
+    Args:
+        sequence: A sequence to modify
+        unary_function: A function returning new values for each element
+        num_elements: A value indicating the number of elements(counted from the beginning) to transform
+    Returns:
+        An iterable with the first num_elements elements changed by unary_function
+    """
+
+    return chain(map(unary_function, sequence[:num_elements]), sequence[num_elements:])
+
+
+def rotate_copy(iterable: Iterable, n: int) -> Deque:
+    """Return a deque of iterable with it's content rotated n places to the right.
+
+    iterable: An iterable to rotate
+    n: The number of places to rotate the iterable (negative values rotate to the left)
+    """
+    deq: Deque = collections.deque(iterable)
+    deq.rotate(n)
+
+    return deq
+
+
+def shift_left(sized: Sized, n: int) -> Sized:
+    """Return a copy of sized with it's elements shifted n places to the right but keeping the same size.
+    sized: A sized object which's elements to shift
+    n: How many places to shift sized's items to the right
+    """
+
+    return sized[: len(sized) - n] + [None] * n
+
+
+def shift_right(sized: Sized, n: int) -> Sized:
+    """Return a copy of sized with it's elements shifted n places to the left but keeping the same size.
+    sized: A sized object which's elements to shift
+    n: How many places to shift sized's items to the left
+    """
+
+    return [None] * n + sized[n : len(sized)]
+
+
+def _fill_block(sequence: MutableSequence, val: Any, num_elements: int) -> Any:
+    """Return num_elements copies of val, as a typed array if sequence is one."""
+
+    if isinstance(sequence, array):
+        return array(sequence.typecode, (val,)) * num_elements
+
+    return [val] * num_elements
+
+
+def _fill_range(sequence: MutableSequence, start: int, stop: int, val: Any) -> None:
+    """Set sequence[start:stop] to val, using a single slice assignment where possible."""
+
+    if start >= stop:
+        return
+
+    if is_ndarray(sequence):
+        sequence[start:stop] = val
+    elif isinstance(sequence, (list, bytearray, array)):
+        sequence[start:stop] = _fill_block(sequence, val, stop - start)
+    else:
+        for i in range(start, stop):  # noqa: VNE001
+            sequence[i] = val
+
+
+def _copy_range(sequence: MutableSequence, start: int, stop: int) -> Any:
+    """Return a copy of sequence[start:stop], which does not share memory with sequence."""
+
+    part = sequence[start:stop]
+
+    return part.copy() if is_ndarray(part) else part
+
+
+def _move_range(
+    sequence: MutableSequence, source: int, target: int, num_elements: int
+) -> None:
+    """Copy sequence[source:source + num_elements] to target in chunks of at most MOVE_CHUNK_SIZE elements.
+
+    The ranges may overlap, chunks are copied in the order which never overwrites an element before it is copied.
+    """
+
+    offsets = range(0, num_elements, MOVE_CHUNK_SIZE)
+
+    for offset in offsets if target < source else reversed(offsets):
+        size = min(MOVE_CHUNK_SIZE, num_elements - offset)
+        part = _copy_range(sequence, source + offset, source + offset + size)
+        sequence[target + offset : target + offset + size] = part  # noqa: E203
+
+
+def _swap_ranges(
+    sequence: MutableSequence, first: int, second: int, num_elements: int
+) -> None:
+    """Swap the non-overlapping ranges of num_elements elements starting at first and second, chunk by chunk."""
+
+    for offset in range(0, num_elements, MOVE_CHUNK_SIZE):
+        size = min(MOVE_CHUNK_SIZE, num_elements - offset)
+        first_part = _copy_range(sequence, first + offset, first + offset + size)
+        second_part = sequence[second + offset : second + offset + size]  # noqa: E203
+        sequence[first + offset : first + offset + size] = second_part  # noqa: E203
+        sequence[second + offset : second + offset + size] = first_part  # noqa: E203
+
+
+def _rotate_left(sequence: MutableSequence, start: int, stop: int, k: int) -> None:
+    """Rotate sequence[start:stop] k places to the left, using at most MOVE_CHUNK_SIZE elements of extra memory."""
+
+    # Every block swap puts the shorter of the two blocks into its final place
+    while MOVE_CHUNK_SIZE < k < stop - start - MOVE_CHUNK_SIZE:
+        rest = stop - start - k
+
+        if k <= rest:
+            _swap_ranges(sequence, start, stop - k, k)
+            stop -= k
+        else:
+            _swap_ranges(sequence, start, start + k, rest)
+            start += rest
+            k -= rest
+
+    rest = stop - start - k
+
+    if not k or not rest:
+        return
+
+    # The shorter block fits into a single chunk now, lists and arrays move the longer one with a memmove
+    if not is_ndarray(sequence):
+        if k <= rest:
+            head = sequence[start : start + k]  # noqa: E203
+            del sequence[start : start + k]  # noqa: E203
+            sequence[stop - k : stop - k] = head  # noqa: E203
+        else:
+            tail = sequence[stop - rest : stop]  # noqa: E203
+            del sequence[stop - rest : stop]  # noqa: E203
+            sequence[start:start] = tail
+
+    elif k <= rest:
+        head = _copy_range(sequence, start, start + k)
+        _move_range(sequence, start + k, start, rest)
+        sequence[stop - k : stop] = head  # noqa: E203
+    else:
+        tail = _copy_range(sequence, stop - rest, stop)
+        _move_range(sequence, start, start + rest, k)
+        sequence[start : start + rest] = tail  # noqa: E203
+
+
+def _reverse_range(sequence: MutableSequence, start: int, stop: int) -> None:
+    """Reverse sequence[start:stop] in place by swapping elements."""
+
+    stop -= 1
+
+    while start < stop:
+        sequence[start], sequence[stop] = sequence[stop], sequence[start]
+        start += 1
+        stop -= 1
+
+
+def fill_n_inplace(
+    sequence: MutableSequence, val: Any, num_elements: int  # noqa: VNE002
+) -> None:
+    """Set the first num_elements indices of sequence to val, modifying sequence.
+
+    Args:
+        sequence: A mutable sequence to fill
+        val: A value to set indices of sequence to
+        num_elements: A value indicating how many indices(counted from the beginning) to set to val
+    """
+
+    _fill_range(sequence, 0, min(max(num_elements, 0), len(sequence)), val)
+
+
+def transform_n_inplace(
+    sequence: MutableSequence, unary_function: UnaryFunction, num_elements: int
+) -> None:
+    """Replace the first num_elements elements in sequence by the values unary_function returns for them.
+
+    Args:
+        sequence: A mutable sequence to modify
+        unary_function: A function returning new values for each element
+        num_elements: A value indicating the number of elements(counted from the beginning) to transform
+    """
+
+    num_elements = min(max(num_elements, 0), len(sequence))
+
+    if isinstance(sequence, array):
+        sequence[:num_elements] = array(
+            sequence.typecode, map(unary_function, sequence[:num_elements])
+        )
+    elif isinstance(sequence, (list, bytearray)) or is_ndarray(sequence):
+        sequence[:num_elements] = list(map(unary_function, sequence[:num_elements]))
+    else:
+        for i in range(num_elements):  # noqa: VNE001
+            sequence[i] = unary_function(sequence[i])
+
+
+def rotate(sequence: MutableSequence, n: int) -> None:
+    """Rotate the content of sequence n places to the right, modifying sequence.
+
+    Lists, arrays, bytearrays and NumPy arrays are rotated by Gries and Mills' block swaps,
+    done with native slice operations on chunks of at most MOVE_CHUNK_SIZE elements,
+    so the extra memory needed does not grow with the sequence.
+    Other mutable sequences are rotated by three reversals without extra memory.
+
+    Args:
+        sequence: A mutable sequence to rotate
+        n: The number of places to rotate the sequence (negative values rotate to the left)
+    """
+
+    length = len(sequence)
+
+    if not length or not n % length:
+        return
+
+    n %= length
+
+    if isinstance(sequence, deque):
+        sequence.rotate(n)
+
+    elif is_ndarray(sequence) or isinstance(sequence, (list, bytearray, array)):
+        _rotate_left(sequence, 0, length, length - n)
+
+    else:
+        _reverse_range(sequence, 0, length)
+        _reverse_range(sequence, 0, n)
+        _reverse_range(sequence, n, length)
+
+
+def shift_left_inplace(
+    sequence: MutableSequence, n: int, fill_value: Any = None
+) -> None:
+    """Shift sequence's elements n places to the left, modifying sequence.
+
+    Like std::shift_left, the elements move and the vacated places are set to fill_value.
+    This differs from shift_left(), which keeps the elements in place and only overwrites n of them with None.
+
+    Lists, bytearrays and typed arrays drop their first n elements and append the fill values,
+    which moves the remaining elements with a single memmove. NumPy arrays move them with one slice assignment.
+
+    sequence: A mutable sequence which's elements to shift
+    n: How many places to shift sequence's items
+    fill_value: The value vacated places are set to, use a value matching the type of typed arrays
+    """
+
+    length = len(sequence)
+    n = min(max(n, 0), length)
+
+    if not n:
+        return
+
+    if isinstance(sequence, (list, bytearray, array)):
+        del sequence[:n]
+        sequence.extend(_fill_block(sequence, fill_value, n))  # type: ignore
+        return
+
+    if is_ndarray(sequence):
+        sequence[: length - n] = sequence[n:]
+    else:
+        for i in range(length - n):  # noqa: VNE001
+            sequence[i] = sequence[i + n]
+
+    _fill_range(sequence, length - n, length, fill_value)
+
+
+def shift_right_inplace(
+    sequence: MutableSequence, n: int, fill_value: Any = None
+) -> None:
+    """Shift sequence's elements n places to the right, modifying sequence.
+
+    Like std::shift_right, the elements move and the vacated places are set to fill_value.
+    This differs from shift_right(), which keeps the elements in place and only overwrites n of them with None.
+
+    Lists, bytearrays and typed arrays drop their last n elements and insert the fill values at the beginning,
+    which moves the remaining elements with a single memmove. NumPy arrays move them with one slice assignment.
+
+    sequence: A mutable sequence which's elements to shift
+    n: How many places to shift sequence's items
+    fill_value: The value vacated places are set to, use a value matching the type of typed arrays
+    """
+
+    length = len(sequence)
+    n = min(max(n, 0), length)
+
+    if not n:
+        return
+
+    if isinstance(sequence, (list, bytearray, array)):
+        del sequence[length - n :]  # noqa: E203
+        sequence[:0] = _fill_block(sequence, fill_value, n)
+        return
+
+    if is_ndarray(sequence):
+        sequence[n:] = sequence[: length - n]
+    else:
+        # Move the last elements first, so none is overwritten before it is moved
+        for i in reversed(range(n, length)):  # noqa: VNE001
+            sequence[i] = sequence[i - n]
+
+    _fill_range(sequence, 0, n, fill_value)
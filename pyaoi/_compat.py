@@ -0,0 +1,164 @@
+"""Detection of optional third party types without importing their packages, and other helpers needed on import."""
+
+import functools
+import sys
+import types
+from array import array
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Types which never expose the buffer protocol or are handled natively by pyaoi
+_NOT_BUFFERS = frozenset(
+    (
+        list,
+        tuple,
+        str,
+        range,
+        dict,
+        set,
+        frozenset,
+        bytes,
+        bytearray,
+        array,
+        types.GeneratorType,
+    )
+)
+_NATIVE_ORDER = "@=<" if sys.byteorder == "little" else "@=>"
+
+
+def is_ndarray(obj: Any) -> bool:
+    """Check if obj is a NumPy array, without importing NumPy.
+
+    If NumPy was never imported, no object can be an array of it.
+    """
+
+    numpy = sys.modules.get("numpy")
+
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+
+def is_arrow(obj: Any) -> bool:
+    """Check if obj is an Arrow array, chunked array, table or record batch, without importing PyArrow."""
+
+    pyarrow = sys.modules.get("pyarrow")
+
+    return pyarrow is not None and isinstance(
+        obj, (pyarrow.Array, pyarrow.ChunkedArray, pyarrow.Table, pyarrow.RecordBatch)
+    )
+
+
+def as_items(obj: Any) -> Any:
+    """Return a flat memoryview of an object, which exposes its items only through the buffer protocol.
+
+    The view shares the object's memory, so e.g. mmap objects, ctypes arrays or
+    multi-dimensional memoryviews can be scanned without copying them.
+    The items of a pyaoi.shared.SharedArray are read from its shared memory segment.
+    Other objects, including the ones pyaoi handles natively, are returned unchanged.
+    """
+
+    if type(obj) in _NOT_BUFFERS or is_ndarray(obj):
+        return obj
+
+    shared = sys.modules.get("pyaoi.shared")
+
+    # Handles of data in shared memory are tuples, their items have to be read from the segment
+    if shared is not None and type(obj) is shared.SharedArray:
+        return shared.items(obj)
+
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        return obj
+
+    # E.g. ctypes describes its native items with an explicit byte order, which memoryview can not decode
+    item_format = view.format.lstrip(_NATIVE_ORDER)
+
+    if view.ndim == 1 and item_format == view.format:
+        return obj if isinstance(obj, memoryview) else view
+
+    try:
+        return view.cast("B").cast(item_format)
+    except (TypeError, ValueError):
+        return obj
+
+
+def as_array(view: Any) -> Any:
+    """Wrap a flat memoryview returned by as_items() in a NumPy array sharing its memory, if NumPy was imported.
+
+    This lets vectorized backends scan buffers, the view itself is returned otherwise.
+    """
+
+    numpy = sys.modules.get("numpy")
+
+    if numpy is None or not isinstance(view, memoryview):
+        return view
+
+    try:
+        return numpy.frombuffer(view, view.format)
+    except (TypeError, ValueError):
+        return view
+
+
+def length(obj: Any) -> Optional[int]:
+    """Return the number of items of obj, None if it has no length."""
+
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def first_argument(parameter: str, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+    """Return the first argument of a call, which may be passed by keyword as parameter, or None if it is missing."""
+
+    return args[0] if args else kwargs.get(parameter)
+
+
+def dispatched(operation: str) -> Callable:
+    """Decorate the pure Python implementation of an operation to dispatch its calls.
+
+    Importing pyaoi.dispatch and building the operation's Dispatcher are deferred to the first call,
+    so decorating a function costs next to nothing when importing pyaoi.
+
+    Args:
+        operation: The name of the operation, whose key function and backends are defined in pyaoi.dispatch
+
+    Returns:
+        A decorator returning a function with the decorated one's signature,
+            whose dispatcher is returned by pyaoi.dispatch._dispatcher()
+    """
+
+    def decorator(function: Callable) -> Callable:
+        # Shared with the dispatcher, which fills it with a plan per key
+        plans: Dict[Any, Any] = {}
+        key: Optional[Callable] = None
+        choose: Optional[Callable] = None
+        # The input whose size decides the backend, which may also be passed by keyword
+        first = function.__code__.co_varnames[0]
+
+        @functools.wraps(function)
+        def dispatching(*args: Any, **kwargs: Any) -> Any:
+            nonlocal key, choose
+
+            if key is None:
+                from pyaoi.dispatch import _dispatcher  # noqa: PLC0415
+
+                dispatcher = _dispatcher(dispatching)
+                key, choose = dispatcher.key, dispatcher.choose
+
+            call_key = key(*args, **kwargs)
+            plan = plans.get(call_key)
+
+            # Most keys are supported by a single backend, whose plan is the backend itself
+            if plan is not None and plan.__class__ is not tuple:
+                return plan(*args, **kwargs)
+
+            size = length(first_argument(first, args, kwargs))
+
+            return choose(call_key, size)(*args, **kwargs)  # type: ignore
+
+        dispatching.operation = operation  # type: ignore
+        dispatching.plans = plans  # type: ignore
+
+        return dispatching
+
+    return decorator
@@ -0,0 +1,464 @@
+"""Computing the differences between two sequences as a minimal series of edit operations."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import bisect
+import operator
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+BinaryPredicate = Callable[[Any, Any], bool]
+Opcode = Tuple[str, int, int, int, int]
+# A matching block (i, j, size) states that a[i:i + size] equals b[j:j + size]
+Block = Tuple[int, int, int]
+Segment = Tuple[int, int, int, int]
+
+_BLOCK, _PATIENCE, _MYERS = range(3)
+
+_PATIENCE_AFTER = 32
+"""The number of differences in each half of a segment, above which it is split at unique items instead"""
+
+
+_SLICEABLE = (list, tuple, str, bytes, bytearray)
+
+
+def _common_length(
+    a: Sequence, b: Sequence, a_index: int, b_index: int, limit: int, forward: bool
+) -> int:
+    """Count the equal items after a[a_index] and b[b_index], or before them if not forward, comparing slices natively.
+
+    The compared slices grow exponentially while they are equal and shrink when they
+    are not, so this takes O(log(limit)) slice comparisons and scans about twice the common length.
+    """
+
+    length = 0
+    step = 8
+
+    while length < limit:
+        probe = min(limit, length + step)
+
+        if forward:
+            equal = (
+                a[a_index + length : a_index + probe]  # noqa: E203
+                == b[b_index + length : b_index + probe]  # noqa: E203
+            )
+        else:
+            equal = (
+                a[a_index - probe : a_index - length]  # noqa: E203
+                == b[b_index - probe : b_index - length]  # noqa: E203
+            )
+
+        if equal:
+            length = probe
+            step *= 2
+        elif probe - length == 1:
+            break
+        else:
+            step = (probe - length) // 2
+
+    return length
+
+
+def _strip(
+    a: Sequence, b: Sequence, segment: Segment, equal: BinaryPredicate
+) -> Tuple[Segment, int, int]:
+    """Return the segment without its common prefix and suffix, and the lengths of both."""
+
+    a_start, a_stop, b_start, b_stop = segment
+
+    if equal is operator.eq and type(a) is type(b) and isinstance(a, _SLICEABLE):
+        prefix = _common_length(
+            a, b, a_start, b_start, min(a_stop - a_start, b_stop - b_start), True
+        )
+        suffix = _common_length(
+            a,
+            b,
+            a_stop,
+            b_stop,
+            min(a_stop - a_start, b_stop - b_start) - prefix,
+            False,
+        )
+
+        return (
+            (a_start + prefix, a_stop - suffix, b_start + prefix, b_stop - suffix),
+            prefix,
+            suffix,
+        )
+
+    prefix = 0
+
+    while (
+        a_start + prefix < a_stop
+        and b_start + prefix < b_stop
+        and equal(a[a_start + prefix], b[b_start + prefix])
+    ):
+        prefix += 1
+
+    a_start += prefix
+    b_start += prefix
+    suffix = 0
+
+    while (
+        a_start < a_stop - suffix
+        and b_start < b_stop - suffix
+        and equal(a[a_stop - suffix - 1], b[b_stop - suffix - 1])
+    ):
+        suffix += 1
+
+    return (a_start, a_stop - suffix, b_start, b_stop - suffix), prefix, suffix
+
+
+def _middle(
+    a: Sequence,
+    b: Sequence,
+    segment: Segment,
+    equal: BinaryPredicate,
+    limit: Optional[int] = None,
+) -> Optional[Tuple[int, int]]:
+    """Find a point on a shortest edit path through segment, where it is split in two halves.
+
+    Myers' algorithm extends the furthest reaching paths with d differences from both
+    corners of the edit graph at once, until a forward and a backward path overlap.
+    Only the current frontier of each direction is kept, so this takes linear space.
+    Both sequences must not be empty.
+
+    Args:
+        limit: Give up once the paths from both corners have more than limit differences each
+
+    Returns:
+        The absolute indices into a and b at which the forward path reached the overlap,
+            None if the limit was exceeded
+    """
+
+    a_start, a_stop, b_start, b_stop = segment
+    n = a_stop - a_start
+    m = b_stop - b_start
+    max_d = (n + m + 1) // 2
+    native = equal is operator.eq and type(a) is type(b) and isinstance(a, _SLICEABLE)
+    offset = max_d + 1
+    forward = [-1] * (2 * offset + 1)
+    backward = [-1] * (2 * offset + 1)
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    odd = delta % 2 != 0
+    # Diagonals whose paths left the edit graph are no longer extended
+    forward_start = forward_end = backward_start = backward_end = 0
+
+    for d in range(max_d + 1):
+        if limit is not None and d > limit:
+            return None
+
+        for k in range(-d + forward_start, d + 1 - forward_end, 2):
+            if k == -d or (
+                k != d and forward[offset + k - 1] < forward[offset + k + 1]
+            ):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+
+            y = x - k
+
+            if native and x < n and y < m:
+                snake = _common_length(
+                    a, b, a_start + x, b_start + y, min(n - x, m - y), True
+                )
+                x += snake
+                y += snake
+
+            while x < n and y < m and equal(a[a_start + x], b[b_start + y]):
+                x += 1
+                y += 1
+
+            forward[offset + k] = x
+
+            if x > n:
+                forward_end += 2
+            elif y > m:
+                forward_start += 2
+            elif odd:
+                reverse = offset + delta - k
+
+                if 0 <= reverse < len(backward) and backward[reverse] != -1:
+                    if x >= n - backward[reverse]:
+                        return a_start + x, b_start + y
+
+        for k in range(-d + backward_start, d + 1 - backward_end, 2):
+            if k == -d or (
+                k != d and backward[offset + k - 1] < backward[offset + k + 1]
+            ):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+
+            y = x - k
+
+            if native and x < n and y < m:
+                snake = _common_length(
+                    a, b, a_stop - x, b_stop - y, min(n - x, m - y), False
+                )
+                x += snake
+                y += snake
+
+            while x < n and y < m and equal(a[a_stop - x - 1], b[b_stop - y - 1]):
+                x += 1
+                y += 1
+
+            backward[offset + k] = x
+
+            if x > n:
+                backward_end += 2
+            elif y > m:
+                backward_start += 2
+            elif not odd:
+                reverse = offset + delta - k
+
+                if 0 <= reverse < len(forward) and forward[reverse] != -1:
+                    forward_x = forward[reverse]
+
+                    if forward_x >= n - x:
+                        return (
+                            a_start + forward_x,
+                            b_start + forward_x - (delta - k),
+                        )
+
+    # Unreachable for non-empty sequences, splitting in the middle is still correct
+    return a_start + n // 2, b_start + m // 2
+
+
+def _unique_anchors(
+    a: Sequence, b: Sequence, segment: Segment
+) -> Optional[List[Tuple[int, int]]]:
+    """Match the items occurring exactly once in both parts of segment, as patience diff does.
+
+    Returns:
+        The longest series of such pairs of indices, that increase in a and b,
+            None if there are no such items or they are not hashable
+    """
+
+    a_start, a_stop, b_start, b_stop = segment
+
+    try:
+        a_counts = Counter(a[i] for i in range(a_start, a_stop))
+        b_counts = Counter(b[j] for j in range(b_start, b_stop))
+    except TypeError:
+        return None
+
+    b_index = {
+        b[j]: j
+        for j in range(b_start, b_stop)
+        if b_counts[b[j]] == 1 and a_counts[b[j]] == 1
+    }
+    pairs = [(i, b_index[a[i]]) for i in range(a_start, a_stop) if a[i] in b_index]
+
+    if not pairs:
+        return None
+
+    # Patience sorting: the longest series of pairs increasing in b
+    tails: List[int] = []
+    tail_pairs: List[int] = []
+    previous: List[int] = []
+
+    for position, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(tails, j)
+
+        if pile == len(tails):
+            tails.append(j)
+            tail_pairs.append(position)
+        else:
+            tails[pile] = j
+            tail_pairs[pile] = position
+
+        previous.append(tail_pairs[pile - 1] if pile else -1)
+
+    anchors = []
+    position = tail_pairs[-1]
+
+    while position != -1:
+        anchors.append(pairs[position])
+        position = previous[position]
+
+    return anchors[::-1]
+
+
+def _disjoint(a: Sequence, b: Sequence, segment: Segment) -> bool:
+    """Return whether both parts of segment have no item in common, False if the items are not hashable."""
+
+    a_start, a_stop, b_start, b_stop = segment
+
+    try:
+        a_items = set(a[i] for i in range(a_start, a_stop))
+        return a_items.isdisjoint(b[j] for j in range(b_start, b_stop))
+    except TypeError:
+        return False
+
+
+def matching_blocks(
+    a: Sequence, b: Sequence, binary_predicate: BinaryPredicate = operator.eq
+) -> List[Block]:
+    """Return the blocks of items common to a and b along an edit path, in order.
+
+    Common prefixes and suffixes are matched directly, the rest is diffed by Myers' O(ND)
+    algorithm in linear space, which finds a shortest edit path. If binary_predicate is
+    operator.eq and the items are hashable, segments without common items are skipped
+    and segments with many differences are split at the items occurring once in both of
+    their parts instead, like patience diff does. This is much faster for large inputs,
+    but the path may no longer be the shortest one.
+    """
+
+    blocks: List[Block] = []
+    # Blocks to output and segments still to diff, popped in order. Segments split by
+    # Myers' algorithm are not searched for unique items, it found few differences in them
+    stack: List[Tuple[int, Tuple[int, ...]]] = [
+        (
+            _PATIENCE if binary_predicate is operator.eq else _MYERS,
+            (0, len(a), 0, len(b)),
+        )
+    ]
+
+    while stack:
+        tag, item = stack.pop()
+
+        if tag == _BLOCK:
+            blocks.append(item)  # type: ignore
+            continue
+
+        segment, prefix, suffix = _strip(a, b, item, binary_predicate)  # type: ignore
+        a_start, a_stop, b_start, b_stop = segment
+
+        if suffix:
+            stack.append((_BLOCK, (a_stop, b_stop, suffix)))
+
+        if (
+            a_start < a_stop
+            and b_start < b_stop
+            and not (binary_predicate is operator.eq and _disjoint(a, b, segment))
+        ):
+            # Few differences are found faster by Myers' algorithm than by counting all items
+            split = _middle(
+                a,
+                b,
+                segment,
+                binary_predicate,
+                _PATIENCE_AFTER if tag == _PATIENCE else None,
+            )
+            anchors = _unique_anchors(a, b, segment) if split is None else None
+
+            if anchors is None:
+                if split is None:
+                    split = _middle(a, b, segment, binary_predicate)
+
+                split_a, split_b = split  # type: ignore
+                stack.append((_MYERS, (split_a, a_stop, split_b, b_stop)))
+                stack.append((_MYERS, (a_start, split_a, b_start, split_b)))
+            else:
+                # Consecutive anchors form a single block, only the gaps between blocks are diffed
+                runs: List[List[int]] = []
+
+                for i, j in anchors:
+                    if runs and i - runs[-1][0] == j - runs[-1][1] == runs[-1][2]:
+                        runs[-1][2] += 1
+                    else:
+                        runs.append([i, j, 1])
+
+                pending: List[Tuple[int, Tuple[int, ...]]] = []
+                start_i, start_j = a_start, b_start
+
+                for i, j, size in runs:
+                    if start_i < i or start_j < j:
+                        pending.append((_PATIENCE, (start_i, i, start_j, j)))
+
+                    pending.append((_BLOCK, (i, j, size)))
+                    start_i, start_j = i + size, j + size
+
+                pending.append((_PATIENCE, (start_i, a_stop, start_j, b_stop)))
+                stack.extend(reversed(pending))
+
+        if prefix:
+            stack.append((_BLOCK, (a_start - prefix, b_start - prefix, prefix)))
+
+    return blocks
+
+
+def opcodes(blocks: Iterable[Block], length1: int, length2: int) -> Iterator[Opcode]:
+    """Convert ordered matching blocks into insert, delete and equal operations covering both sequences."""
+
+    merged: List[Block] = []
+
+    for block in blocks:
+        if merged and (block[0], block[1]) == (
+            merged[-1][0] + merged[-1][2],
+            merged[-1][1] + merged[-1][2],
+        ):
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + block[2])
+        elif block[2]:
+            merged.append(block)
+
+    i = j = 0
+
+    for block_i, block_j, size in merged + [(length1, length2, 0)]:
+        if i < block_i:
+            yield "delete", i, block_i, j, j
+
+        if j < block_j:
+            yield "insert", block_i, block_i, j, block_j
+
+        if size:
+            yield "equal", block_i, block_i + size, block_j, block_j + size
+
+        i, j = block_i + size, block_j + size
+
+
+def diff(
+    sequence1: Sequence,
+    sequence2: Sequence,
+    binary_predicate: BinaryPredicate = operator.eq,
+) -> Iterator[Opcode]:
+    """Find all differences between two sequences, as the operations turning sequence1 into sequence2.
+
+    Args:
+        sequence1: The sequence to turn into sequence2, iterables are converted to lists
+        sequence2: The sequence to turn sequence1 into, iterables are converted to lists
+        binary_predicate: A binary predicate, that returns true if the elements from both sequences are considered equal
+           Defaults to: operator.eq
+
+    Returns:
+        A generator yielding (tag, i1, i2, j1, j2) tuples like difflib's get_opcodes(), ordered by position.
+            "equal" means sequence1[i1:i2] equals sequence2[j1:j2], "delete" removes sequence1[i1:i2]
+            and "insert" inserts sequence2[j1:j2] at sequence1[i1]
+
+    Example:
+        list(diff("abcd", "acde")) returns [("equal", 0, 1, 0, 1), ("delete", 1, 2, 1, 1),
+            ("equal", 2, 4, 1, 3), ("insert", 4, 4, 3, 4)]
+    """
+
+    if not isinstance(sequence1, Sequence):
+        sequence1 = list(sequence1)
+
+    if not isinstance(sequence2, Sequence):
+        sequence2 = list(sequence2)
+
+    return opcodes(
+        matching_blocks(sequence1, sequence2, binary_predicate),
+        len(sequence1),
+        len(sequence2),
+    )
@@ -0,0 +1,244 @@
+"""Scans of Apache Arrow arrays, chunked arrays and tables, which keep their data in Arrow memory."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import operator
+from typing import Any, Callable, Iterator, List
+
+from pyaoi._compat import is_arrow
+
+CHUNK_SIZE = 1 << 16
+"""How many items are converted to Python objects at once, for predicates without an Arrow kernel"""
+
+
+def _compute() -> Any:
+    import pyarrow.compute  # noqa: PLC0415
+
+    return pyarrow.compute
+
+
+def slices(data: Any, size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Split an Arrow array, chunked array, table or record batch into zero-copy slices of up to size items.
+
+    Slices never span the chunks of chunked arrays or tables, which would require a copy.
+    """
+
+    if hasattr(data, "to_batches"):
+        pieces = data.to_batches()
+    elif hasattr(data, "chunks"):
+        pieces = data.chunks
+    else:
+        pieces = [data]
+
+    size = max(1, size)
+
+    for piece in pieces:
+        for offset in range(0, len(piece), size):
+            yield piece.slice(offset, size)
+
+
+def values(data: Any) -> Iterator[Any]:
+    """Lazily convert the items of data to Python objects, one slice at a time.
+
+    Rows of tables and record batches are converted to dicts.
+    """
+
+    for piece in slices(data):
+        yield from piece.to_pylist()
+
+
+def mask(data: Any, predicate: Any) -> Any:
+    """Evaluate predicate for every item of data, returning an Arrow boolean array without nulls.
+
+    ColumnPredicates on tables and record batches are evaluated by Arrow compute kernels,
+    BatchPredicates are passed zero-copy Arrow slices of data and
+    other predicates are called with each item converted to a Python object.
+
+    Returns:
+        A pyarrow.Array for arrays and record batches, a pyarrow.ChunkedArray otherwise
+    """
+
+    import pyarrow  # noqa: PLC0415
+
+    if hasattr(predicate, "arrow_mask") and hasattr(data, "column"):
+        result = predicate.arrow_mask(data)
+    elif hasattr(predicate, "__call_batch__"):
+        batch_size = getattr(predicate, "batch_size", CHUNK_SIZE)
+        result = pyarrow.chunked_array(
+            [
+                pyarrow.array(predicate.__call_batch__(piece), pyarrow.bool_())
+                for piece in slices(data, batch_size)
+            ],
+            pyarrow.bool_(),
+        )
+    else:
+        result = pyarrow.chunked_array(
+            [
+                pyarrow.array(map(predicate, piece.to_pylist()), pyarrow.bool_())
+                for piece in slices(data)
+            ],
+            pyarrow.bool_(),
+        )
+
+    result = _compute().fill_null(result, False)
+
+    if isinstance(data, (pyarrow.Array, pyarrow.RecordBatch)) and isinstance(
+        result, pyarrow.ChunkedArray
+    ):
+        return result.combine_chunks()
+
+    return result
+
+
+def count_if(data: Any, predicate: Any, expected: bool = True) -> int:
+    """Count the items of data for which predicate returns expected."""
+
+    compute = _compute()
+    result = mask(data, predicate)
+
+    if not expected:
+        result = compute.invert(result)
+
+    return compute.sum(result).as_py() or 0
+
+
+def find_if(data: Any, predicate: Any, expected: bool = True) -> int:
+    """Find the index of the first item of data for which predicate returns expected, -1 if there is none.
+
+    Predicates without an Arrow kernel are only evaluated up to the slice containing the item.
+    """
+
+    if hasattr(predicate, "arrow_mask") and hasattr(data, "column"):
+        return _compute().index(mask(data, predicate), expected).as_py()
+
+    if hasattr(predicate, "__call_batch__"):
+        batch_size = getattr(predicate, "batch_size", CHUNK_SIZE)
+        offset = 0
+
+        for piece in slices(data, batch_size):
+            for index, result in enumerate(predicate.__call_batch__(piece)):
+                if bool(result) is expected:
+                    return offset + index
+
+            offset += len(piece)
+
+        return -1
+
+    for index, item in enumerate(values(data)):
+        if bool(predicate(item)) is expected:
+            return index
+
+    return -1
+
+
+def filter_mask(data: Any, predicate: Any, expected: bool = True) -> Any:
+    """Return the items of data for which predicate returns expected, as Arrow data of the same kind."""
+
+    result = mask(data, predicate)
+
+    return data.filter(result if expected else _compute().invert(result))
+
+
+def count(data: Any, value: Any) -> int:
+    """Count how often value appears in an Arrow array or chunked array."""
+
+    if value is None:
+        return data.null_count
+
+    import pyarrow  # noqa: PLC0415
+
+    try:
+        return _compute().sum(_compute().equal(data, value)).as_py() or 0
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError, TypeError):
+        return sum(1 for item in values(data) if item == value)
+
+
+def find(data: Any, value: Any) -> int:
+    """Find the index of the first occurrence of value in an Arrow array or chunked array, -1 if it does not occur."""
+
+    import pyarrow  # noqa: PLC0415
+
+    if value is not None:
+        try:
+            return _compute().index(data, value).as_py()
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError, TypeError):
+            pass
+
+    return next((index for index, item in enumerate(values(data)) if item == value), -1)
+
+
+def search(
+    data: Any, sub: Any, binary_predicate: Callable[[Any, Any], bool] = operator.eq
+) -> int:
+    """Search for the first occurrence of the sequence sub in an Arrow array or chunked array.
+
+    For operator.eq, the candidate starts are narrowed down with one vectorized comparison
+    per item of sub, otherwise the items are compared in Python one slice at a time.
+    """
+
+    import pyarrow  # noqa: PLC0415
+
+    sub = sub.to_pylist() if is_arrow(sub) else list(sub)
+    length = len(data) - len(sub) + 1
+
+    if not len(data) or not sub or length <= 0:
+        return -1
+
+    if binary_predicate is operator.eq and None not in sub:
+        compute = _compute()
+
+        try:
+            starts = compute.indices_nonzero(
+                compute.fill_null(compute.equal(data.slice(0, length), sub[0]), False)
+            )
+
+            for offset in range(1, len(sub)):
+                if not len(starts):
+                    break
+
+                shifted = compute.take(data, compute.add(starts, offset))
+                starts = starts.filter(
+                    compute.fill_null(compute.equal(shifted, sub[offset]), False)
+                )
+
+            return starts[0].as_py() if len(starts) else -1
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError, TypeError):
+            pass
+
+    # Only the items of one slice and the last len(sub) - 1 items before it are kept,
+    # so occurrences spanning slices are found without converting all of data at once
+    items: List[Any] = []
+    start = 0
+
+    for piece in slices(data):
+        items.extend(piece.to_pylist())
+
+        for index in range(len(items) - len(sub) + 1):
+            if all(
+                map(binary_predicate, items[index : index + len(sub)], sub)
+            ):  # noqa: E203
+                return start + index
+
+        dropped = max(0, len(items) - len(sub) + 1)
+        start += dropped
+        del items[:dropped]
+
+    return -1
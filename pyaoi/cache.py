@@ -0,0 +1,448 @@
+"""Memoization of whole calls on immutable inputs, keyed by content fingerprints."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import copy
+import functools
+import hashlib
+import itertools
+import pickle
+import sys
+import threading
+import types
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from pyaoi._compat import is_ndarray
+
+try:
+    import xxhash
+
+    _new_hash: Callable[[], Any] = xxhash.xxh3_128
+except ImportError:
+    _new_hash = functools.partial(hashlib.blake2b, digest_size=16)
+
+DEFAULT_MAX_BYTES: int = 64 << 20
+"""How many bytes of results a ResultCache keeps in memory, unless told otherwise"""
+
+HASH_CHUNK_SIZE: int = 1 << 20
+"""How many bytes of a buffer are hashed at once"""
+
+_INLINE_SIZE = 256
+_DISK_FORMAT = 1
+_MUTABLE_TYPES = (list, dict, set, bytearray, array, deque, memoryview)
+# Results of these types are handed out as shallow copies, so callers cannot change the cached result
+_COPIED_TYPES = (list, dict, set, bytearray, array, deque)
+_VALUE_TYPES = frozenset((type(None), bool, int, float, complex, range))
+# Objects of these types are pickled by reference, so they identify the same object in other processes
+_NAMED_TYPES = (types.FunctionType, types.BuiltinFunctionType, type)
+
+
+class CacheStats(NamedTuple):
+    """Counters of a ResultCache, disk_hits are counted as hits too."""
+
+    hits: int
+    misses: int
+    disk_hits: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+def _digest(view: memoryview) -> bytes:
+    """Hash a buffer in chunks, with xxHash if it is installed and BLAKE2 otherwise."""
+
+    digest = _new_hash()
+    view = view.cast("B") if view.ndim != 1 or view.format != "B" else view
+
+    for offset in range(0, len(view), HASH_CHUNK_SIZE):
+        digest.update(view[offset : offset + HASH_CHUNK_SIZE])  # noqa: E203
+
+    return digest.digest()
+
+
+def _is_frozen_ndarray(values: Any) -> bool:
+    """Check that neither values nor any array it views can be written to."""
+
+    while is_ndarray(values):
+        if values.flags.writeable:
+            return False
+
+        values = values.base
+
+    return values is None or isinstance(values, bytes)
+
+
+def _read_only(result: Any) -> Any:
+    """Prepare a result for storing, NumPy arrays and memoryviews are made read-only instead of being copied on every hit."""
+
+    if is_ndarray(result):
+        result.flags.writeable = False
+    elif isinstance(result, memoryview) and not result.readonly:
+        result = result.toreadonly()
+
+    return result
+
+
+def _handout(result: Any, lazy: bool) -> Any:
+    """Return what a caller receives for a stored result, which must not be able to change it."""
+
+    if lazy:
+        return iter(result)
+
+    if isinstance(result, _COPIED_TYPES):
+        return copy.copy(result)
+
+    return result
+
+
+def fingerprint(obj: Any) -> Tuple[Hashable, bool]:
+    """Identify an immutable input by a hash of its content where comparing it would cost too much, or by itself.
+
+    Bytes, long strings, read-only memoryviews and read-only NumPy arrays are identified by a chunked
+    hash of their content, other hashable objects, including tuples, by themselves. Like in
+    functools.lru_cache, tuples whose items are equal, e.g. (1,) and (1.0,), share their results.
+
+    Args:
+        obj: An argument of a cached call
+
+    Returns:
+        A hashable fingerprint of obj and whether it identifies obj in other processes as well
+
+    Raises:
+        TypeError: If obj is mutable or unhashable, so a cached result could become stale
+    """
+
+    obj_type = type(obj)
+
+    if obj_type in _VALUE_TYPES:
+        return (obj_type, obj), True
+
+    if obj_type is bytes or obj_type is str:
+        if len(obj) <= _INLINE_SIZE:
+            return (obj_type, obj), True
+
+        data = obj if obj_type is bytes else obj.encode("utf-8", "surrogatepass")
+
+        return (obj_type, len(obj), _digest(memoryview(data))), True
+
+    if obj_type is tuple:
+        # Scanning the items for ones identified by their content would cost more than most calls,
+        # ResultCache rejects tuples with mutable items when it hashes the key of the call
+        return (tuple, obj), False
+
+    if obj_type is memoryview and obj.readonly:
+        data = obj if obj.c_contiguous else memoryview(obj.tobytes())
+
+        return (obj_type, obj.format, obj.shape, _digest(data)), True
+
+    if is_ndarray(obj):
+        if not _is_frozen_ndarray(obj):
+            raise TypeError(
+                "Only NumPy arrays with writeable set to False can be cached"
+            )
+
+        import numpy  # noqa: PLC0415
+
+        data = memoryview(numpy.ascontiguousarray(obj))
+
+        return (obj_type, obj.dtype.str, obj.shape, _digest(data)), True
+
+    if isinstance(obj, _MUTABLE_TYPES):
+        raise TypeError("{} is mutable and can not be cached".format(obj_type.__name__))
+
+    try:
+        hash(obj)
+    except TypeError:
+        raise TypeError(
+            "{} is unhashable and can not be cached".format(obj_type.__name__)
+        )
+
+    # Objects compared by identity are only equal to themselves within this process
+    return obj, obj_type.__eq__ is not object.__eq__ or isinstance(obj, _NAMED_TYPES)
+
+
+def _size(obj: Any) -> int:
+    """Estimate the bytes held by a cached result, including its items if it is a tuple."""
+
+    size = sys.getsizeof(obj)
+
+    if type(obj) is tuple:
+        size += sum(map(sys.getsizeof, obj))
+
+    return size
+
+
+class _HashedKey(list):
+    """The memory key of a call, hashed only once like in functools.lru_cache, as hashing tuples scans their items."""
+
+    __slots__ = ("hash_value",)
+
+    def __init__(self, parts: Tuple) -> None:
+        super().__init__(parts)
+
+        try:
+            self.hash_value = hash(parts)
+        except TypeError:
+            raise TypeError("Tuples containing mutable objects can not be cached")
+
+    def __hash__(self) -> int:  # type: ignore
+        return self.hash_value
+
+
+class _Entry(NamedTuple):
+    result: Any
+    size: int
+    # Inputs held by the key, which count towards the size of the entry
+    inputs: Tuple[Any, ...]
+    lazy: bool
+
+
+class ResultCache:
+    """A least recently used cache of whole-call results, bounded by the bytes they occupy.
+
+    Calls are keyed by the function and the fingerprints of all arguments, see fingerprint().
+    Mutable arguments are rejected, so results never become stale. Results which are iterators,
+    e.g. of copy_except_if(), are stored as tuples and returned as new iterators on every hit.
+    Mutable results, like the deque of rotate_copy(), are returned as shallow copies on every call,
+    NumPy arrays are made read-only instead, so callers cannot change what later calls receive.
+
+    With a path, results are also stored in an SQLite database, which outlives the process
+    and is shared between processes. Only calls of importable functions, whose arguments are
+    identified by their content and can be pickled, are stored there.
+
+    Example:
+        results = ResultCache(max_bytes=256 << 20, path="results.sqlite")
+        find_end = results.wrap(pyaoi.find_end)
+
+        find_end(log_bytes, b"ERROR")
+        results.stats()
+    """
+
+    def __init__(
+        self, max_bytes: int = DEFAULT_MAX_BYTES, path: Optional[str] = None
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.path = path
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+        self._lock = threading.RLock()
+        self._database: Any = None
+
+        if path is not None:
+            import sqlite3  # noqa: PLC0415
+
+            self._database = sqlite3.connect(
+                path, isolation_level=None, check_same_thread=False
+            )
+            self._database.execute(
+                "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, result BLOB)"
+            )
+
+    def _key(
+        self, function: Callable, args: Tuple, kwargs: Dict[str, Any]
+    ) -> Tuple[Hashable, Tuple[Any, ...], Optional[bytes]]:
+        """Return the memory key of a call, the inputs it has to keep alive and its disk key, if it has one."""
+
+        parts = []
+        inputs = []
+        stable = True
+
+        for name, value in itertools.chain(enumerate(args), sorted(kwargs.items())):
+            part, value_stable = fingerprint(value)
+            parts.append((name, part))
+
+            if not value_stable:
+                stable = False
+                inputs.append(value)
+
+        key = _HashedKey((function, tuple(parts)))
+        disk_key = None
+
+        if stable and self._database is not None:
+            name = "{}.{}".format(
+                getattr(function, "__module__", None),
+                getattr(function, "__qualname__", None),
+            )
+
+            if "<" not in name:
+                try:
+                    disk_key = _digest(
+                        memoryview(pickle.dumps((_DISK_FORMAT, name, parts)))
+                    )
+                except (pickle.PicklingError, TypeError, AttributeError):
+                    pass
+
+        return key, tuple(inputs), disk_key
+
+    def _load(self, disk_key: bytes) -> Tuple[bool, Any]:
+        assert self._database is not None
+        row = self._database.execute(
+            "SELECT result FROM results WHERE key = ?", (disk_key,)
+        ).fetchone()
+
+        return (True, pickle.loads(row[0])) if row else (False, None)
+
+    def _store(self, disk_key: bytes, result: Any) -> None:
+        assert self._database is not None
+
+        try:
+            data = pickle.dumps(result)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        self._database.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?)", (disk_key, data)
+        )
+
+    def _insert(self, key: Hashable, entry: _Entry) -> None:
+        if entry.size > self.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self._bytes += entry.size
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._counters["evictions"] += 1
+
+    def call(self, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Return function(*args, **kwargs), computing it only if the same call is not cached yet.
+
+        Raises:
+            TypeError: If an argument is mutable or unhashable
+        """
+
+        key, inputs, disk_key = self._key(function, args, kwargs)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+
+                return _handout(entry.result, entry.lazy)
+
+            if disk_key is not None:
+                found, stored = self._load(disk_key)
+
+                if found:
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                    result, lazy = stored
+                    result = _read_only(result)
+                    self._insert(key, _Entry(result, _size(result), inputs, lazy))
+
+                    return _handout(result, lazy)
+
+            self._counters["misses"] += 1
+
+        result = function(*args, **kwargs)
+        lazy = isinstance(result, Iterator)
+
+        result = tuple(result) if lazy else _read_only(result)
+
+        with self._lock:
+            self._insert(
+                key,
+                _Entry(result, _size(result) + sum(map(_size, inputs)), inputs, lazy),
+            )
+
+            if disk_key is not None:
+                self._store(disk_key, (result, lazy))
+
+        return _handout(result, lazy)
+
+    def wrap(self, function: Callable) -> Callable:
+        """Return a function caching the results of function's calls in this cache, exposed as its cache attribute."""
+
+        @functools.wraps(function)
+        def caching(*args: Any, **kwargs: Any) -> Any:
+            return self.call(function, *args, **kwargs)
+
+        caching.cache = self  # type: ignore
+
+        return caching
+
+    def stats(self) -> CacheStats:
+        """Return how often calls were found in this cache and how much it holds in memory."""
+
+        with self._lock:
+            return CacheStats(
+                entries=len(self._entries), bytes=self._bytes, **self._counters
+            )
+
+    def clear(self, disk: bool = False) -> None:
+        """Discard all results held in memory and, if disk is True, the ones stored on disk."""
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+            if disk and self._database is not None:
+                self._database.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """Close the database of the disk tier, the memory tier stays usable."""
+
+        with self._lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def cached(
+    function: Optional[Callable] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    path: Optional[str] = None,
+) -> Callable:
+    """Cache the results of a function's calls in its own ResultCache, usable as a decorator with or without arguments.
+
+    Args:
+        function: The function to cache, e.g. pyaoi.search
+        max_bytes: How many bytes of results to keep in memory
+        path: Where to store results on disk too, see ResultCache
+
+    Returns:
+        The caching function, whose cache attribute is its ResultCache, or a decorator if function is None
+
+    Example:
+        search = cached(pyaoi.search)
+
+        search(frozen_haystack, b"needle")
+        search.cache.stats()
+    """
+
+    if function is None:
+        return functools.partial(cached, max_bytes=max_bytes, path=path)
+
+    return ResultCache(max_bytes, path).wrap(function)
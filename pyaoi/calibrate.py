@@ -0,0 +1,239 @@
+"""Measure the cost of pyaoi's backends on this machine, run as python -m pyaoi.calibrate."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import argparse
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pyaoi
+from pyaoi.dispatch import Cost, save_profile
+
+SMALL = 16
+"""The input size the fixed cost per call is derived from"""
+
+
+def _seconds(function: Callable[[], Any], budget: float) -> float:
+    """Return the fastest time of a call to function, repeating it for about budget seconds."""
+
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    repeat = max(3, int(budget / max(elapsed, 1e-9)))
+
+    return min(timer.repeat(min(repeat, 25), number)) / number
+
+
+def fit(
+    function: Callable[[Any], Any],
+    make_input: Callable[[int], Any],
+    large: int,
+    budget: float = 0.2,
+) -> Cost:
+    """Fit the cost of function as a fixed cost per call plus a cost per item of its input.
+
+    Args:
+        function: The function to measure, called with a single input
+        make_input: A callable returning an input of the given number of items
+        large: The size of the large input, the cost per item is derived from
+        budget: About how many seconds to spend on each of both sizes
+
+    Returns:
+        The fixed seconds per call and the seconds per item
+    """
+
+    small_input, large_input = make_input(SMALL), make_input(large)
+    small = _seconds(lambda: function(small_input), budget)
+    large_seconds = _seconds(lambda: function(large_input), budget)
+    per_item = max(0.0, (large_seconds - small) / (large - SMALL))
+
+    return max(0.0, small - per_item * SMALL), per_item
+
+
+def _inputs(numpy: Optional[Any]) -> Dict[str, Callable[[int], Any]]:
+    """Return constructors of inputs without early matches, which every backend scans completely."""
+
+    inputs = {
+        "list": lambda size: list(range(size)),
+        "bytes": lambda size: bytes(range(1, 256)) * (size // 255)
+        + b"\1" * (size % 255),
+    }
+
+    if numpy is not None:
+        inputs["numpy"] = lambda size: numpy.arange(size, dtype="q")
+
+    return inputs
+
+
+def measurements(
+    large: int = 1 << 16, parallel_large: int = 1 << 22, pool: Optional[Any] = None
+) -> List[Tuple[str, str, Callable[[Any], Any], Callable[[int], Any], int]]:
+    """Return what to measure, as (operation, backend, call, input constructor, large size) tuples.
+
+    The shared backend is only measured with a pool, which the inputs are shared by.
+    """
+
+    from pyaoi import dispatch
+
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    inputs = _inputs(numpy)
+    cases = [
+        ("count", "python", lambda data: pyaoi.count.__wrapped__(data, -1), "list"),
+        ("find", "python", lambda data: pyaoi.find.__wrapped__(data, -1), "list"),
+        (
+            "search",
+            "python",
+            lambda data: pyaoi.search.__wrapped__(data, [-1, -1]),
+            "list",
+        ),
+        (
+            "adjacent_find",
+            "python",
+            lambda data: pyaoi.adjacent_find.__wrapped__(data),
+            "list",
+        ),
+        (
+            "search",
+            "native",
+            lambda data: dispatch._native_search(data, b"\0\0"),
+            "bytes",
+        ),
+        ("count", "native", lambda data: dispatch._native_count(data, 0), "bytes"),
+        ("find", "native", lambda data: dispatch._native_find(data, 0), "bytes"),
+    ]
+
+    if numpy is not None:
+        cases += [
+            ("count", "numpy", lambda data: dispatch._numpy_count(data, -1), "numpy"),
+            ("find", "numpy", lambda data: dispatch._numpy_find(data, -1), "numpy"),
+            (
+                "search",
+                "numpy",
+                lambda data: dispatch._numpy_search(data, numpy.array([-1, -1])),
+                "numpy",
+            ),
+            (
+                "adjacent_find",
+                "numpy",
+                lambda data: dispatch._numpy_adjacent_find(data),
+                "numpy",
+            ),
+        ]
+
+    result = [
+        (operation, backend, call, inputs[input_name], large)
+        for operation, backend, call, input_name in cases
+    ]
+
+    if pool is not None:
+
+        def shared_bytes(size: int) -> Any:
+            return pool.share(inputs["bytes"](size))
+
+        result += [
+            (
+                "count",
+                "shared",
+                lambda data: dispatch._shared_count(data, 0),
+                shared_bytes,
+                parallel_large,
+            ),
+            (
+                "search",
+                "shared",
+                lambda data: dispatch._shared_search(data, b"\0\0"),
+                shared_bytes,
+                parallel_large,
+            ),
+            (
+                "adjacent_find",
+                "shared",
+                lambda data: dispatch._shared_adjacent_find(data),
+                shared_bytes,
+                parallel_large,
+            ),
+        ]
+
+    return result
+
+
+def calibrate(
+    path: Optional[str] = None, budget: float = 0.2, verbose: bool = False
+) -> str:
+    """Measure every backend available on this machine and cache the costs as the calibration profile.
+
+    Args:
+        path: Where to write the profile, defaults to pyaoi.dispatch.profile_path()
+        budget: About how many seconds to spend on each measurement
+        verbose: Print each measured cost
+
+    Returns:
+        The path the profile was written to
+    """
+
+    from pyaoi import dispatch
+    from pyaoi.shared import SharedPool
+
+    costs: Dict[str, Cost] = {}
+    pool = SharedPool() if dispatch._PARALLEL else None
+
+    try:
+        for operation, backend, call, make_input, large in measurements(pool=pool):
+            name = "{}/{}".format(operation, backend)
+            costs[name] = fit(call, make_input, large, budget)
+
+            if verbose:
+                print(
+                    "{:<24} {:>10.3f} us/call {:>10.3f} ns/item".format(
+                        name, costs[name][0] * 1e6, costs[name][1] * 1e9
+                    )
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return save_profile(costs, path)
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pyaoi.calibrate",
+        description="Measure the cost of pyaoi's backends and cache it for choosing between them.",
+    )
+    parser.add_argument(
+        "--output", help="where to write the profile, defaults to the user's cache"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.2,
+        help="about how many seconds to spend on each measurement",
+    )
+    options = parser.parse_args(arguments)
+
+    print("Wrote", calibrate(options.output, options.budget, verbose=True))
+
+
+if __name__ == "__main__":
+    main()
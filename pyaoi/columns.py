@@ -0,0 +1,503 @@
+"""Tables storing records column by column and predicates evaluated per column."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import abc
+import itertools
+import operator
+from array import array
+from collections.abc import Sequence
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pyaoi._compat import is_ndarray
+
+Mask = Sequence
+"""A sequence of bools, one per row of a table, either a list or a NumPy array"""
+
+
+def _as_column(values: Iterable) -> Sequence:
+    """Store values in an unboxed array if all of them are ints or all of them are floats."""
+
+    if isinstance(values, array) or is_ndarray(values):
+        return values
+
+    values = list(values)
+    types = set(map(type, values))
+
+    try:
+        if types == {int}:
+            return array("q", values)
+
+        if types == {float}:
+            return array("d", values)
+
+    except OverflowError:
+        pass
+
+    return values
+
+
+class Row:
+    """A lazily materialized view of a single row of a Table.
+
+    Fields can be accessed as attributes, by name via indexing, or by iterating over the row.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "Table", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self._table._columns[name][self._index]
+
+    def __iter__(self) -> Iterator[Any]:
+        index = self._index
+
+        return (column[index] for column in self._table._columns.values())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Row):
+            other = tuple(other)
+
+        return tuple(self) == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "Row({})".format(
+            ", ".join(
+                "{}={!r}".format(name, value)
+                for name, value in zip(self._table.fields, self)
+            )
+        )
+
+    def asdict(self) -> Dict[str, Any]:
+        """Copy the row's fields into a dict."""
+        return dict(zip(self._table.fields, self))
+
+
+_ROW_TYPES: Dict[Tuple[str, ...], Type[Row]] = {}
+
+
+def _row_type(fields: Tuple[str, ...]) -> Type[Row]:
+    """Create a Row subclass exposing fields as attributes, reusing it for equal fields."""
+
+    if fields not in _ROW_TYPES:
+        namespace: Dict[str, Any] = {"__slots__": ()}
+
+        for name in fields:
+            if name.isidentifier() and not name.startswith("_") and name != "asdict":
+                namespace[name] = property(
+                    lambda row, name=name: row._table._columns[name][row._index]
+                )
+
+        _ROW_TYPES[fields] = type("Row", (Row,), namespace)
+
+    return _ROW_TYPES[fields]
+
+
+class Table(Sequence):
+    """A sequence of records, storing each field in a separate column.
+
+    Columns of ints or floats are stored in array.array, NumPy arrays are used as they are.
+    Indexing yields Row views, which are only created when a row is accessed, slicing yields a Table.
+    Predicates built with field() are evaluated on whole columns by count_if(), find_if(), copy_except_if()
+    and their negated variants.
+    """
+
+    def __init__(self, columns: Mapping[str, Iterable]) -> None:
+        self._columns: Dict[str, Sequence] = {
+            name: _as_column(values) for name, values in columns.items()
+        }
+        lengths = set(map(len, self._columns.values()))
+
+        if len(lengths) > 1:
+            raise ValueError("All columns of a table must have the same length")
+
+        self._length = lengths.pop() if lengths else 0
+        self._row_type = _row_type(tuple(self._columns))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any], fields: Sequence) -> "Table":
+        """Create a table from row objects, reading each field as an attribute or by key.
+
+        Args:
+            rows: An iterable of objects, mappings or sequences
+            fields: The names of the fields to read, for sequences the position of a name determines the index to read
+
+        Returns:
+            A table with a column for each name in fields
+        """
+
+        columns: Dict[str, List[Any]] = {name: [] for name in fields}
+
+        for row in rows:
+            if isinstance(row, Sequence) and not isinstance(row, (str, Row)):
+                for name, value in zip(fields, row):
+                    columns[name].append(value)
+            else:
+                for name in fields:
+                    columns[name].append(_read_field(row, name))
+
+        return cls(columns)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """The names of the table's columns."""
+        return tuple(self._columns)
+
+    def column(self, name: str) -> Sequence:
+        """Return the column storing the field name."""
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(index, slice):
+            return Table(
+                {name: column[index] for name, column in self._columns.items()}
+            )
+
+        if index < 0:
+            index += self._length
+
+        if not 0 <= index < self._length:
+            raise IndexError("table index out of range")
+
+        return self._row_type(self, index)
+
+    def __iter__(self) -> Iterator[Row]:
+        row_type = self._row_type
+
+        return (row_type(self, index) for index in range(self._length))
+
+    def __repr__(self) -> str:
+        return "Table(fields={}, len={})".format(self.fields, self._length)
+
+    def count_where(self, predicate: "ColumnPredicate", expected: bool = True) -> int:
+        """Count the rows for which predicate evaluates to expected."""
+        mask = predicate.mask(self)
+        matches = int(mask.sum()) if is_ndarray(mask) else sum(mask)
+
+        return matches if expected else self._length - matches
+
+    def find_where(self, predicate: "ColumnPredicate", expected: bool = True) -> int:
+        """Return the index of the first row for which predicate evaluates to expected, or -1."""
+        mask = predicate.mask(self)
+
+        if is_ndarray(mask):
+            mask = mask if expected else ~mask
+            index = int(mask.argmax()) if len(mask) else 0
+
+            return index if len(mask) and mask[index] else -1
+
+        try:
+            return list(mask).index(expected)
+
+        except ValueError:
+            return -1
+
+    def rows_where(
+        self, predicate: "ColumnPredicate", expected: bool = True
+    ) -> Iterator[Row]:
+        """Yield the rows for which predicate evaluates to expected."""
+        mask = predicate.mask(self)
+        row_type = self._row_type
+
+        if not expected:
+            mask = ~mask if is_ndarray(mask) else [not value for value in mask]
+
+        return (
+            row_type(self, index)
+            for index in itertools.compress(range(self._length), mask)
+        )
+
+
+def _read_field(row: Any, name: str) -> Any:
+    """Read the field name from a Row, a mapping or an object's attribute."""
+
+    if isinstance(row, (Row, Mapping)):
+        return row[name]
+
+    return getattr(row, name)
+
+
+class ColumnPredicate(abc.ABC):
+    """A predicate which can be evaluated on a whole Table at once.
+
+    Calling the predicate with a single row object evaluates it on that row only,
+    so it can be used with any function taking an UnaryPredicate.
+    Predicates can be combined with &, | and ~.
+    """
+
+    @abc.abstractmethod
+    def mask(self, table: Table) -> Mask:
+        """Evaluate the predicate for every row of table, returning one bool per row."""
+
+    @abc.abstractmethod
+    def arrow_mask(self, table: Any) -> Any:
+        """Evaluate the predicate with Arrow compute kernels for every row of a pyarrow Table or RecordBatch.
+
+        Returns:
+            A pyarrow boolean array or chunked array, rows with null values do not satisfy comparisons
+        """
+
+    @abc.abstractmethod
+    def __call__(self, row: Any) -> bool:
+        """Evaluate the predicate for a single row object."""
+
+    def __and__(self, other: "ColumnPredicate") -> "ColumnPredicate":
+        return _Combined(operator.and_, self, other)
+
+    def __or__(self, other: "ColumnPredicate") -> "ColumnPredicate":
+        return _Combined(operator.or_, self, other)
+
+    def __invert__(self) -> "ColumnPredicate":
+        return _Inverted(self)
+
+
+class _Comparison(ColumnPredicate):
+    def __init__(
+        self, name: str, compare: Callable[[Any, Any], bool], value: Any
+    ) -> None:
+        self.name = name
+        self.compare = compare
+        self.value = value
+
+    def mask(self, table: Table) -> Mask:
+        column = table.column(self.name)
+        value = self.value
+
+        if isinstance(value, Field):
+            value = table.column(value.name)
+        elif not is_ndarray(column):
+            value = itertools.repeat(value)
+
+        if is_ndarray(column):
+            return self.compare(column, value)
+
+        return list(map(self.compare, column, value))
+
+    def arrow_mask(self, table: Any) -> Any:
+        import pyarrow.compute  # noqa: PLC0415
+
+        value = self.value
+
+        if isinstance(value, Field):
+            value = table.column(value.name)
+
+        kernel = getattr(pyarrow.compute, _ARROW_KERNELS[self.compare])
+
+        return pyarrow.compute.fill_null(kernel(table.column(self.name), value), False)
+
+    def __call__(self, row: Any) -> bool:
+        value = self.value
+
+        if isinstance(value, Field):
+            value = _read_field(row, value.name)
+
+        return self.compare(_read_field(row, self.name), value)
+
+    def __repr__(self) -> str:
+        return "field({!r}) {} {!r}".format(
+            self.name, _SYMBOLS[self.compare], self.value
+        )
+
+
+class _Membership(ColumnPredicate):
+    def __init__(self, name: str, values: Iterable) -> None:
+        self.name = name
+        self.values = frozenset(values)
+
+    def mask(self, table: Table) -> Mask:
+        column = table.column(self.name)
+
+        if is_ndarray(column):
+            import numpy  # noqa: PLC0415
+
+            return numpy.isin(column, list(self.values))
+
+        return list(map(self.values.__contains__, column))
+
+    def arrow_mask(self, table: Any) -> Any:
+        import pyarrow  # noqa: PLC0415
+        import pyarrow.compute  # noqa: PLC0415
+
+        return pyarrow.compute.is_in(
+            table.column(self.name), value_set=pyarrow.array(list(self.values))
+        )
+
+    def __call__(self, row: Any) -> bool:
+        return _read_field(row, self.name) in self.values
+
+    def __repr__(self) -> str:
+        return "field({!r}).isin({!r})".format(self.name, set(self.values))
+
+
+class _Combined(ColumnPredicate):
+    def __init__(
+        self,
+        combine: Callable[[Any, Any], Any],
+        left: ColumnPredicate,
+        right: ColumnPredicate,
+    ) -> None:
+        self.combine = combine
+        self.left = left
+        self.right = right
+
+    def mask(self, table: Table) -> Mask:
+        left = self.left.mask(table)
+        right = self.right.mask(table)
+
+        if is_ndarray(left) or is_ndarray(right):
+            return self.combine(left, right)
+
+        return list(map(self.combine, left, right))
+
+    def arrow_mask(self, table: Any) -> Any:
+        import pyarrow.compute  # noqa: PLC0415
+
+        kernel = (
+            pyarrow.compute.and_kleene
+            if self.combine is operator.and_
+            else pyarrow.compute.or_kleene
+        )
+
+        return pyarrow.compute.fill_null(
+            kernel(self.left.arrow_mask(table), self.right.arrow_mask(table)), False
+        )
+
+    def __call__(self, row: Any) -> bool:
+        if self.combine is operator.and_:
+            return bool(self.left(row)) and bool(self.right(row))
+
+        return bool(self.left(row)) or bool(self.right(row))
+
+    def __repr__(self) -> str:
+        return "({!r}) {} ({!r})".format(
+            self.left, "&" if self.combine is operator.and_ else "|", self.right
+        )
+
+
+class _Inverted(ColumnPredicate):
+    def __init__(self, predicate: ColumnPredicate) -> None:
+        self.predicate = predicate
+
+    def mask(self, table: Table) -> Mask:
+        mask = self.predicate.mask(table)
+
+        return ~mask if is_ndarray(mask) else [not value for value in mask]
+
+    def arrow_mask(self, table: Any) -> Any:
+        import pyarrow.compute  # noqa: PLC0415
+
+        return pyarrow.compute.invert(self.predicate.arrow_mask(table))
+
+    def __call__(self, row: Any) -> bool:
+        return not self.predicate(row)
+
+    def __repr__(self) -> str:
+        return "~({!r})".format(self.predicate)
+
+
+_SYMBOLS = {
+    operator.eq: "==",
+    operator.ne: "!=",
+    operator.lt: "<",
+    operator.le: "<=",
+    operator.gt: ">",
+    operator.ge: ">=",
+}
+
+# The Arrow compute kernels implementing each comparison
+_ARROW_KERNELS = {
+    operator.eq: "equal",
+    operator.ne: "not_equal",
+    operator.lt: "less",
+    operator.le: "less_equal",
+    operator.gt: "greater",
+    operator.ge: "greater_equal",
+}
+
+
+class Field:
+    """A reference to a named field, comparing it builds a ColumnPredicate.
+
+    Example:
+        (field("price") > 100) & (field("volume") >= field("minimum_volume"))
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __eq__(self, value: Any) -> ColumnPredicate:  # type: ignore
+        return _Comparison(self.name, operator.eq, value)
+
+    def __ne__(self, value: Any) -> ColumnPredicate:  # type: ignore
+        return _Comparison(self.name, operator.ne, value)
+
+    def __lt__(self, value: Any) -> ColumnPredicate:
+        return _Comparison(self.name, operator.lt, value)
+
+    def __le__(self, value: Any) -> ColumnPredicate:
+        return _Comparison(self.name, operator.le, value)
+
+    def __gt__(self, value: Any) -> ColumnPredicate:
+        return _Comparison(self.name, operator.gt, value)
+
+    def __ge__(self, value: Any) -> ColumnPredicate:
+        return _Comparison(self.name, operator.ge, value)
+
+    __hash__ = None  # type: ignore
+
+    def isin(self, values: Iterable) -> ColumnPredicate:
+        """Build a predicate checking if the field's value is one of values."""
+        return _Membership(self.name, values)
+
+    def __repr__(self) -> str:
+        return "field({!r})".format(self.name)
+
+
+def field(name: str) -> Field:
+    """Refer to the field name of a Table's rows, to build predicates by comparing it.
+
+    Args:
+        name: The name of the field
+
+    Returns:
+        A Field, comparisons with values or other Fields return a ColumnPredicate
+    """
+
+    return Field(name)
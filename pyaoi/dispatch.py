@@ -0,0 +1,726 @@
+"""Choosing between the implementations of an algorithm by input type, size and a calibrated cost model."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import bisect
+import functools
+import operator
+import os
+import sys
+from array import array
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from pyaoi._compat import dispatched, first_argument, is_ndarray, length  # noqa: F401
+
+Cost = Tuple[float, float]
+# The backend for every size, or the sizes at which the cheapest backend changes and the backend below each of them
+Plan = Union[Callable, Tuple[List[int], List[Callable]]]
+
+PROFILE_VERSION = 1
+
+DEFAULT_COSTS: Dict[str, Cost] = {
+    "python": (0.2e-6, 50e-9),
+    "native": (0.15e-6, 0.5e-9),
+    "numpy": (3e-6, 1e-9),
+    "shared": (20e-3, 1e-9),
+    "arrow": (5e-6, 1e-9),
+}
+"""Fixed seconds per call and seconds per item of each backend, used until a calibration profile exists"""
+
+_PLAIN_KINDS = frozenset((list, tuple, str, bytes, bytearray, range, deque))
+_NATIVE_KINDS = frozenset((str, bytes, bytearray))
+
+
+def profile_path() -> str:
+    """Return where the calibration profile is cached.
+
+    The PYAOI_CALIBRATION environment variable overrides the default location,
+    $XDG_CACHE_HOME/pyaoi/calibration.json or ~/.cache/pyaoi/calibration.json.
+    """
+
+    if os.environ.get("PYAOI_CALIBRATION"):
+        return os.environ["PYAOI_CALIBRATION"]
+
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+
+    return os.path.join(cache, "pyaoi", "calibration.json")
+
+
+class Profile:
+    """The costs of each backend on this machine, as measured by python -m pyaoi.calibrate."""
+
+    __slots__ = ("costs", "source")
+
+    def __init__(self, costs: Dict[str, Cost], source: str) -> None:
+        self.costs = costs
+        self.source = source
+
+    def cost(self, operation: str, backend: str) -> Cost:
+        """Return the (seconds per call, seconds per item) of backend for operation."""
+
+        costs = self.costs
+
+        return costs.get(
+            "{}/{}".format(operation, backend),
+            costs.get(backend, DEFAULT_COSTS[backend]),
+        )
+
+
+_profile: List[Optional[Profile]] = [None]
+
+
+def load_profile(path: Optional[str] = None) -> Profile:
+    """Load the calibration profile, falling back to DEFAULT_COSTS if it is missing or outdated.
+
+    Loading a profile discards the plans made with the previous one.
+
+    Args:
+        path: The file to load, defaults to profile_path()
+
+    Returns:
+        The profile used for dispatching from now on
+    """
+
+    import json
+
+    path = path or profile_path()
+    profile = Profile(dict(DEFAULT_COSTS), "defaults")
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            content = json.load(file)
+
+        if (
+            content.get("version") == PROFILE_VERSION
+            and content.get("python") == sys.version.split()[0]
+        ):
+            profile.costs.update(
+                (name, (float(fixed), float(per_item)))
+                for name, (fixed, per_item) in content["costs"].items()
+            )
+            profile = Profile(profile.costs, path)
+
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    _profile[0] = profile
+
+    for dispatcher in _dispatchers:
+        dispatcher.plans.clear()
+
+    return profile
+
+
+def current_profile() -> Profile:
+    """Return the profile used for dispatching, loading it on first use."""
+
+    return _profile[0] or load_profile()
+
+
+def save_profile(costs: Dict[str, Cost], path: Optional[str] = None) -> str:
+    """Write measured costs to the calibration profile and start using it.
+
+    Returns:
+        The path the profile was written to
+    """
+
+    import json
+
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "version": PROFILE_VERSION,
+                "python": sys.version.split()[0],
+                "cpu_count": os.cpu_count(),
+                "costs": costs,
+            },
+            file,
+            indent=2,
+            sort_keys=True,
+        )
+
+    load_profile(path)
+
+    return path
+
+
+def kind(obj: Any) -> Any:
+    """Describe obj's type precisely enough to decide which backends can process it.
+
+    Returns:
+        type(obj), extended by the typecode of array.array objects
+            and the dtype and number of dimensions of NumPy arrays
+    """
+
+    obj_type = type(obj)
+
+    if obj_type in _PLAIN_KINDS:
+        return obj_type
+
+    if obj_type is array:
+        return obj_type, obj.typecode
+
+    if is_ndarray(obj):
+        return obj_type, obj.dtype.char, obj.ndim
+
+    return obj_type
+
+
+def _is_ndarray_kind(obj_kind: Any, ndim: Optional[int] = 1) -> bool:
+    """Check if obj_kind describes a NumPy array with ndim dimensions, or any number of them if ndim is None."""
+
+    if not isinstance(obj_kind, tuple) or len(obj_kind) != 3:
+        return False
+
+    numpy = sys.modules.get("numpy")
+
+    return (
+        numpy is not None
+        and issubclass(obj_kind[0], numpy.ndarray)
+        and ndim in (None, obj_kind[2])
+    )
+
+
+def _is_arrow_kind(obj_kind: Any) -> bool:
+    """Check if obj_kind describes an Arrow array or chunked array."""
+
+    pyarrow = sys.modules.get("pyarrow")
+
+    return (
+        pyarrow is not None
+        and isinstance(obj_kind, type)
+        and issubclass(obj_kind, (pyarrow.Array, pyarrow.ChunkedArray))
+    )
+
+
+def _is_shared_kind(obj_kind: Any) -> bool:
+    """Check if obj_kind describes a SharedArray, whose data already is in shared memory."""
+
+    shared = sys.modules.get("pyaoi.shared")
+
+    return shared is not None and obj_kind is shared.SharedArray
+
+
+def _is_native_kind(obj_kind: Any) -> bool:
+    """Check if obj_kind describes a type, whose count() and index() methods scan its items in C."""
+
+    return obj_kind in _NATIVE_KINDS or (
+        isinstance(obj_kind, tuple) and obj_kind[0] is array
+    )
+
+
+class Backend:
+    """An implementation of an operation, used for inputs whose key it supports."""
+
+    __slots__ = ("name", "supports", "run")
+
+    def __init__(
+        self, name: str, supports: Callable[[Tuple], bool], run: Callable
+    ) -> None:
+        self.name = name
+        self.supports = supports
+        self.run = run
+
+
+class Explanation:
+    """Why a backend was chosen for a call, as returned by explain()."""
+
+    __slots__ = ("operation", "backend", "size", "candidates", "profile")
+
+    def __init__(
+        self,
+        operation: str,
+        backend: str,
+        size: Optional[int],
+        candidates: List[Tuple[str, float]],
+        profile: str,
+    ) -> None:
+        self.operation = operation
+        self.backend = backend
+        self.size = size
+        self.candidates = candidates
+        self.profile = profile
+
+    def __str__(self) -> str:
+        lines = [
+            "{}() on {} items runs on the {} backend".format(
+                self.operation,
+                "an unknown number of" if self.size is None else self.size,
+                self.backend,
+            ),
+            "predicted costs (profile: {}):".format(self.profile),
+        ]
+        lines.extend(
+            "  {:<8} {:>12.3f} us".format(name, seconds * 1e6)
+            for name, seconds in self.candidates
+        )
+
+        return "\n".join(lines)
+
+
+class Dispatcher:
+    """Route calls of an operation to the backend predicted to be the fastest.
+
+    The key function maps a call's arguments to a hashable description of them,
+    which determines the supported backends. For every key, the sizes at which the
+    cheapest backend changes are computed once, so a call only costs computing its
+    key, a dictionary lookup and, if several backends are supported, a bisection.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        key: Callable[..., Tuple],
+        fallback: Callable,
+        supports: Callable[[Tuple], bool],
+        plans: Optional[Dict[Tuple, Plan]] = None,
+    ) -> None:
+        self.operation = operation
+        self.key = key
+        self.backends = [Backend("python", supports, fallback)]
+        self.plans: Dict[Tuple, Plan] = {} if plans is None else plans
+
+    def register(
+        self, name: str, supports: Callable[[Tuple], bool], run: Callable
+    ) -> None:
+        """Add a backend, which is preferred over the others for the keys it supports when it is cheaper."""
+
+        self.backends.insert(0, Backend(name, supports, run))
+        self.plans.clear()
+
+    def candidates(self, key: Tuple) -> List[Tuple[Backend, Cost]]:
+        """Return the backends supporting key with their costs, the pure Python one if none does."""
+
+        profile = current_profile()
+        backends = [backend for backend in self.backends if backend.supports(key)]
+
+        return [
+            (backend, profile.cost(self.operation, backend.name))
+            for backend in backends or self.backends[-1:]
+        ]
+
+    def plan(self, key: Tuple) -> Plan:
+        """Compute the sizes at which the cheapest backend changes and the backend below each of them."""
+
+        candidates = self.candidates(key)
+
+        def cheapest(size: int) -> Backend:
+            return min(
+                candidates,
+                key=lambda candidate: candidate[1][0] + candidate[1][1] * size,
+            )[0]
+
+        # Between two sizes at which any two cost lines cross, the cheapest backend does not change
+        crossings = {0}
+
+        for _, (fixed1, per_item1) in candidates:
+            for _, (fixed2, per_item2) in candidates:
+                if per_item1 > per_item2 and fixed2 > fixed1:
+                    crossings.add(int((fixed2 - fixed1) / (per_item1 - per_item2)) + 1)
+
+        thresholds: List[int] = []
+        runs = [cheapest(0).run]
+
+        for size in sorted(crossings)[1:]:
+            run = cheapest(size).run
+
+            if run is not runs[-1]:
+                thresholds.append(size)
+                runs.append(run)
+
+        plan: Plan = (thresholds, runs) if thresholds else runs[0]
+        self.plans[key] = plan
+
+        return plan
+
+    def choose(self, key: Tuple, size: Optional[int]) -> Callable:
+        """Return the backend to run for inputs described by key, which have size items if that is known."""
+
+        plan = self.plans.get(key) or self.plan(key)
+
+        if plan.__class__ is not tuple:
+            return plan  # type: ignore
+
+        thresholds, runs = plan  # type: ignore
+
+        return runs[0] if size is None else runs[bisect.bisect_right(thresholds, size)]
+
+    def explain(self, *args: Any, **kwargs: Any) -> Explanation:
+        key = self.key(*args, **kwargs)
+        size = length(
+            first_argument(self.backends[-1].run.__code__.co_varnames[0], args, kwargs)
+        )
+        candidates = [
+            (backend, fixed + per_item * (size or 0))
+            for backend, (fixed, per_item) in self.candidates(key)
+        ]
+        run = self.choose(key, size)
+
+        return Explanation(
+            self.operation,
+            next(backend.name for backend, _ in candidates if backend.run is run),
+            size,
+            [(backend.name, seconds) for backend, seconds in candidates],
+            current_profile().source,
+        )
+
+
+_dispatchers: List[Dispatcher] = []
+
+
+def _dispatcher(function: Callable) -> Dispatcher:
+    """Return the Dispatcher of a function decorated with dispatched(), building it on first use."""
+
+    dispatcher = getattr(function, "dispatcher", None)
+
+    if dispatcher is None:
+        operation = function.operation  # type: ignore
+        key, supports, backends = _OPERATIONS[operation]
+        dispatcher = Dispatcher(
+            operation,
+            key,
+            function.__wrapped__,  # type: ignore
+            supports,
+            function.plans,  # type: ignore
+        )
+
+        for backend in reversed(backends):
+            dispatcher.register(*backend)
+
+        function.dispatcher = dispatcher  # type: ignore
+        _dispatchers.append(dispatcher)
+
+    return dispatcher
+
+
+def explain(function: Callable, *args: Any, **kwargs: Any) -> Explanation:
+    """Explain which backend a call of function with args and kwargs would run on, without running it.
+
+    Args:
+        function: A function of pyaoi choosing its backend automatically, e.g. pyaoi.search
+        args: The positional arguments of the call
+        kwargs: The keyword arguments of the call
+
+    Returns:
+        An Explanation listing the chosen backend and the predicted cost of every supported one
+
+    Example:
+        print(pyaoi.explain(pyaoi.search, haystack, b"needle"))
+    """
+
+    if getattr(function, "operation", None) not in _OPERATIONS:
+        raise TypeError(
+            "{} does not choose a backend automatically".format(
+                getattr(function, "__name__", function)
+            )
+        )
+
+    return _dispatcher(function).explain(*args, **kwargs)
+
+
+_PARALLEL = (os.cpu_count() or 1) > 1
+
+
+def _shared_pool(shared: Any) -> Any:
+    """Return the pool which placed shared in shared memory, if it is alive, pools are never started implicitly."""
+
+    from pyaoi.shared import owner
+
+    return owner(shared)
+
+
+def _python(operation: str) -> Callable:
+    """Return the pure Python implementation of operation, which reads a SharedArray in this process."""
+
+    return next(
+        dispatcher.backends[-1].run
+        for dispatcher in _dispatchers
+        if dispatcher.operation == operation
+    )
+
+
+# Backends, each one of them assumes the key it supports
+
+
+def _numpy_count(sequence: Any, target: Any) -> int:
+    import numpy
+
+    return int(numpy.count_nonzero(sequence == target))
+
+
+def _numpy_find(sequence: Any, target_element: Any) -> int:
+    import numpy
+
+    indices = numpy.flatnonzero(sequence == target_element)
+
+    return int(indices[0]) if len(indices) else -1
+
+
+def _native_search(
+    sequence_super: Any, sequence_sub: Any, binary_predicate: Callable = operator.eq
+) -> int:
+    if not sequence_super or not sequence_sub:
+        return -1
+
+    return sequence_super.find(sequence_sub)
+
+
+def _numpy_search(
+    sequence_super: Any, sequence_sub: Any, binary_predicate: Callable = operator.eq
+) -> int:
+    import numpy
+
+    sub = numpy.asarray(sequence_sub)
+
+    # E.g. bytes become a single scalar instead of an array of their items
+    if sub.ndim != 1:
+        sub = numpy.asarray(list(sequence_sub))
+    length = len(sequence_super) - len(sub) + 1
+
+    if not len(sequence_super) or not len(sub) or length <= 0:
+        return -1
+
+    # Keep the starts matching the sub-sequence's first k items, one vectorized pass per item
+    starts = numpy.flatnonzero(sequence_super[:length] == sub[0])
+
+    for offset in range(1, len(sub)):
+        if not len(starts):
+            break
+
+        starts = starts[sequence_super[starts + offset] == sub[offset]]
+
+    return int(starts[0]) if len(starts) else -1
+
+
+def _numpy_adjacent_find(
+    sequence: Any, binary_predicate: Callable = operator.eq
+) -> int:
+    import numpy
+
+    indices = numpy.flatnonzero(sequence[1:] == sequence[:-1])
+
+    return int(indices[0]) if len(indices) else -1
+
+
+def _native_count(sequence: Any, target: Any) -> int:
+    return sequence.count(target)
+
+
+def _native_find(sequence: Any, target_element: Any) -> int:
+    try:
+        return sequence.index(target_element)
+    except ValueError:
+        return -1
+
+
+def _shared_count(sequence: Any, target: Any) -> int:
+    pool = _shared_pool(sequence)
+
+    if pool is None:
+        return _python("count")(sequence, target)
+
+    return pool.count(sequence, target)
+
+
+def _shared_search(
+    sequence_super: Any, sequence_sub: Any, binary_predicate: Callable = operator.eq
+) -> int:
+    if not len(sequence_super) or not len(sequence_sub):
+        return -1
+
+    pool = _shared_pool(sequence_super)
+
+    if pool is None:
+        return _python("search")(sequence_super, sequence_sub)
+
+    return pool.search(sequence_super, sequence_sub)
+
+
+def _shared_adjacent_find(
+    sequence: Any, binary_predicate: Callable = operator.eq
+) -> int:
+    pool = _shared_pool(sequence)
+
+    if pool is None:
+        return _python("adjacent_find")(sequence)
+
+    return pool.adjacent_find(sequence)
+
+
+def _arrow_count(sequence: Any, target: Any) -> int:
+    from pyaoi import arrow
+
+    return arrow.count(sequence, target)
+
+
+def _arrow_find(sequence: Any, target_element: Any) -> int:
+    from pyaoi import arrow
+
+    return arrow.find(sequence, target_element)
+
+
+def _arrow_search(
+    sequence_super: Any, sequence_sub: Any, binary_predicate: Callable = operator.eq
+) -> int:
+    from pyaoi import arrow
+
+    return arrow.search(sequence_super, sequence_sub, binary_predicate)
+
+
+def _is_mmap_kind(obj_kind: Any) -> bool:
+    """Check if obj_kind describes a memory-mapped file, without importing mmap."""
+
+    mmap = sys.modules.get("mmap")
+
+    return mmap is not None and obj_kind is mmap.mmap
+
+
+def _supports_native_search(key: Tuple) -> bool:
+    super_kind, sub_kind, is_eq = key
+
+    return is_eq and (
+        (super_kind is str and sub_kind is str)
+        or (
+            (super_kind in (bytes, bytearray) or _is_mmap_kind(super_kind))
+            and sub_kind in (bytes, bytearray)
+        )
+    )
+
+
+# Key functions check for the most common types inline, calling kind() costs more than that
+
+
+def _count_key(sequence: Any, target: Any) -> Tuple:
+    sequence_kind = type(sequence)
+
+    return (
+        sequence_kind if sequence_kind in _PLAIN_KINDS else kind(sequence),
+        type(target) is int,
+    )
+
+
+def _find_key(sequence: Any, target_element: Any) -> Tuple:
+    sequence_kind = type(sequence)
+
+    return (sequence_kind if sequence_kind in _PLAIN_KINDS else kind(sequence),)
+
+
+def _search_key(
+    sequence_super: Any, sequence_sub: Any, binary_predicate: Callable = operator.eq
+) -> Tuple:
+    super_kind = type(sequence_super)
+    sub_kind = type(sequence_sub)
+
+    return (
+        super_kind if super_kind in _PLAIN_KINDS else kind(sequence_super),
+        sub_kind if sub_kind in _PLAIN_KINDS else kind(sequence_sub),
+        binary_predicate is operator.eq,
+    )
+
+
+def _adjacent_find_key(
+    sequence: Any, binary_predicate: Callable = operator.eq
+) -> Tuple:
+    sequence_kind = type(sequence)
+
+    return (
+        sequence_kind if sequence_kind in _PLAIN_KINDS else kind(sequence),
+        binary_predicate is operator.eq,
+    )
+
+
+def _generic(key: Tuple) -> bool:
+    return not _is_ndarray_kind(key[0], None) and not _is_arrow_kind(key[0])
+
+
+def _ndarray(key: Tuple) -> bool:
+    return _is_ndarray_kind(key[0])
+
+
+def _ndarray_eq(key: Tuple) -> bool:
+    return key[-1] and _is_ndarray_kind(key[0])
+
+
+def _arrow(key: Tuple) -> bool:
+    return _is_arrow_kind(key[0])
+
+
+def _native(key: Tuple) -> bool:
+    return _is_native_kind(key[0])
+
+
+def _shared_int(key: Tuple) -> bool:
+    return _PARALLEL and key[-1] and _is_shared_kind(key[0])
+
+
+def _shared_eq(key: Tuple) -> bool:
+    return _PARALLEL and key[-1] and _is_shared_kind(key[0])
+
+
+# Per operation: the key function, which keys the pure Python implementation supports
+# and the other backends, which are preferred over it when they are cheaper
+_OPERATIONS: Dict[
+    str, Tuple[Callable[..., Tuple], Callable, List[Tuple[str, Callable, Callable]]]
+] = {
+    "count": (
+        _count_key,
+        _generic,
+        [
+            ("native", _native, _native_count),
+            ("numpy", _ndarray, _numpy_count),
+            ("arrow", _arrow, _arrow_count),
+            ("shared", _shared_int, _shared_count),
+        ],
+    ),
+    "find": (
+        _find_key,
+        _generic,
+        [
+            ("native", _native, _native_find),
+            ("numpy", _ndarray, _numpy_find),
+            ("arrow", _arrow, _arrow_find),
+        ],
+    ),
+    "search": (
+        _search_key,
+        _generic,
+        [
+            ("native", _supports_native_search, _native_search),
+            ("numpy", _ndarray_eq, _numpy_search),
+            ("arrow", _arrow, _arrow_search),
+            ("shared", _shared_eq, _shared_search),
+        ],
+    ),
+    "adjacent_find": (
+        _adjacent_find_key,
+        _generic,
+        [
+            ("numpy", _ndarray_eq, _numpy_adjacent_find),
+            ("shared", _shared_eq, _shared_adjacent_find),
+        ],
+    ),
+}
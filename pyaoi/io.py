@@ -0,0 +1,414 @@
+"""Memory-mapped sequences for running pyaoi's algorithms over huge files."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import abc
+import bisect
+import mmap
+import struct
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterator, Optional, Union
+
+PAGE_SIZE: int = mmap.ALLOCATIONGRANULARITY
+"""The granularity memory maps are aligned to on this platform"""
+
+DEFAULT_CHUNK_SIZE: int = 256 * PAGE_SIZE
+"""The default size in bytes of the chunks yielded by MappedSequence.chunks()"""
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+class _MappedFile:
+    """Own a file's memory map, which is shared by all views into it."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            # Zero length files cannot be mapped, an empty bytes object supports
+            # every operation the views need
+            try:
+                self.buffer: Buffer = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            except ValueError:
+                self.buffer = b""
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+
+class MappedSequence(Sequence):
+    """A read-only sequence whose items are decoded lazily from a memory mapped file.
+
+    Slicing returns another view into the same memory map, so no data is copied
+    until items are accessed. Subclasses implement how items are laid out in the file,
+    Sequence makes this an abstract base class already.
+    """
+
+    def __init__(self, file: _MappedFile, indices: Optional[range] = None) -> None:
+        self._file = file
+        self._indices_cache = indices
+
+    @property
+    def _buffer(self) -> Buffer:
+        return self._file.buffer
+
+    @property
+    def _indices(self) -> range:
+        if self._indices_cache is None:
+            self._indices_cache = range(self._total_items())
+
+        return self._indices_cache
+
+    @abc.abstractmethod
+    def _total_items(self) -> int:
+        """Return the number of items in the whole file."""
+
+    @abc.abstractmethod
+    def _item(self, index: int) -> Any:
+        """Decode the item at index of the whole file."""
+
+    @abc.abstractmethod
+    def _offset(self, index: int) -> int:
+        """Return the byte offset at which the item at index starts."""
+
+    @abc.abstractmethod
+    def _index_at_offset(self, offset: int) -> int:
+        """Return the index of the first item starting at or after offset."""
+
+    def _view(self, indices: range) -> "MappedSequence":
+        view = object.__new__(type(self))
+        view.__dict__.update(self.__dict__)
+        view._indices_cache = indices
+
+        return view
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(index, slice):
+            return self._view(self._indices[index])
+
+        return self._item(self._indices[index])
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._item, self._indices)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+
+        return all(map(lambda a, b: a == b, self, other))  # noqa: C417
+
+    __hash__ = None  # type: ignore
+
+    def __enter__(self) -> "MappedSequence":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return "{}(len={})".format(type(self).__name__, len(self))
+
+    def close(self) -> None:
+        """Unmap the underlying file, invalidating this sequence and all its views."""
+        self._file.close()
+
+    def chunks(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator["MappedSequence"]:
+        """Split the sequence into consecutive views aligned to page boundaries.
+
+        Args:
+            chunk_size: The approximate size of each chunk in bytes, rounded up to a multiple of PAGE_SIZE
+
+        Returns:
+            A generator yielding views, whose concatenation is equal to the sequence.
+                Every chunk but the first starts at the first item beginning on or after a page boundary
+        """
+
+        indices = self._indices
+
+        if not indices:
+            return
+
+        chunk_size = max(PAGE_SIZE, -(-chunk_size // PAGE_SIZE) * PAGE_SIZE)
+
+        # Strided views have no meaningful byte layout, so they are split by item count
+        if indices.step != 1:
+            step = max(1, chunk_size // PAGE_SIZE)
+
+            for start in range(0, len(indices), step):
+                yield self._view(indices[start : start + step])  # noqa: E203
+
+            return
+
+        start = indices.start
+        boundary = (self._offset(start) // chunk_size + 1) * chunk_size
+
+        while start < indices.stop:
+            stop = min(max(self._index_at_offset(boundary), start + 1), indices.stop)
+            yield self._view(range(start, stop))
+            start = stop
+            boundary += chunk_size
+
+
+class MappedBytes(MappedSequence):
+    """A memory mapped file viewed as a sequence of byte values."""
+
+    def _total_items(self) -> int:
+        return len(self._buffer)
+
+    def _item(self, index: int) -> int:
+        return self._buffer[index]
+
+    def _offset(self, index: int) -> int:
+        return index
+
+    def _index_at_offset(self, offset: int) -> int:
+        return offset
+
+    def __iter__(self) -> Iterator[int]:
+        if self._indices.step != 1:
+            return super().__iter__()
+
+        return (byte for chunk in self.chunks() for byte in chunk.tobytes())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (bytes, bytearray, memoryview)):
+            return self.tobytes() == other
+
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore
+
+    def tobytes(self) -> bytes:
+        """Copy the viewed bytes into a bytes object."""
+        indices = self._indices
+
+        return self._buffer[indices.start : indices.stop : indices.step]  # noqa: E203
+
+    def count(self, value: Any) -> int:
+        """Count how often the byte value appears, scanning one chunk at a time."""
+        if not isinstance(value, int) or not 0 <= value < 256:
+            return 0
+
+        if self._indices.step != 1:
+            return super().count(value)
+
+        needle = bytes((value,))
+
+        return sum(chunk.tobytes().count(needle) for chunk in self.chunks())
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        """Return the first index of the byte value, raising ValueError if it is not present."""
+        indices = self._indices
+
+        if indices.step != 1:
+            return super().index(value, start, stop)  # type: ignore
+
+        if isinstance(value, int) and 0 <= value < 256:
+            bounds = indices[start:stop]
+            position = self._buffer.find(bytes((value,)), bounds.start, bounds.stop)
+
+            if position != -1:
+                return position - indices.start
+
+        raise ValueError("{!r} is not in sequence".format(value))
+
+    def find(self, sub: bytes, start: int = 0, stop: Optional[int] = None) -> int:
+        """Return the first index at which the byte string sub starts, or -1."""
+        indices = self._indices
+
+        if indices.step != 1:
+            return self.tobytes().find(sub, start, stop)
+
+        bounds = indices[start:stop]
+        position = self._buffer.find(sub, bounds.start, bounds.stop)
+
+        return -1 if position == -1 else position - indices.start
+
+
+class MappedRecords(MappedSequence):
+    """A memory mapped file viewed as a sequence of fixed width records.
+
+    Each record is unpacked with a struct format. Formats with a single field
+    yield plain values, other formats yield tuples. Trailing bytes not forming a
+    whole record are ignored.
+    """
+
+    def __init__(
+        self, file: _MappedFile, fmt: str, indices: Optional[range] = None
+    ) -> None:
+        super().__init__(file, indices)
+        self._struct = struct.Struct(fmt)
+        self._scalar = len(self._struct.unpack(bytes(self._struct.size))) == 1
+
+    @property
+    def format(self) -> str:
+        """The struct format each record is unpacked with."""
+        return self._struct.format  # type: ignore
+
+    @property
+    def record_size(self) -> int:
+        """The size of a single record in bytes."""
+        return self._struct.size
+
+    def _total_items(self) -> int:
+        return len(self._buffer) // self._struct.size
+
+    def _item(self, index: int) -> Any:
+        record = self._struct.unpack_from(self._buffer, index * self._struct.size)
+
+        return record[0] if self._scalar else record
+
+    def _offset(self, index: int) -> int:
+        return index * self._struct.size
+
+    def _index_at_offset(self, offset: int) -> int:
+        return -(-offset // self._struct.size)
+
+
+class MappedLines(MappedSequence):
+    """A memory mapped file viewed as a sequence of lines.
+
+    Lines are yielded without their terminating newline, decoded if an encoding is given.
+    The index of line offsets is built lazily, only as far as the accessed lines require it.
+    """
+
+    def __init__(
+        self,
+        file: _MappedFile,
+        encoding: Optional[str] = None,
+        indices: Optional[range] = None,
+    ) -> None:
+        super().__init__(file, indices)
+        self.encoding = encoding
+        # Shared by all views, _starts[i] is the offset at which line i starts
+        self._starts = array("q", [0])
+        self._complete = [not self._buffer]
+
+    def _scan_until(self, index: Optional[int] = None) -> None:
+        """Extend the offset index until it covers line index, or the whole file if it is None."""
+        starts = self._starts
+        buffer = self._buffer
+
+        while not self._complete[0] and (index is None or len(starts) <= index + 1):
+            newline = buffer.find(b"\n", starts[-1])
+
+            if newline == -1 or newline + 1 == len(buffer):
+                starts.append(len(buffer))
+                self._complete[0] = True
+            else:
+                starts.append(newline + 1)
+
+    def _total_items(self) -> int:
+        self._scan_until()
+
+        return len(self._starts) - 1
+
+    def _item(self, index: int) -> Any:
+        self._scan_until(index)
+        start, stop = self._starts[index], self._starts[index + 1]
+        line = self._buffer[start:stop]
+
+        if line.endswith(b"\n"):
+            line = line[:-1]
+
+        return line if self.encoding is None else line.decode(self.encoding)
+
+    def _offset(self, index: int) -> int:
+        return self._starts[index]
+
+    def _index_at_offset(self, offset: int) -> int:
+        return bisect.bisect_left(self._starts, offset)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        # Avoid indexing the whole file when only a line near the start is needed
+        if self._indices_cache is None and isinstance(index, int) and index >= 0:
+            self._scan_until(index)
+
+            if index < len(self._starts) - 1:
+                return self._item(index)
+
+        return super().__getitem__(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._indices_cache is not None:
+            return super().__iter__()
+
+        return self._iter_lazily()
+
+    def _iter_lazily(self) -> Iterator[Any]:
+        index = 0
+
+        while True:
+            self._scan_until(index)
+
+            if index >= len(self._starts) - 1:
+                return
+
+            yield self._item(index)
+            index += 1
+
+
+def open_bytes(path: str) -> MappedBytes:
+    """Map a file into memory as a sequence of byte values.
+
+    Args:
+        path: The path of the file to map
+
+    Returns:
+        A MappedBytes sequence, which should be closed when no longer needed
+    """
+
+    return MappedBytes(_MappedFile(path))
+
+
+def open_records(path: str, fmt: str) -> MappedRecords:
+    """Map a file into memory as a sequence of fixed width records.
+
+    Args:
+        path: The path of the file to map
+        fmt: A struct format describing a single record, e.g. "<d" or "<IIf"
+
+    Returns:
+        A MappedRecords sequence, which should be closed when no longer needed
+    """
+
+    return MappedRecords(_MappedFile(path), fmt)
+
+
+def open_lines(path: str, encoding: Optional[str] = None) -> MappedLines:
+    """Map a file into memory as a sequence of newline delimited lines.
+
+    Args:
+        path: The path of the file to map
+        encoding: An encoding to decode lines with, lines are yielded as bytes if None
+
+    Returns:
+        A MappedLines sequence, which should be closed when no longer needed
+    """
+
+    return MappedLines(_MappedFile(path), encoding)
@@ -0,0 +1,366 @@
+"""Predicate combinators, which order their sub-predicates by measured cost and selectivity."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import math
+import time
+from typing import Any, Callable, List, Sequence, Tuple
+
+UnaryPredicate = Callable[[Any], bool]
+
+
+class Adaptation:
+    """The measurements and the current evaluation order of an all_() or any_() predicate.
+
+    While sampling, every call measures the cost and pass rate of each evaluated sub-predicate.
+    After every sample_size calls, the sub-predicates are reordered to minimize the expected
+    cost per call, if that lowers it by more than tolerance. Once the order did not change for
+    stable_after rounds, the ordered sub-predicates are rebound into a flat boolean expression
+    and measuring stops, until reset() is called.
+    """
+
+    def __init__(
+        self,
+        predicates: Sequence[UnaryPredicate],
+        conjunction: bool,
+        sample_size: int,
+        stable_after: int,
+        tolerance: float,
+    ) -> None:
+        self.predicates = tuple(predicates)
+        self.conjunction = conjunction
+        self.sample_size = max(1, sample_size)
+        self.stable_after = max(1, stable_after)
+        self.tolerance = tolerance
+        self.function, self._bind = _flat(len(self.predicates), conjunction)
+        self.reset()
+
+    @property
+    def order(self) -> Tuple[UnaryPredicate, ...]:
+        """The sub-predicates in the order they are currently evaluated in."""
+        return tuple(self.predicates[index] for index in self._order)
+
+    def reset(self) -> None:
+        """Discard all measurements and start sampling again, e.g. after the data changed."""
+
+        self._order = list(range(len(self.predicates)))
+        # Per sub-predicate: total seconds spent, number of calls, number of passes
+        self._stats = [[0.0, 0, 0] for _ in self.predicates]
+        self._samples = 0
+        self._unchanged_rounds = 0
+        self.stable = False
+
+        # While sampling, sample() alone decides and the other places never change the result
+        if self.predicates:
+            neutral = _always(self.conjunction)
+            self._bind((self.sample,) + (neutral,) * (len(self.predicates) - 1))
+
+    def sample(self, item: Any) -> bool:
+        """Evaluate the predicate for item, measuring every evaluated sub-predicate."""
+
+        predicates = self.predicates
+        stats = self._stats
+        conjunction = self.conjunction
+        result = conjunction
+        timer = time.perf_counter
+
+        for index in self._order:
+            start = timer()
+            passed = bool(predicates[index](item))
+            elapsed = timer() - start
+            entry = stats[index]
+            entry[0] += elapsed
+            entry[1] += 1
+            entry[2] += passed
+
+            if passed != conjunction:
+                result = passed
+                break
+
+        self._samples += 1
+
+        if self._samples % self.sample_size == 0:
+            self._reorder()
+
+        return result
+
+    def _expected_cost(self, order: Sequence[int]) -> float:
+        """Estimate the cost per call when evaluating the sub-predicates in order."""
+
+        cost = 0.0
+        reached = 1.0
+
+        for index in order:
+            seconds, calls, passes = self._stats[index]
+
+            if not calls:
+                return math.inf
+
+            cost += reached * seconds / calls
+            reached *= passes / calls if self.conjunction else 1 - passes / calls
+
+        return cost
+
+    def _rank(self, index: int) -> float:
+        seconds, calls, passes = self._stats[index]
+
+        if not calls:
+            return math.inf
+
+        # Sub-predicates deciding the result cheaply and often are evaluated first
+        decides = 1 - passes / calls if self.conjunction else passes / calls
+
+        return seconds / calls / decides if decides else math.inf
+
+    def _reorder(self) -> None:
+        candidate = sorted(self._order, key=self._rank)
+
+        if self._expected_cost(candidate) < self._expected_cost(self._order) * (
+            1 - self.tolerance
+        ):
+            self._order = candidate
+            self._unchanged_rounds = 0
+        else:
+            self._unchanged_rounds += 1
+
+        if self._unchanged_rounds >= self.stable_after:
+            self._freeze()
+
+    def _freeze(self) -> None:
+        """Rebind the function handed out to callers to the ordered sub-predicates, which stops measuring.
+
+        The function object stays the same. For up to four sub-predicates it evaluates a flat expression
+        like bool(p0(item) and p1(item)), so it costs as much as the equivalent lambda written by hand.
+        """
+
+        self._bind(self.order)
+        self.stable = True
+
+    def report(self) -> List[Tuple[UnaryPredicate, float, float]]:
+        """Return the sub-predicates in their current order with their measured statistics.
+
+        Returns:
+            A list of (sub-predicate, mean seconds per call, pass rate) tuples,
+                the statistics are NaN for sub-predicates which were never evaluated
+        """
+
+        entries = []
+
+        for index in self._order:
+            seconds, calls, passes = self._stats[index]
+            entries.append(
+                (
+                    self.predicates[index],
+                    seconds / calls if calls else math.nan,
+                    passes / calls if calls else math.nan,
+                )
+            )
+
+        return entries
+
+
+def _always(result: bool) -> UnaryPredicate:
+    return lambda item: result
+
+
+def _flat(arity: int, conjunction: bool) -> Tuple[UnaryPredicate, Callable]:
+    """Return a predicate combining arity sub-predicates with and or or, and a function rebinding them in order.
+
+    Up to four sub-predicates are held in separate closure variables, so evaluating them costs
+    no more than a lambda written by hand. More are looped over.
+    """
+
+    if not arity:
+        return _always(conjunction), lambda order: None
+
+    return _FLAT[min(arity, len(_FLAT)) - 1](conjunction)
+
+
+def _flat1(conjunction: bool) -> Tuple[UnaryPredicate, Callable]:
+    p0: Any = None
+
+    def predicate(item: Any) -> bool:
+        return True if p0(item) else False
+
+    def bind(order: Sequence[UnaryPredicate]) -> None:
+        nonlocal p0
+        (p0,) = order
+
+    return predicate, bind
+
+
+def _flat2(conjunction: bool) -> Tuple[UnaryPredicate, Callable]:
+    p0 = p1 = None
+
+    if conjunction:
+
+        def predicate(item: Any) -> bool:
+            return True if p0(item) and p1(item) else False  # type: ignore
+
+    else:
+
+        def predicate(item: Any) -> bool:
+            return True if p0(item) or p1(item) else False  # type: ignore
+
+    def bind(order: Sequence[UnaryPredicate]) -> None:
+        nonlocal p0, p1
+        p0, p1 = order  # type: ignore
+
+    return predicate, bind
+
+
+def _flat3(conjunction: bool) -> Tuple[UnaryPredicate, Callable]:
+    p0 = p1 = p2 = None
+
+    if conjunction:
+
+        def predicate(item: Any) -> bool:
+            return True if p0(item) and p1(item) and p2(item) else False  # type: ignore
+
+    else:
+
+        def predicate(item: Any) -> bool:
+            return True if p0(item) or p1(item) or p2(item) else False  # type: ignore
+
+    def bind(order: Sequence[UnaryPredicate]) -> None:
+        nonlocal p0, p1, p2
+        p0, p1, p2 = order  # type: ignore
+
+    return predicate, bind
+
+
+def _flat4(conjunction: bool) -> Tuple[UnaryPredicate, Callable]:
+    p0 = p1 = p2 = p3 = None
+
+    if conjunction:
+
+        def predicate(item: Any) -> bool:
+            return (
+                True
+                if p0(item) and p1(item) and p2(item) and p3(item)  # type: ignore
+                else False
+            )
+
+    else:
+
+        def predicate(item: Any) -> bool:
+            return (
+                True
+                if p0(item) or p1(item) or p2(item) or p3(item)  # type: ignore
+                else False
+            )
+
+    def bind(order: Sequence[UnaryPredicate]) -> None:
+        nonlocal p0, p1, p2, p3
+        p0, p1, p2, p3 = order  # type: ignore
+
+    return predicate, bind
+
+
+def _flat_many(conjunction: bool) -> Tuple[UnaryPredicate, Callable]:
+    predicates: Sequence[UnaryPredicate] = ()
+
+    def predicate(item: Any) -> bool:
+        for sub_predicate in predicates:
+            # A falsy result decides a conjunction, a truthy one a disjunction
+            if (not sub_predicate(item)) is conjunction:
+                return not conjunction
+
+        return conjunction
+
+    def bind(order: Sequence[UnaryPredicate]) -> None:
+        nonlocal predicates
+        predicates = tuple(order)
+
+    return predicate, bind
+
+
+_FLAT = (_flat1, _flat2, _flat3, _flat4, _flat_many)
+
+
+def _adaptive(
+    predicates: Sequence[UnaryPredicate],
+    conjunction: bool,
+    sample_size: int,
+    stable_after: int,
+    tolerance: float,
+) -> UnaryPredicate:
+    adaptation = Adaptation(
+        predicates, conjunction, sample_size, stable_after, tolerance
+    )
+    function = adaptation.function
+    function.adaptation = adaptation  # type: ignore
+    function.report = adaptation.report  # type: ignore
+    function.__name__ = "all_" if conjunction else "any_"
+    function.__qualname__ = function.__name__
+
+    return function
+
+
+def all_(
+    *predicates: UnaryPredicate,
+    sample_size: int = 1000,
+    stable_after: int = 3,
+    tolerance: float = 0.05,
+) -> UnaryPredicate:
+    """Combine unary predicates into one returning True if all of them do, evaluating the cheapest and most selective first.
+
+    Args:
+        predicates: Unary predicates without side effects, since the order they are evaluated in changes
+        sample_size: The number of calls between reorderings
+        stable_after: After how many rounds without a new order measuring stops
+        tolerance: The relative improvement of the expected cost required to change the order
+
+    Returns:
+        An unary predicate, whose adaptation attribute exposes the current order and whose report()
+            returns the measured cost and pass rate of each sub-predicate
+
+    Example:
+        is_candidate = all_(is_cheap, is_expensive, is_rare)
+
+        count_if(rows, is_candidate)
+
+        is_candidate.adaptation.order
+    """
+
+    return _adaptive(predicates, True, sample_size, stable_after, tolerance)
+
+
+def any_(
+    *predicates: UnaryPredicate,
+    sample_size: int = 1000,
+    stable_after: int = 3,
+    tolerance: float = 0.05,
+) -> UnaryPredicate:
+    """Combine unary predicates into one returning True if any of them does, evaluating the cheapest and most likely first.
+
+    Args:
+        predicates: Unary predicates without side effects, since the order they are evaluated in changes
+        sample_size: The number of calls between reorderings
+        stable_after: After how many rounds without a new order measuring stops
+        tolerance: The relative improvement of the expected cost required to change the order
+
+    Returns:
+        An unary predicate, whose adaptation attribute exposes the current order and whose report()
+            returns the measured cost and pass rate of each sub-predicate
+    """
+
+    return _adaptive(predicates, False, sample_size, stable_after, tolerance)
@@ -0,0 +1,368 @@
+"""Run-length encoding and grouping of consecutive equal items."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import bisect
+import itertools
+import operator
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pyaoi._compat import is_ndarray
+
+Run = Tuple[Any, int]
+"""A value and how many consecutive times it occurs"""
+
+
+_COUNT_CHUNK = 4096
+
+
+def _length(iterator: Iterator) -> int:
+    """Exhaust iterator in constant memory, returning how many items it yielded."""
+
+    length = 0
+
+    # Counting the items of bounded lists is faster than counting them one by one
+    while True:
+        chunk_length = len(list(itertools.islice(iterator, _COUNT_CHUNK)))
+        length += chunk_length
+
+        if chunk_length < _COUNT_CHUNK:
+            return length
+
+
+def _numpy_starts(values: Any) -> Any:
+    """Return the index of the first item of every run of the 1-D NumPy array values."""
+
+    import numpy  # noqa: PLC0415
+
+    if not len(values):
+        return numpy.zeros(0, dtype=numpy.intp)
+
+    # The same as numpy.flatnonzero(numpy.diff(values)) + 1, but also for non-numeric dtypes
+    return numpy.concatenate(
+        ([0], numpy.flatnonzero(values[1:] != values[:-1]) + 1)
+    ).astype(numpy.intp)
+
+
+def _numpy_runs(values: Any) -> Iterator[Run]:
+    import numpy  # noqa: PLC0415
+
+    starts = _numpy_starts(values)
+    lengths = numpy.diff(numpy.append(starts, len(values)))
+
+    return zip(values[starts].tolist(), lengths.tolist())
+
+
+def _starts(sequence: Sequence, key: Optional[Callable[[Any], Any]]) -> Iterator[int]:
+    """Lazily yield the index of the first item of every run of sequence, followed by len(sequence)."""
+
+    keys = iter(sequence) if key is None else map(key, sequence)
+    current, following = itertools.tee(keys)
+    next(following, None)
+
+    # The complement of adjacent_find()'s scan, every unequal adjacent pair starts a run
+    yield 0
+    yield from itertools.compress(
+        itertools.count(1), map(operator.ne, current, following)
+    )
+    yield len(sequence)
+
+
+def run_length_encode(
+    iterable: Iterable, key: Optional[Callable[[Any], Any]] = None
+) -> Iterator[Run]:
+    """Lazily encode iterable as runs of consecutive equal items, in constant memory.
+
+    Args:
+        iterable: An iterable to encode, 1-D NumPy arrays are encoded in vectorized passes
+        key: A function computing the value items are compared by, defaults to the items themselves
+
+    Returns:
+        An iterator of (first item of the run, length of the run) tuples
+
+    Example:
+        list(run_length_encode("aaab")) == [("a", 3), ("b", 1)]
+    """
+
+    if key is None and is_ndarray(iterable) and iterable.ndim == 1:
+        return _numpy_runs(iterable)
+
+    return (
+        (next(group), 1 + _length(group))
+        for _, group in itertools.groupby(iterable, key)
+    )
+
+
+def run_length_decode(runs: Iterable[Run]) -> Iterator[Any]:
+    """Lazily expand runs of (value, length) tuples into the items they encode.
+
+    Args:
+        runs: An iterable of (value, length) tuples, e.g. returned by run_length_encode(), or a RunLength
+
+    Returns:
+        An iterator yielding every value length times
+    """
+
+    if isinstance(runs, RunLength):
+        return iter(runs)
+
+    return itertools.chain.from_iterable(itertools.starmap(itertools.repeat, runs))
+
+
+class SequenceView(Sequence):
+    """A read-only view of a range of another sequence's items, which copies none of them.
+
+    Slicing returns another view into the same sequence.
+    """
+
+    def __init__(self, sequence: Sequence, indices: range) -> None:
+        self._sequence = sequence
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(index, slice):
+            return SequenceView(self._sequence, self._indices[index])
+
+        return self._sequence[self._indices[index]]
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._sequence.__getitem__, self._indices)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+
+        return all(map(lambda a, b: a == b, self, other))  # noqa: C417
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(type(self).__name__, list(self))
+
+
+def group_consecutive(
+    iterable: Iterable, key: Optional[Callable[[Any], Any]] = None
+) -> Iterator[Any]:
+    """Lazily split iterable into groups of consecutive equal items.
+
+    Groups of sequences are views instead of copies: slices of NumPy arrays, memoryviews of bytes-like
+    objects and SequenceViews of other sequences. Strings are sliced, since Python has no views of them.
+    Groups of other iterables are lists, only the current one is held in memory.
+
+    Args:
+        iterable: An iterable to group
+        key: A function computing the value items are compared by, defaults to the items themselves
+
+    Returns:
+        An iterator of groups, in the order of iterable
+
+    Example:
+        [list(group) for group in group_consecutive([1, 1, 2])] == [[1, 1], [2]]
+    """
+
+    if is_ndarray(iterable) and iterable.ndim == 1 and key is None:
+        starts = _numpy_starts(iterable).tolist()
+        ends = starts[1:] + [len(iterable)]
+
+        return (iterable[start:end] for start, end in zip(starts, ends))
+
+    if isinstance(iterable, str):
+        slice_group = iterable.__getitem__
+    elif isinstance(iterable, (bytes, bytearray)):
+        slice_group = memoryview(iterable).__getitem__
+    elif isinstance(iterable, Sequence):
+        indices = range(len(iterable))
+
+        def slice_group(bounds: slice) -> Any:
+            return SequenceView(iterable, indices[bounds])
+
+    else:
+        return (list(group) for _, group in itertools.groupby(iterable, key))
+
+    if not len(iterable):
+        return iter(())
+
+    def groups(starts: Iterator[int]) -> Iterator[Any]:
+        start = next(starts)
+
+        for end in starts:
+            yield slice_group(slice(start, end))
+            start = end
+
+    return groups(_starts(iterable, key))
+
+
+class RunLength(Sequence):
+    """A read-only sequence stored as runs of consecutive equal items.
+
+    Indexing costs O(log runs), count(), index() and search_n() cost O(runs) instead of O(len),
+    pyaoi.count(), pyaoi.find() and pyaoi.search_n() use them.
+
+    Example:
+        temperatures = RunLength.encode(readings)
+
+        pyaoi.count(temperatures, 21)
+    """
+
+    def __init__(self, runs: Iterable[Run] = ()) -> None:
+        self._values: List[Any] = []
+        # The index after the last item of each run
+        self._ends: List[int] = []
+        end = 0
+
+        for value, length in runs:
+            if length <= 0:
+                continue
+
+            end += length
+
+            # Adjacent runs of equal values are merged, so equal sequences have equal runs
+            if self._values and self._values[-1] == value:
+                self._ends[-1] = end
+            else:
+                self._values.append(value)
+                self._ends.append(end)
+
+    @classmethod
+    def encode(
+        cls, iterable: Iterable, key: Optional[Callable[[Any], Any]] = None
+    ) -> "RunLength":
+        """Encode iterable, see run_length_encode()."""
+        return cls(run_length_encode(iterable, key))
+
+    def runs(self) -> Iterator[Run]:
+        """Iterate over the (value, length) tuples of this sequence's runs."""
+
+        starts = itertools.chain((0,), self._ends)
+
+        return zip(self._values, map(operator.sub, self._ends, starts))
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+
+            if step != 1:
+                return RunLength((self[i], 1) for i in range(start, stop, step))
+
+            return RunLength(self._clipped_runs(start, stop))
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("RunLength index out of range")
+
+        return self._values[bisect.bisect_right(self._ends, index)]
+
+    def _clipped_runs(self, start: int, stop: int) -> Iterator[Run]:
+        """Iterate over the runs covering start:stop, shortened to that range."""
+
+        first = bisect.bisect_right(self._ends, start)
+
+        for run in range(first, len(self._ends)):
+            run_start = self._ends[run - 1] if run else 0
+
+            if run_start >= stop:
+                return
+
+            yield self._values[run], min(self._ends[run], stop) - max(run_start, start)
+
+    def __iter__(self) -> Iterator[Any]:
+        return run_length_decode(self.runs())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, RunLength):
+            return self._values == other._values and self._ends == other._ends
+
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+
+        return all(map(lambda a, b: a == b, self, other))  # noqa: C417
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(type(self).__name__, list(self.runs()))
+
+    def count(self, value: Any) -> int:
+        """Count how often value occurs, in O(runs)."""
+
+        return sum(length for item, length in self.runs() if item == value)
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        """Return the index of the first occurrence of value in start:stop, in O(runs).
+
+        Raises:
+            ValueError: If value does not occur
+        """
+
+        start, stop, _ = slice(start, stop).indices(len(self))
+        offset = start
+
+        for item, length in self._clipped_runs(start, stop):
+            if item == value:
+                return offset
+
+            offset += length
+
+        raise ValueError("{!r} is not in RunLength".format(value))
+
+    def search_n(
+        self,
+        value: Any,
+        num_elements: int,
+        binary_predicate: Callable[[Any, Any], bool] = operator.eq,
+    ) -> int:
+        """Find the first num_elements consecutive items satisfying binary_predicate(item, value), in O(runs).
+
+        Returns:
+            The index of the first of these items, or -1 if there are none
+        """
+
+        if num_elements <= 0:
+            return 0 if len(self) else -1
+
+        offset = 0
+        # The start and length of the current stretch of consecutive satisfying runs
+        stretch_start, stretch_length = 0, 0
+
+        for item, length in self.runs():
+            if binary_predicate(item, value):
+                if not stretch_length:
+                    stretch_start = offset
+
+                stretch_length += length
+
+                if stretch_length >= num_elements:
+                    return stretch_start
+            else:
+                stretch_length = 0
+
+            offset += length
+
+        return -1
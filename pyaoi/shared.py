@@ -0,0 +1,525 @@
+"""A persistent process pool scanning data placed in shared memory once."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import collections
+import operator
+import os
+import re
+import struct
+import weakref
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from pyaoi._compat import is_ndarray
+
+BinaryPredicate = Callable[[Any, Any], bool]
+UnaryPredicate = Callable[[Any], bool]
+
+_NUMERIC_FORMATS = frozenset("bBhHiIlLqQfd")
+
+_ATTACHED_LIMIT = 16
+"""How many segments a worker keeps attached, the least recently used one is detached first"""
+
+
+class SharedArray(NamedTuple):
+    """A handle to data placed in shared memory by SharedPool.share().
+
+    Handles are cheap to pickle, workers use them to attach to the segment by name.
+    """
+
+    name: str
+    kind: str
+    """One of "bytes", "numeric" or "records\""""
+    format: str
+    """The memoryview format of numeric items or the struct format of records"""
+    length: int
+    """The number of items"""
+
+    def __len__(self) -> int:  # type: ignore
+        return self.length
+
+
+class _Items:
+    """Read access to the items of a SharedArray backed by an attached buffer."""
+
+    def __init__(self, shared: SharedArray, buffer: memoryview) -> None:
+        self.shared = shared
+        self.length = shared.length
+
+        if shared.kind == "records":
+            self.struct: Optional[struct.Struct] = struct.Struct(shared.format)
+            self.scalar = len(self.struct.unpack(bytes(self.struct.size))) == 1
+            self.view = buffer[: shared.length * self.struct.size]
+        else:
+            self.struct = None
+            self.view = buffer[: shared.length * struct.calcsize(shared.format)].cast(
+                shared.format
+            )
+
+    def get(self, index: int) -> Any:
+        if self.struct is None:
+            return self.view[index]
+
+        record = self.struct.unpack_from(self.view, index * self.struct.size)
+
+        return record[0] if self.scalar else record
+
+    def iterate(self, start: int, stop: int) -> Iterator[Any]:
+        if self.struct is None:
+            return iter(self.view[start:stop])
+
+        size = self.struct.size
+        records = self.struct.iter_unpack(self.view[start * size : stop * size])
+
+        return map(operator.itemgetter(0), records) if self.scalar else records
+
+    def release(self) -> None:
+        self.view.release()
+
+
+_attached: "collections.OrderedDict[str, Tuple[shared_memory.SharedMemory, _Items]]" = (
+    collections.OrderedDict()
+)
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    # Segments are owned by the pool's process, attaching must not register them
+    # for cleanup by the worker
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _attach(shared: SharedArray) -> _Items:
+    """Attach to a segment, keeping recently used segments attached for later calls."""
+
+    if shared.name in _attached:
+        _attached.move_to_end(shared.name)
+
+        return _attached[shared.name][1]
+
+    segment = _open_segment(shared.name)
+    items = _Items(shared, segment.buf)
+    _attached[shared.name] = (segment, items)
+
+    while len(_attached) > _ATTACHED_LIMIT:
+        _detach(next(iter(_attached)))
+
+    return items
+
+
+def _detach(name: str) -> None:
+    """Release this process's attachment to a segment, if it has one."""
+
+    if name in _attached:
+        segment, items = _attached.pop(name)
+        items.release()
+        segment.close()
+
+
+def items(shared: SharedArray) -> Sequence:
+    """Return the items of shared as a sequence read from shared memory by this process, without a pool.
+
+    Numbers and bytes are viewed without copying them, records are unpacked into a list.
+    """
+
+    attached = _attach(shared)
+
+    if attached.struct is None:
+        return attached.view
+
+    return list(attached.iterate(0, shared.length))
+
+
+def _count_chunk(shared: SharedArray, start: int, stop: int, value: Any) -> int:
+    return operator.countOf(_attach(shared).iterate(start, stop), value)
+
+
+def _count_if_chunk(
+    shared: SharedArray, start: int, stop: int, unary_predicate: UnaryPredicate
+) -> int:
+    return sum(map(unary_predicate, _attach(shared).iterate(start, stop)))
+
+
+def _find_if_chunk(
+    shared: SharedArray, start: int, stop: int, unary_predicate: UnaryPredicate
+) -> int:
+    for i, val in enumerate(_attach(shared).iterate(start, stop), start):
+        if unary_predicate(val):
+            return i
+
+    return -1
+
+
+def _search_chunk(
+    shared: SharedArray,
+    start: int,
+    stop: int,
+    needle: Sequence,
+    binary_predicate: BinaryPredicate,
+) -> int:
+    """Find needle starting within [start, stop), reading up to len(needle) - 1 items past stop."""
+
+    items = _attach(shared)
+    end = min(stop + len(needle) - 1, items.length)
+
+    if (
+        shared.kind == "bytes"
+        and binary_predicate is operator.eq
+        and isinstance(needle, bytes)
+    ):
+        # Regular expressions scan buffers natively without copying them
+        match = re.compile(re.escape(needle)).search(items.view, start, end)
+
+        return -1 if match is None else match.start()
+
+    first = needle[0]
+
+    for i in range(start, end - len(needle) + 1):
+        if binary_predicate(items.get(i), first) and all(
+            map(binary_predicate, items.iterate(i + 1, i + len(needle)), needle[1:])
+        ):
+            return i
+
+    return -1
+
+
+def _adjacent_find_chunk(
+    shared: SharedArray, start: int, stop: int, binary_predicate: BinaryPredicate
+) -> int:
+    """Find adjacent items starting within [start, stop), reading one item past stop."""
+
+    items = _attach(shared)
+    pairs = map(
+        binary_predicate,
+        items.iterate(start, stop),
+        items.iterate(start + 1, min(stop + 1, items.length)),
+    )
+
+    for i, is_pair in enumerate(pairs, start):
+        if is_pair:
+            return i
+
+    return -1
+
+
+def _minmax_chunk(shared: SharedArray, start: int, stop: int) -> Tuple[Any, Any]:
+    items = _attach(shared)
+
+    return min(items.iterate(start, stop)), max(items.iterate(start, stop))
+
+
+def _to_buffer(data: Any, fmt: Optional[str]) -> Tuple[str, str, int, memoryview]:
+    """Convert data into a buffer, returning its kind, format, number of items and the buffer."""
+
+    if fmt is not None:
+        data = list(data)
+        record = struct.Struct(fmt)
+        buffer = bytearray(record.size * len(data))
+
+        for i, val in enumerate(data):
+            record.pack_into(
+                buffer, i * record.size, *(val if isinstance(val, tuple) else (val,))
+            )
+
+        return "records", fmt, len(data), memoryview(buffer)
+
+    if isinstance(data, (bytes, bytearray)):
+        return "bytes", "B", len(data), memoryview(data)
+
+    if isinstance(data, array) and data.typecode in _NUMERIC_FORMATS:
+        return "numeric", data.typecode, len(data), memoryview(data)
+
+    if is_ndarray(data) and data.ndim == 1 and data.dtype.char in _NUMERIC_FORMATS:
+        data = data if data.flags.c_contiguous else data.copy()
+
+        return "numeric", data.dtype.char, len(data), memoryview(data)
+
+    if isinstance(data, memoryview) and data.ndim == 1 and data.c_contiguous:
+        if data.format == "B":
+            return "bytes", "B", len(data), data
+
+        if data.format in _NUMERIC_FORMATS:
+            return "numeric", data.format, len(data), data
+
+    values = list(data)
+    types = set(map(type, values))
+
+    if types <= {int}:
+        return "numeric", "q", len(values), memoryview(array("q", values))
+
+    if types <= {int, float}:
+        return "numeric", "d", len(values), memoryview(array("d", values))
+
+    raise TypeError(
+        "Only bytes, numbers and records with a struct format can be shared"
+    )
+
+
+def _release_all(
+    segments: Dict[str, shared_memory.SharedMemory], executor: List[Any]
+) -> None:
+    """Unlink all segments and stop the workers, used by shutdown() and at exit."""
+
+    for name, segment in segments.items():
+        _detach(name)
+        segment.close()
+
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    segments.clear()
+
+    if executor[0] is not None:
+        executor[0].shutdown(wait=True)
+        executor[0] = None
+
+
+_pools: "weakref.WeakSet[SharedPool]" = weakref.WeakSet()
+
+
+def owner(shared: SharedArray) -> Optional["SharedPool"]:
+    """Return the live pool of this process, which placed shared in shared memory, if there is one."""
+
+    return next((pool for pool in list(_pools) if shared.name in pool._segments), None)
+
+
+class SharedPool:
+    """A persistent pool of worker processes scanning data placed in shared memory.
+
+    Data is copied into a shared memory segment once by share(), after which every query
+    only sends a small handle to the workers, which attach to the segment and scan their
+    slice of it without copying. Workers and segments persist across calls until shutdown(),
+    which is also called when the pool is garbage collected or the interpreter exits.
+    Segments are owned by the process that created the pool, so they are removed even if
+    workers crash, a broken pool is replaced on the next call.
+
+    Predicates passed to the pool's methods must be picklable, e.g. module level functions
+    or functools.partial objects of them.
+
+    Example:
+        with SharedPool() as pool:
+            prices = pool.share(array("d", ...))
+            pool.count_if(prices, functools.partial(operator.lt, 100))
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_chunk_size: int = 1 << 16,
+        chunks_per_worker: int = 4,
+    ) -> None:
+        """Create a pool, the worker processes are started on first use.
+
+        Args:
+            max_workers: The number of worker processes, defaults to the number of CPUs
+            min_chunk_size: The minimum number of items a chunk has, smaller inputs are scanned by a single worker
+            chunks_per_worker: How many chunks to split each input into per worker, to balance uneven workloads
+        """
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_chunk_size = max(1, min_chunk_size)
+        self.chunks_per_worker = max(1, chunks_per_worker)
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._executor: List[Optional[ProcessPoolExecutor]] = [None]
+        self._finalizer = weakref.finalize(
+            self, _release_all, self._segments, self._executor
+        )
+        _pools.add(self)
+
+    def __enter__(self) -> "SharedPool":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.shutdown()
+
+    def share(self, data: Any, fmt: Optional[str] = None) -> SharedArray:
+        """Copy data into a new shared memory segment.
+
+        Args:
+            data: Bytes, an array.array, a 1-D NumPy array, a memoryview or an iterable of numbers.
+                If fmt is given, an iterable of records (tuples or single values)
+            fmt: A struct format to pack each record of data with
+
+        Returns:
+            A handle to pass to the pool's query methods, valid until release() or shutdown()
+        """
+
+        kind, item_format, length, buffer = _to_buffer(data, fmt)
+        segment = shared_memory.SharedMemory(create=True, size=max(1, buffer.nbytes))
+        segment.buf[: buffer.nbytes] = buffer.cast("B")
+        self._segments[segment.name] = segment
+
+        return SharedArray(segment.name, kind, item_format, length)
+
+    def release(self, shared: SharedArray) -> None:
+        """Remove the segment of a handle returned by share()."""
+
+        segment = self._segments.pop(shared.name)
+        _detach(shared.name)
+        segment.close()
+        segment.unlink()
+
+    def shutdown(self) -> None:
+        """Remove all shared segments and stop the worker processes."""
+
+        self._finalizer()
+
+    def _executor_instance(self) -> ProcessPoolExecutor:
+        if self._executor[0] is None:
+            self._executor[0] = ProcessPoolExecutor(self.max_workers)
+
+        return self._executor[0]
+
+    def _chunks(self, length: int) -> List[Tuple[int, int]]:
+        count = min(
+            self.max_workers * self.chunks_per_worker,
+            max(1, length // self.min_chunk_size),
+        )
+        size = -(-length // count) if length else 0
+
+        return [
+            (start, min(start + size, length)) for start in range(0, length, size or 1)
+        ]
+
+    def _run(self, shared: Any, function: Callable, *args: Any) -> Iterator[Any]:
+        """Run function on every chunk of shared, yielding the results in order of the chunks.
+
+        Raw data is shared for the duration of the call only.
+        """
+
+        temporary = not isinstance(shared, SharedArray)
+
+        if temporary:
+            shared = self.share(shared)
+
+        try:
+            chunks = self._chunks(shared.length)
+
+            if not chunks:
+                return
+
+            if len(chunks) == 1:
+                yield function(shared, *chunks[0], *args)
+
+                return
+
+            executor = self._executor_instance()
+            futures: List[Future] = [
+                executor.submit(function, shared, start, stop, *args)
+                for start, stop in chunks
+            ]
+
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        except BrokenProcessPool:
+            self._executor[0] = None
+            raise
+
+        finally:
+            if temporary:
+                self.release(shared)
+
+    def count(self, shared: Any, value: Any) -> int:
+        """Count how often value appears in shared, see pyaoi.count()."""
+
+        return sum(self._run(shared, _count_chunk, value))
+
+    def count_if(self, shared: Any, unary_predicate: UnaryPredicate) -> int:
+        """Count for how many items unary_predicate returns True, see pyaoi.count_if()."""
+
+        return sum(self._run(shared, _count_if_chunk, unary_predicate))
+
+    def find_if(self, shared: Any, unary_predicate: UnaryPredicate) -> int:
+        """Find the index of the first item satisfying unary_predicate, see pyaoi.find_if()."""
+
+        return _first_found(self._run(shared, _find_if_chunk, unary_predicate))
+
+    def search(
+        self,
+        shared: Any,
+        needle: Iterable,
+        binary_predicate: BinaryPredicate = operator.eq,
+    ) -> int:
+        """Find the index of the first occurrence of needle, see pyaoi.search().
+
+        Each chunk also reads the first len(needle) - 1 items of the next one,
+        so occurrences crossing chunk boundaries are found.
+        """
+
+        needle = (
+            bytes(needle) if isinstance(needle, (bytes, bytearray)) else list(needle)
+        )
+
+        if not needle:
+            return -1
+
+        return _first_found(self._run(shared, _search_chunk, needle, binary_predicate))
+
+    def adjacent_find(
+        self, shared: Any, binary_predicate: BinaryPredicate = operator.eq
+    ) -> int:
+        """Find the first index at which two adjacent items are considered equal, see pyaoi.adjacent_find()."""
+
+        return _first_found(self._run(shared, _adjacent_find_chunk, binary_predicate))
+
+    def minmax(self, shared: Any) -> Optional[Tuple[Any, Any]]:
+        """Find the smallest and the largest item, None if shared is empty."""
+
+        if not len(shared):
+            return None
+
+        results = list(self._run(shared, _minmax_chunk))
+
+        return min(low for low, _ in results), max(high for _, high in results)
+
+
+def _first_found(results: Generator[int, None, None]) -> int:
+    """Return the first index that is not -1, cancelling the search in later chunks."""
+
+    try:
+        return next((index for index in results if index != -1), -1)
+    finally:
+        results.close()
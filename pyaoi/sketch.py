@@ -0,0 +1,710 @@
+"""Approximate counting in bounded memory, for streams too large for count() and count_if()."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import abc
+import hashlib
+import heapq
+import itertools
+import math
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+SketchType = TypeVar("SketchType", bound="Sketch")
+
+_MASK64 = (1 << 64) - 1
+
+
+def _encode(item: Any) -> bytes:
+    """Encode item into bytes, equal for equal items across processes and interpreter runs."""
+
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return b"b" + bytes(item)
+
+    if isinstance(item, str):
+        return b"s" + item.encode("utf-8", "surrogatepass")
+
+    if isinstance(item, bool):
+        return b"?" + (b"1" if item else b"0")
+
+    if isinstance(item, int):
+        return b"i" + str(item).encode()
+
+    return b"r" + repr(item).encode("utf-8", "surrogatepass")
+
+
+_FLOAT = struct.Struct("<d")
+
+
+def _encode_key(item: Any) -> Tuple[bytes, bytes]:
+    """Encode a counted item reversibly, unlike _encode(), as a tag for its type and its content."""
+
+    kind = type(item)
+
+    if kind is str:
+        return b"s", item.encode("utf-8", "surrogatepass")
+
+    if kind is bytes:
+        return b"b", item
+
+    if kind is bool:
+        return b"?", b"1" if item else b""
+
+    if kind is int:
+        return b"i", str(item).encode()
+
+    if kind is float:
+        return b"f", _FLOAT.pack(item)
+
+    if item is None:
+        return b"n", b""
+
+    raise TypeError("Cannot serialize items of type {}".format(kind.__name__))
+
+
+def _decode_key(tag: bytes, content: memoryview) -> Any:
+    """Restore an item encoded by _encode_key()."""
+
+    if tag == b"s":
+        return bytes(content).decode("utf-8", "surrogatepass")
+
+    if tag == b"b":
+        return bytes(content)
+
+    if tag == b"?":
+        return bool(content)
+
+    if tag == b"i":
+        return int(bytes(content).decode("ascii"))
+
+    if tag == b"f":
+        return _FLOAT.unpack(content)[0]
+
+    if tag == b"n" and not content:
+        return None
+
+    raise ValueError("Unknown item tag {!r}".format(tag))
+
+
+def _hash128(item: Any, seed: int) -> Tuple[int, int]:
+    """Hash item to two independent 64 bit values, stable across processes unlike hash()."""
+
+    digest = hashlib.blake2b(
+        _encode(item), digest_size=16, salt=seed.to_bytes(8, "little")
+    ).digest()
+
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values
+
+
+class Sketch(abc.ABC):
+    """Base class of the sketches, which can be merged across shards and serialized to bytes."""
+
+    _MAGIC = b""
+
+    @abc.abstractmethod
+    def add(self, item: Any, count: int = 1) -> None:
+        """Record count occurrences of item."""
+
+    def update(self, iterable: Iterable) -> "Sketch":
+        """Record every item of iterable, returning the sketch itself."""
+        add = self.add
+
+        for item in iterable:
+            add(item)
+
+        return self
+
+    @abc.abstractmethod
+    def merge(self: SketchType, other: SketchType) -> SketchType:
+        """Add the items recorded by other, which must have been created with the same parameters.
+
+        Returns:
+            The sketch itself
+        """
+
+    @abc.abstractmethod
+    def to_bytes(self) -> bytes:
+        """Serialize the sketch, from_bytes() restores it."""
+
+    @classmethod
+    @abc.abstractmethod
+    def from_bytes(cls: Type[SketchType], data: bytes) -> SketchType:
+        """Restore a sketch serialized by to_bytes()."""
+
+    @classmethod
+    def _check_magic(cls, data: bytes) -> memoryview:
+        if data[: len(cls._MAGIC)] != cls._MAGIC:
+            raise ValueError("Data is not a serialized {}".format(cls.__name__))
+
+        return memoryview(data)[len(cls._MAGIC) :]  # noqa: E203
+
+    def _check_compatible(self, other: "Sketch", *attributes: str) -> None:
+        if type(other) is not type(self) or any(
+            getattr(self, name) != getattr(other, name) for name in attributes
+        ):
+            raise ValueError(
+                "Only {} with equal {} can be merged".format(
+                    type(self).__name__, ", ".join(attributes)
+                )
+            )
+
+
+class CountMinSketch(Sketch):
+    """Estimate how often items occur, never underestimating.
+
+    With probability 1 - delta an estimate exceeds the true count by at most epsilon * total,
+    where total is the number of recorded occurrences of all items.
+    """
+
+    _MAGIC = b"PYAOI-CMS1"
+    _HEADER = struct.Struct("<IIQQ")
+    _TYPECODE = "Q"
+
+    def __init__(
+        self, epsilon: float = 0.001, delta: float = 0.01, seed: int = 0
+    ) -> None:
+        """Create an empty sketch.
+
+        Args:
+            epsilon: The error of estimates relative to the total count
+            delta: The probability of an estimate exceeding that error
+            seed: Sketches can only be merged if they use the same seed
+        """
+
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        self.seed = seed
+        self.total = 0
+        self._counters = array(self._TYPECODE, bytes(8 * self.width * self.depth))
+
+    def _cells(self, item: Any) -> List[int]:
+        first, second = _hash128(item, self.seed)
+        width = self.width
+
+        return [
+            row * width + (first + row * second) % width for row in range(self.depth)
+        ]
+
+    def add(self, item: Any, count: int = 1) -> None:
+        counters = self._counters
+
+        for cell in self._cells(item):
+            counters[cell] += count
+
+        self.total += count
+
+    def estimate(self, item: Any) -> int:
+        """Estimate how often item was recorded."""
+        counters = self._counters
+
+        return min(counters[cell] for cell in self._cells(item))
+
+    __getitem__ = estimate
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":  # type: ignore
+        self._check_compatible(other, "width", "depth", "seed")
+        self._counters = array(
+            self._TYPECODE, map(sum, zip(self._counters, other._counters))
+        )
+        self.total += other.total
+
+        return self
+
+    def to_bytes(self) -> bytes:
+        return (
+            self._MAGIC
+            + self._HEADER.pack(self.width, self.depth, self.seed, self.total)
+            + _little_endian(self._counters)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        payload = cls._check_magic(data)
+        sketch = cls.__new__(cls)
+        sketch.width, sketch.depth, sketch.seed, sketch.total = cls._HEADER.unpack_from(
+            payload
+        )
+        sketch._counters = _from_little_endian(
+            cls._TYPECODE, payload[cls._HEADER.size :]  # noqa: E203
+        )
+
+        return sketch
+
+
+class CountSketch(CountMinSketch):
+    """Estimate how often items occur, without systematically over- or underestimating.
+
+    With probability 1 - delta an estimate deviates from the true count by at most
+    epsilon times the euclidean norm of all counts, which is much smaller than the total
+    count of CountMinSketch for skewed streams.
+    """
+
+    _MAGIC = b"PYAOI-CS01"
+    _TYPECODE = "q"
+
+    def __init__(
+        self, epsilon: float = 0.01, delta: float = 0.01, seed: int = 0
+    ) -> None:
+        """Create an empty sketch.
+
+        Args:
+            epsilon: The error of estimates relative to the euclidean norm of all counts
+            delta: The probability of an estimate exceeding that error
+            seed: Sketches can only be merged if they use the same seed
+        """
+
+        self.width = math.ceil(3 / epsilon**2)
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        self.seed = seed
+        self.total = 0
+        self._counters = array(self._TYPECODE, bytes(8 * self.width * self.depth))
+
+    def _signed_cells(self, item: Any) -> List[Tuple[int, int]]:
+        first, second = _hash128(item, self.seed)
+        width = self.width
+        cells = []
+
+        for row in range(self.depth):
+            combined = (first + row * second) & _MASK64
+            cells.append((row * width + combined % width, 1 if combined >> 63 else -1))
+
+        return cells
+
+    def add(self, item: Any, count: int = 1) -> None:
+        counters = self._counters
+
+        for cell, sign in self._signed_cells(item):
+            counters[cell] += sign * count
+
+        self.total += count
+
+    def estimate(self, item: Any) -> int:
+        """Estimate how often item was recorded, as the median of all rows' estimates."""
+        counters = self._counters
+        estimates = sorted(
+            sign * counters[cell] for cell, sign in self._signed_cells(item)
+        )
+        middle = len(estimates) // 2
+
+        if len(estimates) % 2:
+            return estimates[middle]
+
+        return (estimates[middle - 1] + estimates[middle]) // 2
+
+    __getitem__ = estimate
+
+
+class HyperLogLog(Sketch):
+    """Estimate the number of distinct items in a few kilobytes of memory."""
+
+    _MAGIC = b"PYAOI-HLL1"
+    _HEADER = struct.Struct("<BQ")
+
+    def __init__(self, error: float = 0.01, seed: int = 0) -> None:
+        """Create an empty sketch.
+
+        Args:
+            error: The standard error of estimates relative to the true number of distinct items
+            seed: Sketches can only be merged if they use the same seed
+        """
+
+        self.precision = min(18, max(4, math.ceil(2 * math.log2(1.04 / error))))
+        self.seed = seed
+        self._registers = bytearray(1 << self.precision)
+
+    def add(self, item: Any, count: int = 1) -> None:
+        hashed = _hash128(item, self.seed)[0]
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def estimate(self) -> int:
+        """Estimate the number of distinct items recorded."""
+        registers = self._registers
+        size = len(registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(size, 0.7213 / (1 + 1.079 / size))
+        raw = (
+            alpha * size * size / math.fsum(2.0**-register for register in registers)
+        )
+        empty = registers.count(0)
+
+        # Linear counting is more accurate while many registers are still empty
+        if raw <= 2.5 * size and empty:
+            return round(size * math.log(size / empty))
+
+        return round(raw)
+
+    def __len__(self) -> int:
+        return self.estimate()
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":  # type: ignore
+        self._check_compatible(other, "precision", "seed")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+        return self
+
+    def to_bytes(self) -> bytes:
+        return (
+            self._MAGIC
+            + self._HEADER.pack(self.precision, self.seed)
+            + bytes(self._registers)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        payload = cls._check_magic(data)
+        sketch = cls.__new__(cls)
+        sketch.precision, sketch.seed = cls._HEADER.unpack_from(payload)
+        sketch._registers = bytearray(payload[cls._HEADER.size :])  # noqa: E203
+
+        return sketch
+
+
+class SpaceSaving(Sketch):
+    """Find the most frequent items, keeping at most capacity counters.
+
+    Every item occurring more than total / capacity times is guaranteed to be tracked.
+    Counts of tracked items are overestimated by at most the error reported for them.
+    """
+
+    _MAGIC = b"PYAOI-SS02"
+    _HEADER = struct.Struct("<QqI")
+    # Each counter is its count, error, the tag and length of its encoded item, then the item
+    _COUNTER = struct.Struct("<qqcI")
+
+    def __init__(self, capacity: Optional[int] = None, epsilon: float = 0.001) -> None:
+        """Create an empty summary.
+
+        Args:
+            capacity: The number of counters to keep, defaults to 1 / epsilon
+            epsilon: The overestimation of counts relative to the total count
+        """
+
+        self.capacity = capacity or math.ceil(1 / epsilon)
+        self.total = 0
+        self._counters: Dict[Any, List[int]] = {}
+        # Entries of the heap become stale once their item's count grows,
+        # they are skipped when searching the minimum and pruned on rebuilding
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._order = itertools.count()
+
+    def _push(self, item: Any, count: int) -> None:
+        heapq.heappush(self._heap, (count, next(self._order), item))
+
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        order = self._order
+        self._heap = [
+            (count, next(order), item) for item, (count, _) in self._counters.items()
+        ]
+        heapq.heapify(self._heap)
+
+    def _pop_minimum(self) -> Tuple[Any, int]:
+        heap = self._heap
+        counters = self._counters
+
+        while True:
+            count, _, item = heapq.heappop(heap)
+
+            if item in counters and counters[item][0] == count:
+                del counters[item]
+
+                return item, count
+
+    def add(self, item: Any, count: int = 1) -> None:
+        self.total += count
+        counters = self._counters
+
+        if item in counters:
+            counters[item][0] += count
+        elif len(counters) < self.capacity:
+            counters[item] = [count, 0]
+        else:
+            _, minimum = self._pop_minimum()
+            counters[item] = [minimum + count, minimum]
+
+        self._push(item, counters[item][0])
+
+    def estimate(self, item: Any) -> int:
+        """Estimate how often item was recorded, an upper bound for tracked items."""
+        if item in self._counters:
+            return self._counters[item][0]
+
+        return self._minimum() if len(self._counters) >= self.capacity else 0
+
+    __getitem__ = estimate
+
+    def _minimum(self) -> int:
+        return min((count for count, _ in self._counters.values()), default=0)
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[Any, int, int]]:
+        """Return the k most frequent items, most frequent first.
+
+        Returns:
+            A list of (item, estimated count, maximum overestimation) tuples
+        """
+
+        ranked = sorted(
+            ((item, count, error) for item, (count, error) in self._counters.items()),
+            key=lambda entry: entry[1],
+            reverse=True,
+        )
+
+        return ranked[:k]
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":  # type: ignore
+        self._check_compatible(other, "capacity")
+
+        # Items missing from a full summary may have occurred up to its minimum count
+        own_missing = self._minimum() if len(self._counters) >= self.capacity else 0
+        other_missing = (
+            other._minimum() if len(other._counters) >= other.capacity else 0
+        )
+        merged = {}
+
+        for item in self._counters.keys() | other._counters.keys():
+            own = self._counters.get(item, [own_missing, own_missing])
+            theirs = other._counters.get(item, [other_missing, other_missing])
+            merged[item] = [own[0] + theirs[0], own[1] + theirs[1]]
+
+        kept = heapq.nlargest(
+            self.capacity, merged.items(), key=lambda entry: entry[1][0]
+        )
+        self._counters = dict(kept)
+        self.total += other.total
+        self._rebuild_heap()
+
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Serialize the summary, whose items must be str, bytes, int, float, bool or None.
+
+        Raises:
+            TypeError: If an item has another type
+        """
+
+        parts = [
+            self._MAGIC,
+            self._HEADER.pack(self.capacity, self.total, len(self._counters)),
+        ]
+
+        for item, (count, error) in self._counters.items():
+            tag, encoded = _encode_key(item)
+            parts.append(self._COUNTER.pack(count, error, tag, len(encoded)))
+            parts.append(encoded)
+
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpaceSaving":
+        payload = cls._check_magic(data)
+        capacity, total, size = cls._HEADER.unpack_from(payload)
+
+        if size > capacity:
+            raise ValueError("More counters than the capacity of {}".format(capacity))
+
+        summary = cls(capacity)
+        summary.total = total
+        offset = cls._HEADER.size
+
+        for _ in range(size):
+            count, error, tag, length = cls._COUNTER.unpack_from(payload, offset)
+            offset += cls._COUNTER.size
+
+            if offset + length > len(payload):
+                raise ValueError("Truncated item at offset {}".format(offset))
+
+            item = _decode_key(tag, payload[offset : offset + length])  # noqa: E203
+            summary._counters[item] = [count, error]
+            offset += length
+
+        if offset != len(payload):
+            raise ValueError(
+                "{} bytes after the counters".format(len(payload) - offset)
+            )
+
+        summary._rebuild_heap()
+
+        return summary
+
+
+class TDigest(Sketch):
+    """Estimate quantiles of a stream of numbers, most accurately near the extremes.
+
+    The digest keeps on the order of compression weighted centroids. The error in the rank of
+    an estimated quantile q is roughly proportional to q * (1 - q) / compression.
+    """
+
+    _MAGIC = b"PYAOI-TD01"
+    _HEADER = struct.Struct("<dddQ")
+
+    def __init__(self, compression: float = 100.0) -> None:
+        """Create an empty digest.
+
+        Args:
+            compression: Higher values keep more centroids and yield more accurate quantiles
+        """
+
+        self.compression = compression
+        self.total = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, item: float, count: int = 1) -> None:
+        self._buffer.append((float(item), float(count)))
+        self.total += count
+        self.min = min(self.min, item)
+        self.max = max(self.max, item)
+
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _q_limit(self, quantile: float) -> float:
+        """Return the largest quantile a centroid starting at quantile may extend to."""
+        compression = self.compression
+        scale = compression / (2 * math.pi) * math.asin(2 * quantile - 1) + 1
+
+        if scale >= compression / 4:
+            return 1.0
+
+        return (math.sin(2 * math.pi * scale / compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = math.fsum(weight for _, weight in points)
+        centroids = []
+        mean, weight = points[0]
+        merged_weight = 0.0
+        limit = self._q_limit(0.0)
+
+        for next_mean, next_weight in points[1:]:
+            if (merged_weight + weight + next_weight) / total <= limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                centroids.append((mean, weight))
+                merged_weight += weight
+                limit = self._q_limit(merged_weight / total)
+                mean, weight = next_mean, next_weight
+
+        centroids.append((mean, weight))
+        self._centroids = centroids
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        """Estimate the value below which the fraction quantile of all recorded values lies.
+
+        Returns:
+            The estimated value, None if the digest is empty
+        """
+
+        self._compress()
+        centroids = self._centroids
+
+        if not centroids:
+            return None
+
+        quantile = min(max(quantile, 0.0), 1.0)
+        target = quantile * math.fsum(weight for _, weight in centroids)
+        previous_mean, previous_center = self.min, 0.0
+        cumulative = 0.0
+
+        for mean, weight in centroids:
+            center = cumulative + weight / 2
+
+            if target <= center:
+                if center == previous_center:
+                    return mean
+
+                fraction = (target - previous_center) / (center - previous_center)
+
+                return previous_mean + fraction * (mean - previous_mean)
+
+            previous_mean, previous_center = mean, center
+            cumulative += weight
+
+        if cumulative == previous_center:
+            return self.max
+
+        fraction = (target - previous_center) / (cumulative - previous_center)
+
+        return previous_mean + fraction * (self.max - previous_mean)
+
+    def merge(self, other: "TDigest") -> "TDigest":  # type: ignore
+        self._check_compatible(other, "compression")
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+        return self
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+
+        return (
+            self._MAGIC
+            + self._HEADER.pack(self.compression, self.min, self.max, self.total)
+            + _little_endian(array("d", itertools.chain.from_iterable(self._centroids)))
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TDigest":
+        payload = cls._check_magic(data)
+        compression, minimum, maximum, total = cls._HEADER.unpack_from(payload)
+        digest = cls(compression)
+        digest.min, digest.max, digest.total = minimum, maximum, total
+        values = _from_little_endian("d", payload[cls._HEADER.size :])  # noqa: E203
+        digest._centroids = list(zip(values[::2], values[1::2]))
+
+        return digest
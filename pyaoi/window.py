@@ -0,0 +1,265 @@
+"""Aggregates over the last items of a stream, updated in constant amortized time per item."""
+# Copyright 2020-2021 Jonas Muehlmann
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE,ARISING FROM, OUT OF OR IN CONNECTION WITH
+# THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import abc
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Tuple
+
+UnaryPredicate = Callable[[Any], bool]
+
+
+class SlidingWindow(abc.ABC):
+    """Base class of aggregates over the items of a sliding window.
+
+    A window either holds the last size items, or the items pushed within the last
+    duration time units, in which case each item is pushed with a timestamp.
+    Timestamps must not decrease, the window covers (latest timestamp - duration, latest timestamp].
+    """
+
+    def __init__(
+        self, size: Optional[int] = None, *, duration: Optional[float] = None
+    ) -> None:
+        if (size is None) == (duration is None):
+            raise ValueError("Exactly one of size and duration has to be given")
+
+        if size is not None and size < 1:
+            raise ValueError("size has to be at least 1")
+
+        self.size = size
+        self.duration = duration
+        self._timestamps: Deque[float] = deque()
+        self._length = 0
+        # Items are numbered in the order they were pushed, this is the oldest one's number
+        self._oldest = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    @abc.abstractmethod
+    def value(self) -> Any:
+        """The aggregate over the items currently in the window."""
+
+    @abc.abstractmethod
+    def _add(self, item: Any, number: int) -> None:
+        """Add item, which is pushed as the number-th item."""
+
+    @abc.abstractmethod
+    def _remove(self, number: int) -> None:
+        """Remove the oldest item, which was pushed as the number-th item."""
+
+    def _evict(self) -> None:
+        self._remove(self._oldest)
+        self._oldest += 1
+        self._length -= 1
+
+    def push(self, item: Any, timestamp: Optional[float] = None) -> Any:
+        """Add item to the window, evicting items which no longer belong to it.
+
+        Args:
+            item: The item to add
+            timestamp: The time item occurred at, defaults to time.monotonic(). Ignored by windows with a size
+
+        Returns:
+            The aggregate over the window including item
+        """
+
+        self._add(item, self._oldest + self._length)
+        self._length += 1
+
+        if self.size is not None:
+            if self._length > self.size:
+                self._evict()
+        else:
+            if timestamp is None:
+                timestamp = time.monotonic()
+
+            self._timestamps.append(timestamp)
+            self.advance(timestamp)
+
+        return self.value
+
+    def advance(self, timestamp: float) -> Any:
+        """Evict the items older than duration relative to timestamp, without adding an item.
+
+        Returns:
+            The aggregate over the remaining window
+        """
+
+        if self.duration is not None:
+            limit = timestamp - self.duration
+            timestamps = self._timestamps
+
+            while timestamps and timestamps[0] <= limit:
+                timestamps.popleft()
+                self._evict()
+
+        return self.value
+
+
+class SlidingCount(SlidingWindow):
+    """Count for how many items in the window an unary predicate returns True, like count_if()."""
+
+    def __init__(
+        self,
+        unary_predicate: UnaryPredicate,
+        size: Optional[int] = None,
+        *,
+        duration: Optional[float] = None,
+    ) -> None:
+        super().__init__(size, duration=duration)
+        self.unary_predicate = unary_predicate
+        self._results: Deque[bool] = deque()
+        self.count = 0
+
+    @property
+    def value(self) -> int:
+        """For how many items in the window unary_predicate returned True."""
+        return self.count
+
+    def _add(self, item: Any, number: int) -> None:
+        result = bool(self.unary_predicate(item))
+        self._results.append(result)
+        self.count += result
+
+    def _remove(self, number: int) -> None:
+        self.count -= self._results.popleft()
+
+
+class SlidingAll(SlidingCount):
+    """Check if an unary predicate returns True for all items in the window, like all_of()."""
+
+    @property
+    def value(self) -> bool:  # type: ignore
+        """True if the window is not empty and unary_predicate returned True for all its items."""
+        return 0 < self._length == self.count
+
+
+class SlidingAny(SlidingCount):
+    """Check if an unary predicate returns True for any item in the window, like any_of()."""
+
+    @property
+    def value(self) -> bool:  # type: ignore
+        """True if unary_predicate returned True for any item in the window."""
+        return self.count > 0
+
+
+class SlidingMinMax(SlidingWindow):
+    """Track the smallest and the largest item in the window.
+
+    Two monotonic deques hold the candidates for the minimum and the maximum,
+    each item is added to and removed from them at most once.
+    """
+
+    def __init__(
+        self, size: Optional[int] = None, *, duration: Optional[float] = None
+    ) -> None:
+        super().__init__(size, duration=duration)
+        self._minima: Deque[Tuple[int, Any]] = deque()
+        self._maxima: Deque[Tuple[int, Any]] = deque()
+
+    @property
+    def value(self) -> Optional[Tuple[Any, Any]]:
+        """The smallest and the largest item in the window, None if it is empty."""
+        if not self._length:
+            return None
+
+        return self._minima[0][1], self._maxima[0][1]
+
+    @property
+    def min(self) -> Any:
+        """The smallest item in the window."""
+        return self._minima[0][1]
+
+    @property
+    def max(self) -> Any:
+        """The largest item in the window."""
+        return self._maxima[0][1]
+
+    def _add(self, item: Any, number: int) -> None:
+        minima = self._minima
+        maxima = self._maxima
+
+        while minima and not minima[-1][1] < item:
+            minima.pop()
+
+        while maxima and not item < maxima[-1][1]:
+            maxima.pop()
+
+        minima.append((number, item))
+        maxima.append((number, item))
+
+    def _remove(self, number: int) -> None:
+        if self._minima[0][0] == number:
+            self._minima.popleft()
+
+        if self._maxima[0][0] == number:
+            self._maxima.popleft()
+
+
+def sliding(
+    iterable: Iterable, size: int, agg: Callable[[int], SlidingWindow]
+) -> Iterator[Any]:
+    """Yield an aggregate over every window of size consecutive items of iterable.
+
+    Args:
+        iterable: An iterable to slide the window over
+        size: The number of items in each window
+        agg: A callable creating a window from size, e.g. SlidingMinMax or functools.partial(SlidingCount, unary_predicate)
+
+    Returns:
+        A generator yielding the aggregate of each full window, len(iterable) - size + 1 values in total
+
+    Example:
+        list(sliding([3, 1, 4, 1, 5], 3, SlidingMinMax)) returns [(1, 4), (1, 4), (1, 5)]
+    """
+
+    window = agg(size)
+
+    for number, item in enumerate(iterable, 1):
+        value = window.push(item)
+
+        if number >= size:
+            yield value
+
+
+def sliding_by_time(
+    pairs: Iterable[Tuple[float, Any]],
+    duration: float,
+    agg: Callable[..., SlidingWindow],
+) -> Iterator[Any]:
+    """Yield an aggregate over the items of the last duration time units after each item.
+
+    Args:
+        pairs: An iterable of (timestamp, item) pairs with non-decreasing timestamps
+        duration: The length of the window in the unit of the timestamps
+        agg: A callable creating a window from the keyword argument duration, e.g. SlidingMinMax
+
+    Returns:
+        A generator yielding the aggregate of the window ending at each pair's timestamp
+    """
+
+    window = agg(duration=duration)
+
+    for timestamp, item in pairs:
+        yield window.push(item, timestamp)
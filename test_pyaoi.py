@@ -1,10 +1,32 @@
 #!/usr/bin/env python3
 
 
+import array
+import ast
 import collections
+import ctypes
+import functools
+import itertools
+import mmap
+import operator
+import os
+import struct
+import subprocess
+import sys
+from multiprocessing import shared_memory
 from typing import List
 
+import pytest
+
 import pyaoi
+import pyaoi.cache
+import pyaoi.calibrate
+import pyaoi.columns
+import pyaoi.dispatch
+import pyaoi.io
+import pyaoi.pred
+import pyaoi.sketch
+import pyaoi.window
 
 
 class TestAllOf:
@@ -250,6 +272,10 @@ class TestSearchN:
     def test_super_empty(self):
         assert pyaoi.search_n([], 10, 5) == -1
 
+    def test_truncated_window_at_end(self):
+        assert pyaoi.search_n([2, 1, 2], 2, 5) == -1
+        assert pyaoi.search_n([1, 2, 2], 2, 3) == -1
+
     def test_custom_binary_predicate_second(self):
         assert pyaoi.search_n(
             [(1, 2), (3, 4), (3, 4), (5, 6)],
@@ -424,3 +450,1526 @@ class TestShifRight:
 
     def test_shift_len(self):
         assert pyaoi.shift_right([1, 2, 3, 4, 5], 5) == [None] * 5
+
+
+class TestMappedBytes:
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            pyaoi.io.MappedSequence(None)
+
+    def test_algorithms(self, tmp_path):
+        path = tmp_path / "dump.bin"
+        path.write_bytes(bytes([1, 2, 3, 3, 4, 5, 0]) * 3)
+
+        with pyaoi.io.open_bytes(str(path)) as data:
+            assert len(data) == 21
+            assert pyaoi.count(data, 3) == 6
+            assert pyaoi.find(data, 4) == 4
+            assert pyaoi.find(data, 9) == -1
+            assert pyaoi.count_if(data, lambda x: x > 3) == 6
+            assert pyaoi.search(data, [4, 5]) == 4
+            assert pyaoi.find_end(data, [4, 5]) == 18
+            assert data[7:].find(b"\x03\x04") == 3
+            assert data[-1] == 0
+
+    def test_slices_are_views(self, tmp_path):
+        path = tmp_path / "dump.bin"
+        path.write_bytes(bytes(range(10)))
+
+        with pyaoi.io.open_bytes(str(path)) as data:
+            view = data[2:8][::2]
+            assert isinstance(view, pyaoi.io.MappedBytes)
+            assert list(view) == [2, 4, 6]
+            assert view == b"\x02\x04\x06"
+
+    def test_chunks_are_page_aligned(self, tmp_path):
+        path = tmp_path / "dump.bin"
+        path.write_bytes(bytes(3 * pyaoi.io.PAGE_SIZE + 5))
+
+        with pyaoi.io.open_bytes(str(path)) as data:
+            chunks = list(data[1:].chunks(pyaoi.io.PAGE_SIZE))
+            assert [len(chunk) for chunk in chunks] == [
+                pyaoi.io.PAGE_SIZE - 1,
+                pyaoi.io.PAGE_SIZE,
+                pyaoi.io.PAGE_SIZE,
+                5,
+            ]
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "empty.bin"
+        path.write_bytes(b"")
+
+        with pyaoi.io.open_bytes(str(path)) as data:
+            assert pyaoi.find(data, 0) == -1
+            assert list(data.chunks()) == []
+
+
+class TestMappedRecords:
+    def test_scalar_records(self, tmp_path):
+        path = tmp_path / "values.bin"
+        path.write_bytes(struct.pack("<5d", 1.0, 2.5, 2.5, 4.0, 5.0))
+
+        with pyaoi.io.open_records(str(path), "<d") as data:
+            assert list(data) == [1.0, 2.5, 2.5, 4.0, 5.0]
+            assert pyaoi.adjacent_find(data[1:]) == 0
+            assert pyaoi.count(data, 2.5) == 2
+
+    def test_tuple_records(self, tmp_path):
+        path = tmp_path / "records.bin"
+        path.write_bytes(struct.pack("<IfIf", 1, 0.5, 2, 1.5) + b"\x00")
+
+        with pyaoi.io.open_records(str(path), "<If") as data:
+            assert len(data) == 2
+            assert pyaoi.find_if(data, lambda record: record[1] > 1) == 1
+
+
+class TestMappedLines:
+    def test_lines(self, tmp_path):
+        path = tmp_path / "log.txt"
+        path.write_bytes(b"info\nerror\ninfo\nwarning")
+
+        with pyaoi.io.open_lines(str(path), "utf-8") as data:
+            assert data[1] == "error"
+            assert list(data) == ["info", "error", "info", "warning"]
+            assert pyaoi.count(data, "info") == 2
+            assert pyaoi.find(data, "warning") == 3
+            assert list(data[::2]) == ["info", "info"]
+
+    def test_index_is_built_lazily(self, tmp_path):
+        path = tmp_path / "log.txt"
+        path.write_bytes(b"a\nb\nc\nd\n")
+
+        with pyaoi.io.open_lines(str(path)) as data:
+            assert data[0] == b"a"
+            assert len(data._starts) == 2
+            assert len(data) == 4
+
+
+class TestFillNInplace:
+    def test_first_2(self):
+        sequence = [1, 2, 3, 4]
+        pyaoi.fill_n_inplace(sequence, 5, 2)
+        assert sequence == [5, 5, 3, 4]
+
+    def test_more_than_len(self):
+        sequence = array.array("i", [1, 2])
+        pyaoi.fill_n_inplace(sequence, 5, 4)
+        assert sequence == array.array("i", [5, 5])
+
+    def test_empty(self):
+        sequence: List[int] = []
+        pyaoi.fill_n_inplace(sequence, 5, 2)
+        assert sequence == []
+
+
+class TestTransformNInplace:
+    def test_list(self):
+        sequence = [1, 2, 3, 4]
+        pyaoi.transform_n_inplace(sequence, lambda x: x + 1, 2)
+        assert sequence == [2, 3, 3, 4]
+
+    def test_array(self):
+        sequence = array.array("d", [1, 2, 3, 4])
+        pyaoi.transform_n_inplace(sequence, lambda x: x * 2, 3)
+        assert sequence == array.array("d", [2, 4, 6, 4])
+
+    def test_generic(self):
+        sequence = collections.UserList([1, 2, 3])
+        pyaoi.transform_n_inplace(sequence, lambda x: -x, 5)
+        assert sequence == [-1, -2, -3]
+
+
+class TestRotate:
+    def test_block_swaps(self, monkeypatch):
+        numpy = pytest.importorskip("numpy")
+        # Small chunks exercise the block swaps on short sequences
+        monkeypatch.setattr(pyaoi, "MOVE_CHUNK_SIZE", 2)
+
+        for length in range(1, 20):
+            values = list(range(length))
+
+            for n in range(-length, length + 1):
+                expected = list(pyaoi.rotate_copy(values, n))
+
+                for sequence in (
+                    list(values),
+                    array.array("i", values),
+                    bytearray(values),
+                    numpy.array(values),
+                ):
+                    pyaoi.rotate(sequence, n)
+                    assert list(sequence) == expected, (type(sequence), length, n)
+
+    def test_matches_rotate_copy(self):
+        for n in range(-7, 8):
+            for sequence in (
+                [1, 2, 3, 4, 5],
+                array.array("b", [1, 2, 3, 4, 5]),
+                bytearray([1, 2, 3, 4, 5]),
+                collections.deque([1, 2, 3, 4, 5]),
+                collections.UserList([1, 2, 3, 4, 5]),
+            ):
+                pyaoi.rotate(sequence, n)
+                assert list(sequence) == list(pyaoi.rotate_copy([1, 2, 3, 4, 5], n))
+
+    def test_empty(self):
+        sequence: List[int] = []
+        pyaoi.rotate(sequence, 3)
+        assert sequence == []
+
+
+class TestShiftLeftInplace:
+    def test_moves_like_std_shift_left(self):
+        for n in range(7):
+            sequence = [1, 2, 3, 4, 5]
+            pyaoi.shift_left_inplace(sequence, n)
+            kept = [1, 2, 3, 4, 5][n:]
+            assert sequence == kept + [None] * (5 - len(kept))
+
+    def test_fill_value(self):
+        sequence = array.array("i", [1, 2, 3])
+        pyaoi.shift_left_inplace(sequence, 2, 0)
+        assert sequence == array.array("i", [3, 0, 0])
+
+    def test_moves_elements(self):
+        for sequence in (
+            [1, 2, 3, 4, 5],
+            bytearray(b"\x01\x02\x03\x04\x05"),
+            collections.UserList([1, 2, 3, 4, 5]),
+        ):
+            pyaoi.shift_left_inplace(sequence, 2, 0)
+            assert list(sequence) == [3, 4, 5, 0, 0]
+
+    def test_ndarray(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.arange(1, 6)
+        pyaoi.shift_left_inplace(values, 2, 0)
+        assert values.tolist() == [3, 4, 5, 0, 0]
+
+
+class TestShiftRightInplace:
+    def test_moves_like_std_shift_right(self):
+        for n in range(7):
+            sequence = [1, 2, 3, 4, 5]
+            pyaoi.shift_right_inplace(sequence, n)
+            kept = [1, 2, 3, 4, 5][: max(5 - n, 0)]
+            assert sequence == [None] * (5 - len(kept)) + kept
+
+    def test_more_than_len(self):
+        sequence = [1, 2]
+        pyaoi.shift_right_inplace(sequence, 3)
+        assert sequence == [None, None]
+
+    def test_moves_elements(self):
+        for sequence in (
+            array.array("i", [1, 2, 3, 4, 5]),
+            collections.UserList([1, 2, 3, 4, 5]),
+        ):
+            pyaoi.shift_right_inplace(sequence, 2, 0)
+            assert list(sequence) == [0, 0, 1, 2, 3]
+
+    def test_ndarray(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.arange(1, 6)
+        pyaoi.shift_right_inplace(values, 2, 0)
+        assert values.tolist() == [0, 0, 1, 2, 3]
+
+
+class TestTable:
+    def _table(self):
+        return pyaoi.columns.Table(
+            {
+                "symbol": ["a", "b", "c", "d"],
+                "price": [50.0, 150.0, 120.0, 80.0],
+                "volume": [10, 20, 5, 40],
+            }
+        )
+
+    def test_columns_are_unboxed(self):
+        table = self._table()
+        assert isinstance(table.column("price"), array.array)
+        assert isinstance(table.column("volume"), array.array)
+        assert table.column("symbol") == ["a", "b", "c", "d"]
+
+    def test_rows_are_views(self):
+        row = self._table()[1]
+        assert row.symbol == "b" and row["volume"] == 20
+        assert row == ("b", 150.0, 20)
+        assert row.asdict() == {"symbol": "b", "price": 150.0, "volume": 20}
+
+    def test_from_rows(self):
+        table = pyaoi.columns.Table.from_rows(
+            [{"x": 1, "y": 2.0}, {"x": 3, "y": 4.0}], ["x", "y"]
+        )
+        assert list(table[1:]) == [(3, 4.0)]
+
+    def test_mismatched_lengths(self):
+        with pytest.raises(ValueError):
+            pyaoi.columns.Table({"x": [1, 2], "y": [1]})
+
+
+class TestColumnPredicate:
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            pyaoi.columns.ColumnPredicate()
+
+    def test_count_if(self):
+        table = TestTable()._table()
+        price = pyaoi.columns.field("price")
+        assert pyaoi.count_if(table, price > 100) == 2
+        assert pyaoi.count_if_not(table, price > 100) == 2
+
+    def test_find_if(self):
+        table = TestTable()._table()
+        volume = pyaoi.columns.field("volume")
+        assert pyaoi.find_if(table, volume < 10) == 2
+        assert pyaoi.find_if(table, volume > 100) == -1
+        assert pyaoi.find_if_not(table, volume < 30) == 3
+
+    def test_copy_except_if(self):
+        table = TestTable()._table()
+        field = pyaoi.columns.field
+        predicate = (field("price") > 100) & ~(field("symbol") == "c")
+        assert [row.symbol for row in pyaoi.copy_except_if(table, predicate)] == [
+            "a",
+            "c",
+            "d",
+        ]
+        assert [row.symbol for row in pyaoi.copy_except_if_not(table, predicate)] == [
+            "b"
+        ]
+
+    def test_compare_fields(self):
+        table = pyaoi.columns.Table({"low": [1, 5, 3], "high": [2, 4, 6]})
+        field = pyaoi.columns.field
+        assert pyaoi.count_if(table, field("low") < field("high")) == 2
+
+    def test_isin(self):
+        table = TestTable()._table()
+        predicate = pyaoi.columns.field("symbol").isin({"a", "d"})
+        assert (
+            pyaoi.count_if(table, predicate | (pyaoi.columns.field("volume") == 5)) == 3
+        )
+
+    def test_per_row_objects(self):
+        rows = [{"price": 50}, {"price": 150}]
+        assert pyaoi.find_if(rows, pyaoi.columns.field("price") > 100) == 1
+
+
+class _Positive(pyaoi.BatchPredicate):
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.chunks = []
+
+    def __call_batch__(self, chunk):
+        self.chunks.append(list(chunk))
+        return [x > 0 for x in chunk]
+
+
+class TestBatchPredicate:
+    def test_protocol_detection(self):
+        class Duck:
+            def __call_batch__(self, chunk):
+                return [True] * len(chunk)
+
+        assert isinstance(Duck(), pyaoi.BatchPredicate)
+        assert not isinstance(lambda x: x, pyaoi.BatchPredicate)
+
+    def test_counting(self):
+        predicate = _Positive(2)
+        assert pyaoi.count_if([1, -2, 3, 4, -5], predicate) == 3
+        assert predicate.chunks == [[1, -2], [3, 4], [-5]]
+        assert pyaoi.count_if_not([1, -2, 3, 4, -5], _Positive(2)) == 2
+
+    def test_short_circuits_per_chunk(self):
+        predicate = _Positive(2)
+        assert not pyaoi.all_of([1, 2, -3, 4, 5, 6], predicate)
+        assert predicate.chunks == [[1, 2], [-3, 4]]
+
+        predicate = _Positive(3)
+        assert pyaoi.find_if([-1, -2, -3, -4, 5, -6, -7], predicate) == 4
+        assert len(predicate.chunks) == 2
+
+    def test_find_if_not(self):
+        assert pyaoi.find_if_not([1, 2, -3], _Positive(2)) == 2
+        assert pyaoi.find_if_not([1, 2, 3], _Positive(2)) == -1
+
+    def test_any_and_none_of(self):
+        assert pyaoi.any_of([-1, -2, 3], _Positive(2))
+        assert pyaoi.none_of([-1, -2, 3], _Positive(2))
+
+    def test_copy_functions(self):
+        values = [1, -2, 3, -4, 5]
+        assert list(pyaoi.copy_except_if(values, _Positive(2))) == [-2, -4]
+        assert list(pyaoi.copy_except_if_not(values, _Positive(2))) == [1, 3, 5]
+        assert list(pyaoi.copy_replace_if(values, _Positive(2), 0)) == [0, -2, 0, -4, 0]
+        assert list(pyaoi.copy_replace_if_not(values, _Positive(2), 0)) == [
+            1,
+            0,
+            3,
+            0,
+            5,
+        ]
+
+    def test_binary_predicates(self):
+        equal = pyaoi.batch_predicate(lambda pairs: [a == b for a, b in pairs], 2)
+        assert pyaoi.mismatch([1, 2, 3, 4], [1, 2, 3, 5], equal) == (4, 5)
+        assert pyaoi.mismatch([1, 2], [1, 2, 3], equal) is None
+        assert pyaoi.find_first_of([1, 2, 3, 4], [4, 3], equal) == 2
+
+    def test_single_calls(self):
+        assert _Positive(2)(1)
+        assert pyaoi.batch_predicate(lambda pairs: [a < b for a, b in pairs])(1, 2)
+
+
+class TestLexicographicalCompare:
+    def test_less(self):
+        assert pyaoi.lexicographical_compare([1, 2, 3], [1, 2, 4])
+
+    def test_greater(self):
+        assert not pyaoi.lexicographical_compare([1, 3], [1, 2, 4])
+
+    def test_equal(self):
+        assert not pyaoi.lexicographical_compare([1, 2], [1, 2])
+
+    def test_prefix(self):
+        assert pyaoi.lexicographical_compare([1, 2], [1, 2, 3])
+        assert not pyaoi.lexicographical_compare([1, 2, 3], [1, 2])
+
+    def test_empty(self):
+        assert pyaoi.lexicographical_compare([], [1])
+        assert not pyaoi.lexicographical_compare([], [])
+
+    def test_iterators(self):
+        assert pyaoi.lexicographical_compare(iter([1, 2]), (x for x in [1, 3]))
+
+    def test_custom_binary_predicate(self):
+        assert pyaoi.lexicographical_compare(
+            ["A", "b"], ["a", "C"], lambda x, y: x.lower() < y.lower()
+        )
+
+    def test_stops_at_first_difference(self):
+        def elements():
+            yield 1
+            yield 2
+            raise AssertionError("Compared past the first difference")
+
+        assert pyaoi.lexicographical_compare(elements(), iter([1, 3, 0]))
+
+
+class TestLexicographicalCompareThreeway:
+    def test_native_types(self):
+        assert pyaoi.lexicographical_compare_threeway(b"abc", b"abd") == -1
+        assert pyaoi.lexicographical_compare_threeway("abd", "abc") == 1
+        assert pyaoi.lexicographical_compare_threeway((1, 2), (1, 2)) == 0
+
+    def test_mixed_types(self):
+        assert pyaoi.lexicographical_compare_threeway((1, 2), [1, 2]) == 0
+        assert pyaoi.lexicographical_compare_threeway(b"ab", [97, 98, 99]) == -1
+
+    def test_custom_binary_predicate(self):
+        assert (
+            pyaoi.lexicographical_compare_threeway([3, 1], [3, 2], lambda x, y: x > y)
+            == 1
+        )
+
+    def test_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        assert (
+            pyaoi.lexicographical_compare_threeway(
+                numpy.array([1, 2, 3]), numpy.array([1, 2, 4])
+            )
+            == -1
+        )
+        assert (
+            pyaoi.lexicographical_compare_threeway(
+                numpy.array([1, 2, 3]), numpy.array([1, 2])
+            )
+            == 1
+        )
+        assert (
+            pyaoi.lexicographical_compare_threeway(numpy.array([]), numpy.array([]))
+            == 0
+        )
+
+    def test_nan_in_tuples_and_lists(self):
+        nan = float("nan")
+
+        for container in (tuple, list):
+            assert (
+                pyaoi.lexicographical_compare_threeway(
+                    container((nan, 1)), container((nan, 2))
+                )
+                == -1
+            )
+            assert (
+                pyaoi.lexicographical_compare_threeway(
+                    container((nan, 1)), container((nan, 1))
+                )
+                == 0
+            )
+
+        assert pyaoi.lexicographical_compare_threeway(
+            (nan, 1), iter([nan, 2])
+        ) == pyaoi.lexicographical_compare_threeway((nan, 1), (nan, 2))
+
+    def test_numpy_nan(self):
+        numpy = pytest.importorskip("numpy")
+        values1 = [1.0, float("nan"), 3.0]
+        values2 = [1.0, 2.0, 3.0]
+
+        for first, second in ((values1, values2), (values2, values1)):
+            assert pyaoi.lexicographical_compare_threeway(
+                numpy.array(first), numpy.array(second)
+            ) == pyaoi.lexicographical_compare_threeway(first, second)
+
+        assert (
+            pyaoi.lexicographical_compare_threeway(
+                numpy.array(values1), numpy.array([1.0, 2.0, 4.0])
+            )
+            == -1
+        )
+
+
+class TestSearchRegressions:
+    def test_partial_match_before_match(self):
+        assert pyaoi.search([1, 2, 1, 2, 3], [1, 2, 3]) == 2
+
+    def test_sub_longer_than_super(self):
+        assert pyaoi.search([1, 2], [1, 2, 3]) == -1
+
+
+class TestAdjacentFindRegressions:
+    def test_odd_index(self):
+        assert pyaoi.adjacent_find([1, 2, 2, 3]) == 1
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with pyaoi.SharedPool(max_workers=2, min_chunk_size=4) as pool:
+        yield pool
+
+
+class TestSharedPool:
+    def test_numeric(self, pool):
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3]
+        shared = pool.share(array.array("i", values))
+        assert pool.count(shared, 5) == 3
+        assert pool.count(shared, 5) == pyaoi.count(values, 5)
+        assert pool.count_if(shared, functools.partial(operator.lt, 4)) == 9
+        assert pool.find_if(shared, functools.partial(operator.lt, 8)) == 5
+        assert pool.minmax(shared) == (1, 9)
+        pool.release(shared)
+
+    def test_search_across_chunk_boundaries(self, pool):
+        values = list(range(32))
+
+        for start in range(30):
+            needle = values[start : start + 3]
+            assert pool.search(values, needle) == pyaoi.search(values, needle)
+
+        assert pool.search(values, [5, 7]) == -1
+
+    def test_bytes(self, pool):
+        data = b"abcdefghij" * 4 + b"needle" + b"xyz"
+        shared = pool.share(data)
+        assert pool.search(shared, b"needle") == 40
+        assert pool.count(shared, ord("a")) == 4
+        assert pool.adjacent_find(shared) == 41
+        pool.release(shared)
+
+    def test_adjacent_find_across_chunk_boundaries(self, pool):
+        for index in range(15):
+            values = list(range(16))
+            values[index + 1] = values[index]
+            assert pool.adjacent_find(values) == index == pyaoi.adjacent_find(values)
+
+    def test_records(self, pool):
+        records = [(i, i * 0.5) for i in range(20)]
+        shared = pool.share(records, "<id")
+        assert pool.count(shared, (4, 2.0)) == 1
+        assert pool.minmax(shared) == ((0, 0.0), (19, 9.5))
+        pool.release(shared)
+
+    def test_numpy(self, pool):
+        numpy = pytest.importorskip("numpy")
+        shared = pool.share(numpy.arange(100, dtype=numpy.float64))
+        assert pool.count_if(shared, functools.partial(operator.le, 50.0)) == 50
+        pool.release(shared)
+
+    def test_empty(self, pool):
+        assert pool.count([], 1) == 0
+        assert pool.find_if([], bool) == -1
+        assert pool.minmax([]) is None
+
+    def test_unsupported(self, pool):
+        with pytest.raises(TypeError):
+            pool.share(["a", "b"])
+
+    def test_shutdown_removes_segments(self):
+        pool = pyaoi.SharedPool(max_workers=1)
+        shared = pool.share(b"data")
+        pool.shutdown()
+
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.name)
+
+
+class TestSlidingCount:
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            pyaoi.window.SlidingWindow(3)
+
+    def test_matches_count_if(self):
+        values = [5, -1, 3, -2, -4, 6, 7, -8, 9]
+        window = pyaoi.window.SlidingCount(lambda x: x > 0, 3)
+
+        for end, value in enumerate(values, 1):
+            assert window.push(value) == pyaoi.count_if(
+                values[max(0, end - 3) : end], lambda x: x > 0
+            )
+
+    def test_by_time(self):
+        window = pyaoi.window.SlidingCount(lambda x: x > 0, duration=10)
+        assert window.push(1, 0) == 1
+        assert window.push(1, 5) == 2
+        assert window.push(-1, 10) == 1
+        assert window.advance(100) == 0
+        assert len(window) == 0
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            pyaoi.window.SlidingCount(bool)
+
+        with pytest.raises(ValueError):
+            pyaoi.window.SlidingCount(bool, 3, duration=1)
+
+
+class TestSlidingAllAny:
+    def test_all(self):
+        window = pyaoi.window.SlidingAll(lambda x: x > 0, 2)
+        assert not window.value
+        assert [window.push(x) for x in [1, -1, 2, 3]] == [True, False, False, True]
+
+    def test_any(self):
+        window = pyaoi.window.SlidingAny(lambda x: x > 0, 2)
+        assert [window.push(x) for x in [-1, 1, -2, -3]] == [False, True, True, False]
+
+
+class TestSlidingMinMax:
+    def test_matches_min_max(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9]
+        window = pyaoi.window.SlidingMinMax(4)
+
+        for end, value in enumerate(values, 1):
+            current = values[max(0, end - 4) : end]
+            assert window.push(value) == (min(current), max(current))
+
+    def test_empty(self):
+        assert pyaoi.window.SlidingMinMax(3).value is None
+
+    def test_by_time(self):
+        window = pyaoi.window.SlidingMinMax(duration=2)
+        assert window.push(5, 0.0) == (5, 5)
+        assert window.push(1, 1.0) == (1, 5)
+        assert window.push(3, 2.5) == (1, 3)
+        assert window.min == 1 and window.max == 3
+
+
+class TestSliding:
+    def test_minmax(self):
+        assert list(
+            pyaoi.window.sliding([3, 1, 4, 1, 5], 3, pyaoi.window.SlidingMinMax)
+        ) == [
+            (1, 4),
+            (1, 4),
+            (1, 5),
+        ]
+
+    def test_count(self):
+        agg = functools.partial(pyaoi.window.SlidingCount, lambda x: x % 2)
+        assert list(pyaoi.window.sliding([1, 3, 4, 6, 7], 2, agg)) == [2, 1, 0, 1]
+
+    def test_shorter_than_window(self):
+        assert list(pyaoi.window.sliding([1], 2, pyaoi.window.SlidingMinMax)) == []
+
+    def test_by_time(self):
+        agg = functools.partial(pyaoi.window.SlidingAny, lambda x: x == "error")
+        events = [(0, "ok"), (1, "error"), (5, "ok"), (12, "ok")]
+        assert list(pyaoi.window.sliding_by_time(events, 10, agg)) == [
+            False,
+            True,
+            True,
+            False,
+        ]
+
+
+class TestCountMinSketch:
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            pyaoi.sketch.Sketch()
+
+    def test_estimates(self):
+        values = [i % 50 for i in range(5000)] + ["hot"] * 1000
+        sketch = pyaoi.sketch.CountMinSketch(0.01, 0.01).update(values)
+
+        for value in (0, 17, 49, "hot"):
+            exact = pyaoi.count(values, value)
+            assert exact <= sketch.estimate(value) <= exact + 0.01 * len(values)
+
+    def test_merge_and_serialize(self):
+        first = pyaoi.sketch.CountMinSketch(0.01).update("abracadabra")
+        second = pyaoi.sketch.CountMinSketch(0.01).update("banana")
+        restored = pyaoi.sketch.CountMinSketch.from_bytes(
+            first.merge(second).to_bytes()
+        )
+        assert restored["a"] >= 8 and restored.total == 17
+
+    def test_incompatible_merge(self):
+        with pytest.raises(ValueError):
+            pyaoi.sketch.CountMinSketch(0.01).merge(pyaoi.sketch.CountMinSketch(0.1))
+
+
+class TestCountSketch:
+    def test_estimates(self):
+        values = [i % 100 for i in range(10000)] + ["hot"] * 2000
+        sketch = pyaoi.sketch.CountSketch(0.05).update(values)
+        assert abs(sketch.estimate("hot") - 2000) < 200
+        assert abs(sketch.estimate(3) - 100) < 200
+
+    def test_serialize(self):
+        sketch = pyaoi.sketch.CountSketch(0.1).update([1, 1, 2])
+        restored = pyaoi.sketch.CountSketch.from_bytes(sketch.to_bytes())
+        assert restored.estimate(1) == sketch.estimate(1)
+
+        with pytest.raises(ValueError):
+            pyaoi.sketch.CountMinSketch.from_bytes(sketch.to_bytes())
+
+
+class TestHyperLogLog:
+    def test_estimate(self):
+        sketch = pyaoi.sketch.HyperLogLog(0.02).update(range(20000))
+        assert abs(sketch.estimate() - 20000) < 20000 * 0.08
+
+    def test_small_cardinality(self):
+        assert pyaoi.sketch.HyperLogLog().update(["a", "b", "a"]).estimate() == 2
+
+    def test_merge_and_serialize(self):
+        first = pyaoi.sketch.HyperLogLog().update(range(0, 3000))
+        second = pyaoi.sketch.HyperLogLog().update(range(2000, 5000))
+        merged = pyaoi.sketch.HyperLogLog.from_bytes(first.merge(second).to_bytes())
+        assert abs(merged.estimate() - 5000) < 5000 * 0.05
+
+
+class TestSpaceSaving:
+    def test_heavy_hitters(self):
+        values = ["a"] * 500 + ["b"] * 300 + [str(i) for i in range(1000)] + ["a"] * 100
+        summary = pyaoi.sketch.SpaceSaving(20).update(values)
+        top = summary.top(2)
+        assert [item for item, _, _ in top] == ["a", "b"]
+
+        for item, count, error in top:
+            assert count - error <= pyaoi.count(values, item) <= count
+
+    def test_merge_and_serialize(self):
+        first = pyaoi.sketch.SpaceSaving(5).update("aaaabbbcd")
+        second = pyaoi.sketch.SpaceSaving(5).update("bbbbbbaaef")
+        merged = pyaoi.sketch.SpaceSaving.from_bytes(first.merge(second).to_bytes())
+        assert merged.top(1)[0][:2] == ("b", 9)
+        assert merged.total == 19
+
+    def test_serialize_item_types(self):
+        items = ["ä\udc80", b"\x00b", 2**70, -1, 1.5, True, False, None]
+        summary = pyaoi.sketch.SpaceSaving(10).update(items)
+        restored = pyaoi.sketch.SpaceSaving.from_bytes(summary.to_bytes())
+        assert restored.top() == summary.top()
+        assert [type(item) for item, _, _ in restored.top()] == [
+            type(item) for item in items
+        ]
+
+    def test_serialize_rejects_other_items(self):
+        with pytest.raises(TypeError):
+            pyaoi.sketch.SpaceSaving(10).update([(1, 2)]).to_bytes()
+
+        data = pyaoi.sketch.SpaceSaving(10).update("ab").to_bytes()
+
+        with pytest.raises(ValueError):
+            pyaoi.sketch.SpaceSaving.from_bytes(data[:-1])
+
+        with pytest.raises(ValueError):
+            pyaoi.sketch.SpaceSaving.from_bytes(data + b"x")
+
+
+class TestTDigest:
+    def test_quantiles(self):
+        values = [(i * 7919) % 10007 for i in range(10007)]
+        digest = pyaoi.sketch.TDigest(100).update(values)
+        assert digest.quantile(0) == 0 and digest.quantile(1) == 10006
+        assert abs(digest.quantile(0.5) - 5003) < 150
+        assert abs(digest.quantile(0.99) - 9906) < 30
+
+    def test_empty(self):
+        assert pyaoi.sketch.TDigest().quantile(0.5) is None
+
+    def test_merge_and_serialize(self):
+        first = pyaoi.sketch.TDigest().update(range(0, 5000))
+        second = pyaoi.sketch.TDigest().update(range(5000, 10000))
+        merged = pyaoi.sketch.TDigest.from_bytes(first.merge(second).to_bytes())
+        assert merged.total == 10000
+        assert abs(merged.quantile(0.25) - 2500) < 100
+
+
+class TestAdaptivePredicates:
+    @staticmethod
+    def counted(function, calls):
+        def predicate(item):
+            calls[predicate] += 1
+            return function(item)
+
+        return predicate
+
+    def test_all_matches_static_conjunction(self):
+        first, second = (lambda x: x % 2 == 0), (lambda x: x % 3 == 0)
+        combined = pyaoi.pred.all_(first, second, sample_size=10)
+        assert [combined(x) for x in range(500)] == [x % 6 == 0 for x in range(500)]
+
+    def test_any_matches_static_disjunction(self):
+        first, second = (lambda x: x % 2 == 0), (lambda x: x % 3 == 0)
+        combined = pyaoi.pred.any_(first, second, sample_size=10)
+        assert pyaoi.count_if(range(600), combined) == 400
+
+    def test_selective_predicate_moves_first(self):
+        calls = collections.Counter()
+        common = self.counted(lambda x: x % 100 != 0, calls)
+        rare = self.counted(lambda x: x % 100 == 0, calls)
+        combined = pyaoi.pred.all_(common, rare, sample_size=100, stable_after=2)
+        assert pyaoi.count_if(range(10000), combined) == 0
+        assert combined.adaptation.order == (rare, common)
+        assert combined.adaptation.stable
+
+        # Once stable, the rare predicate alone decides almost every call
+        calls.clear()
+        assert pyaoi.count_if(range(10000), combined) == 0
+        assert calls[common] == 100
+
+    def test_report_and_reset(self):
+        combined = pyaoi.pred.any_(bool, sample_size=4, stable_after=1)
+        pyaoi.count_if([0, 1, 2, 3], combined)
+        assert combined.adaptation.stable
+        ((predicate, seconds, pass_rate),) = combined.report()
+        assert predicate is bool and seconds >= 0 and pass_rate == 0.75
+
+        combined.adaptation.reset()
+        assert not combined.adaptation.stable
+        assert combined(1) and not combined(0)
+
+    def test_empty(self):
+        assert pyaoi.pred.all_()(None)
+        assert not pyaoi.pred.any_()(None)
+
+    def test_results_are_bools_before_and_after_freezing(self):
+        combined = pyaoi.pred.all_(lambda x: x % 3, lambda x: x, sample_size=10)
+        counts = [pyaoi.count_if(range(300), combined) for _ in range(5)]
+        assert combined.adaptation.stable
+        assert counts == [200] * 5
+        assert combined(4) is True and combined(3) is False
+
+    def test_many_predicates(self):
+        for combine, expected in ((pyaoi.pred.all_, all), (pyaoi.pred.any_, any)):
+            predicates = [functools.partial(operator.lt, k) for k in range(6)]
+            combined = combine(*predicates, sample_size=5, stable_after=1)
+
+            for _ in range(3):
+                assert [combined(x) for x in range(10)] == [
+                    expected(predicate(x) for predicate in predicates)
+                    for x in range(10)
+                ]
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYAOI_CALIBRATION", str(tmp_path / "calibration.json"))
+    pyaoi.dispatch.load_profile()
+    yield tmp_path / "calibration.json"
+    monkeypatch.undo()
+    pyaoi.dispatch.load_profile()
+
+
+class TestDispatch:
+    def test_keyword_arguments(self, profile):
+        for _ in range(2):
+            assert pyaoi.count(sequence=[1, 2, 1], target=1) == 2
+            assert pyaoi.count(b"abca", target=97) == 2
+            assert pyaoi.find(sequence=[1, 2], target_element=2) == 1
+            assert pyaoi.search(sequence_super=b"abcd", sequence_sub=b"cd") == 2
+            assert pyaoi.adjacent_find(sequence=[1, 2, 2]) == 1
+
+        explanation = pyaoi.explain(
+            pyaoi.search, sequence_super=b"ab", sequence_sub=b"b"
+        )
+        assert explanation.size == 2
+
+    def test_explain_native_search(self, profile):
+        explanation = pyaoi.explain(pyaoi.search, b"abcdef", b"cd")
+        assert explanation.backend == "native"
+        assert explanation.profile == "defaults"
+        assert {name for name, _ in explanation.candidates} == {"native", "python"}
+        assert "native backend" in str(explanation)
+        assert pyaoi.search(b"abcdef", b"cd") == 2
+        assert pyaoi.search("abc", "") == -1
+
+    def test_explain_custom_predicate(self, profile):
+        explanation = pyaoi.explain(pyaoi.search, b"abc", b"c", operator.ne)
+        assert explanation.backend == "python"
+
+    def test_explain_not_dispatched(self):
+        with pytest.raises(TypeError):
+            pyaoi.explain(pyaoi.count_if, [1], bool)
+
+    def test_profile_changes_choice(self, profile):
+        costs = {"search/native": (1.0, 0.0), "search/python": (0.0, 1e-6)}
+        assert pyaoi.dispatch.save_profile(costs) == str(profile)
+        assert pyaoi.explain(pyaoi.search, b"a" * 1000, b"b").backend == "python"
+        assert pyaoi.explain(pyaoi.search, b"a" * 10**7, b"b").backend == "native"
+        assert pyaoi.search(b"a" * 1000, b"b") == -1
+
+    def test_numpy_backends(self, profile):
+        numpy = pytest.importorskip("numpy")
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 6, 5]
+        array_values = numpy.array(values)
+        assert pyaoi.explain(pyaoi.count, array_values, 1).backend == "numpy"
+        assert pyaoi.count(array_values, 1) == pyaoi.count(values, 1) == 2
+        assert pyaoi.find(array_values, 5) == pyaoi.find(values, 5) == 4
+        assert pyaoi.find(array_values, 7) == -1
+        assert pyaoi.search(array_values, [9, 2]) == pyaoi.search(values, [9, 2]) == 5
+        assert pyaoi.search(array_values, numpy.array([5, 8])) == -1
+        assert pyaoi.adjacent_find(array_values) == pyaoi.adjacent_find(values) == 7
+
+    @pytest.fixture
+    def parallel(self, profile, monkeypatch):
+        monkeypatch.setattr(pyaoi.dispatch, "_PARALLEL", True)
+        pyaoi.dispatch.load_profile()
+
+    def test_native_count_without_pool(self, parallel):
+        data = b"ab" * 10**6
+        explanation = pyaoi.explain(pyaoi.count, data, ord("a"))
+        assert "shared" not in {name for name, _ in explanation.candidates}
+        assert explanation.backend == "native"
+        assert pyaoi.count(data, b"ab") == 10**6
+        assert pyaoi.count(data, ord("a")) == 10**6
+        assert pyaoi.find(data, ord("b")) == 1
+
+    def test_shared_array(self, parallel):
+        with pyaoi.SharedPool(max_workers=2, min_chunk_size=4) as pool:
+            shared = pool.share(b"abcabbc" * 10)
+            assert "shared" in {
+                name for name, _ in pyaoi.explain(pyaoi.count, shared, 98).candidates
+            }
+            assert pyaoi.dispatch._shared_count(shared, ord("b")) == 30
+            assert pyaoi.dispatch._shared_search(shared, b"bb") == 4
+            assert pyaoi.dispatch._shared_adjacent_find(shared) == 4
+            assert pyaoi.count(shared, ord("b")) == 30
+            assert pyaoi.count(shared, 98.0) == 30
+            assert pyaoi.find(shared, ord("c")) == 2
+            assert pyaoi.search(shared, b"bb") == 4
+
+    def test_shared_array_without_pool(self, parallel):
+        pool = pyaoi.SharedPool()
+        shared = pool.share(b"abba")
+        owner = pyaoi.shared.owner
+        pyaoi.shared.owner = lambda shared: None
+
+        try:
+            assert pyaoi.dispatch._shared_count(shared, ord("b")) == 2
+            assert pyaoi.dispatch._shared_adjacent_find(shared) == 1
+        finally:
+            pyaoi.shared.owner = owner
+            pool.shutdown()
+
+    def test_fit(self):
+        fixed, per_item = pyaoi.calibrate.fit(
+            sum, lambda size: [1] * size, 1 << 12, 0.01
+        )
+        assert fixed >= 0 and per_item > 0
+
+
+class TestMismatchIndex:
+    def test_index(self):
+        assert pyaoi.mismatch([1, 2, 3, 4, 5], [1, 2, 3, 4, 6], return_index=True) == 4
+
+    def test_no_mismatch(self):
+        assert pyaoi.mismatch([1, 2], [1, 2, 3], return_index=True) == -1
+        assert pyaoi.mismatch([], [1], return_index=True) == -1
+
+
+class TestMismatchAll:
+    def test_all(self):
+        result = list(pyaoi.mismatch_all([1, 2, 3, 4], [1, 5, 3, 6, 7]))
+        assert result == [(1, 2, 5), (3, 4, 6)]
+
+    def test_predicate(self):
+        result = list(
+            pyaoi.mismatch_all("aBc", "ABD", lambda x, y: x.lower() == y.lower())
+        )
+        assert result == [(2, "c", "D")]
+
+    def test_batch_predicate(self):
+        equal = pyaoi.batch_predicate(
+            lambda pairs: [x == y for x, y in pairs], batch_size=2
+        )
+        assert list(pyaoi.mismatch_all([1, 2, 3], [1, 0, 3], equal)) == [(1, 2, 0)]
+
+
+class TestDiff:
+    @staticmethod
+    def apply(sequence1, sequence2, opcodes):
+        result = []
+        i = j = 0
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            assert (i1, j1) == (i, j)
+            i, j = i2, j2
+
+            if tag == "equal":
+                assert list(sequence1[i1:i2]) == list(sequence2[j1:j2])
+                result += sequence1[i1:i2]
+            elif tag == "insert":
+                assert i1 == i2
+                result += sequence2[j1:j2]
+            else:
+                assert tag == "delete" and j1 == j2
+
+        assert (i, j) == (len(sequence1), len(sequence2))
+
+        return result
+
+    @staticmethod
+    def edits(opcodes):
+        return sum(
+            max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in opcodes if tag != "equal"
+        )
+
+    def test_example(self):
+        assert list(pyaoi.diff("abcd", "acde")) == [
+            ("equal", 0, 1, 0, 1),
+            ("delete", 1, 2, 1, 1),
+            ("equal", 2, 4, 1, 3),
+            ("insert", 4, 4, 3, 4),
+        ]
+
+    def test_empty(self):
+        assert list(pyaoi.diff([], [])) == []
+        assert list(pyaoi.diff([], [1, 2])) == [("insert", 0, 0, 0, 2)]
+        assert list(pyaoi.diff([1, 2], [])) == [("delete", 0, 2, 0, 0)]
+
+    def test_equal(self):
+        assert list(pyaoi.diff((1, 2, 3), (1, 2, 3))) == [("equal", 0, 3, 0, 3)]
+
+    def test_shortest_edit_script(self):
+        # Myers' algorithm finds the minimal number of edits, LCS("ABCABBA", "CBABAC") == 4
+        sequence1, sequence2 = list("ABCABBA"), list("CBABAC")
+        opcodes = list(pyaoi.diff(sequence1, sequence2, lambda x, y: x == y))
+        assert self.apply(sequence1, sequence2, opcodes) == sequence2
+        assert self.edits(opcodes) == 7 + 6 - 2 * 4
+
+    def test_unhashable(self):
+        sequence1 = [[1], [2], [3], [4]]
+        sequence2 = [[1], [3], [4], [5]]
+        opcodes = list(pyaoi.diff(sequence1, sequence2))
+        assert self.apply(sequence1, sequence2, opcodes) == sequence2
+        assert self.edits(opcodes) == 2
+
+    def test_mostly_equal(self):
+        sequence1 = [str(i) for i in range(10000)]
+        sequence2 = (
+            sequence1[:100] + ["x"] + sequence1[101:5000] + sequence1[5001:] + ["y"]
+        )
+        opcodes = list(pyaoi.diff(sequence1, sequence2))
+        assert self.apply(sequence1, sequence2, opcodes) == sequence2
+        assert [tag for tag, *_ in opcodes] == [
+            "equal",
+            "delete",
+            "insert",
+            "equal",
+            "delete",
+            "equal",
+            "insert",
+        ]
+
+    def test_many_differences(self):
+        sequence1 = [str(i) for i in range(3000)]
+        sequence2 = [line for line in sequence1 if int(line) % 3] + sequence1[:50]
+        opcodes = list(pyaoi.diff(iter(sequence1), iter(sequence2)))
+        assert self.apply(sequence1, sequence2, opcodes) == sequence2
+
+    def test_disjoint(self, monkeypatch):
+        # Without common items left after the prefix and suffix, no edit path is searched
+        def middle(*args, **kwargs):
+            raise AssertionError("searched an edit path")
+
+        monkeypatch.setattr(pyaoi._diff, "_middle", middle)
+        sequence1 = ["a"] + list(range(5000)) + ["z"]
+        sequence2 = ["a"] + list(range(5000, 10000)) + ["z"]
+        assert list(pyaoi.diff(sequence1, sequence2)) == [
+            ("equal", 0, 1, 0, 1),
+            ("delete", 1, 5001, 1, 1),
+            ("insert", 5001, 5001, 1, 5001),
+            ("equal", 5001, 5002, 5001, 5002),
+        ]
+
+    def test_predicate(self):
+        opcodes = list(pyaoi.diff("abc", "ABd", lambda x, y: x.lower() == y.lower()))
+        assert opcodes == [
+            ("equal", 0, 2, 0, 2),
+            ("delete", 2, 3, 2, 2),
+            ("insert", 3, 3, 2, 3),
+        ]
+
+
+class TestCopyReplaceMany:
+    def test_iterable(self):
+        result = pyaoi.copy_replace_many(iter([1, 2, 3, 2]), {2: 20, 3: 30})
+        assert list(result) == [1, 20, 30, 20]
+
+    def test_default(self):
+        result = pyaoi.copy_replace_many([1, 2, 3], {2: 20}, default=0)
+        assert list(result) == [0, 20, 0]
+
+    def test_str(self):
+        assert pyaoi.copy_replace_many("hello", {"l": "L", "o": ""}) == "heLL"
+        assert pyaoi.copy_replace_many("hello", {"l": "L"}, default="-") == "--LL-"
+
+    def test_str_non_str_values(self):
+        assert list(pyaoi.copy_replace_many("ab", {"a": 1})) == [1, "b"]
+
+    def test_bytes(self):
+        assert pyaoi.copy_replace_many(b"hello", {ord("l"): ord("L")}) == b"heLLo"
+        assert pyaoi.copy_replace_many(bytearray(b"ab"), {97: 98}, 0) == bytearray(
+            b"b\0"
+        )
+        assert list(pyaoi.copy_replace_many(b"ab", {97: 300})) == [300, 98]
+
+    def test_numpy_dense(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([[1, 2], [3, 7]])
+        result = pyaoi.copy_replace_many(values, {2: 20, 3: 30})
+        assert result.tolist() == [[1, 20], [30, 7]]
+        result = pyaoi.copy_replace_many(values, {2: 20, 3: 30}, default=-1)
+        assert result.tolist() == [[-1, 20], [30, -1]]
+
+    def test_numpy_sparse(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([1, 10**12, 5])
+        result = pyaoi.copy_replace_many(values, {10**12: 0, 5: 0.5})
+        assert result.tolist() == [1, 0, 0.5]
+        names = numpy.array(["a", "b"])
+        assert pyaoi.copy_replace_many(names, {"a": "z"}).tolist() == ["z", "b"]
+
+
+class TestReplaceManyInplace:
+    def test_list(self):
+        values = [1, 2, 3]
+        pyaoi.replace_many_inplace(values, {1: 5, 3: 6})
+        assert values == [5, 2, 6]
+
+    def test_bytearray(self):
+        values = bytearray(b"abc")
+        pyaoi.replace_many_inplace(values, {97: 98})
+        assert values == bytearray(b"bbc")
+
+    def test_array(self):
+        values = array.array("i", [1, 2])
+        pyaoi.replace_many_inplace(values, {2: 7}, default=0)
+        assert values == array.array("i", [0, 7])
+
+    def test_deque(self):
+        values = collections.deque([1, 2])
+        pyaoi.replace_many_inplace(values, {1: 3})
+        assert values == collections.deque([3, 2])
+
+    def test_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([1, 2, 3])
+        pyaoi.replace_many_inplace(values, {2: 7})
+        assert values.tolist() == [1, 7, 3]
+
+
+class TestBuffers:
+    def test_mmap(self):
+        with mmap.mmap(-1, 6) as buffer:
+            buffer[:] = b"abcabc"
+            assert pyaoi.count(buffer, ord("a")) == 2
+            assert pyaoi.find(buffer, ord("c")) == 2
+            assert pyaoi.search(buffer, b"ca") == 2
+            assert pyaoi.count_if(buffer, lambda x: x > ord("a")) == 4
+
+    def test_ctypes(self):
+        values = (ctypes.c_int * 5)(1, 2, 3, 2, 1)
+        assert pyaoi.count(values, 2) == 2
+        assert pyaoi.find(values, 3) == 2
+        assert pyaoi.search(values, [3, 2]) == 2
+        assert pyaoi.find_if_not(values, lambda x: x < 3) == 2
+        assert list(pyaoi.copy_except_if(values, lambda x: x > 1)) == [1, 1]
+
+    def test_multidimensional_memoryview(self):
+        values = memoryview(bytes(range(6))).cast("B", (2, 3))
+        assert pyaoi.count_if_not(values, lambda x: x > 3) == 4
+        assert pyaoi.find_if(values, lambda x: x > 3) == 4
+
+    def test_without_numpy(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "numpy", None)
+        values = (ctypes.c_double * 3)(1.5, 2.5, 1.5)
+        assert pyaoi.count(values, 1.5) == 2
+        assert pyaoi.find(values, 2.5) == 1
+        assert pyaoi.search(values, [2.5, 1.5]) == 1
+
+
+class TestArrow:
+    @pytest.fixture
+    def pyarrow(self):
+        return pytest.importorskip("pyarrow")
+
+    def test_array(self, pyarrow):
+        values = pyarrow.array([1, 5, None, 7, 5])
+        assert pyaoi.count(values, 5) == 2
+        assert pyaoi.count(values, None) == 1
+        assert pyaoi.find(values, 7) == 3
+        assert pyaoi.search(values, [7, 5]) == 3
+        assert pyaoi.count_if(values, lambda x: x is not None and x > 4) == 3
+        assert pyaoi.find_if_not(values, lambda x: x is not None) == 2
+
+    def test_chunked_array(self, pyarrow):
+        values = pyarrow.chunked_array([[1, 2], [3, 2], [1]])
+        assert pyaoi.count(values, 2) == 2
+        assert pyaoi.search(values, [2, 3]) == 1
+        assert pyaoi.search(values, [2, 1]) == 3
+        assert pyaoi.copy_except_if(values, lambda x: x > 1).to_pylist() == [1, 1]
+
+    def test_filter_returns_arrow(self, pyarrow):
+        values = pyarrow.array([1, 2, 3])
+        result = pyaoi.copy_except_if_not(values, lambda x: x > 1)
+        assert isinstance(result, pyarrow.Array)
+        assert result.to_pylist() == [2, 3]
+
+    def test_search_across_chunks(self, pyarrow):
+        values = pyarrow.chunked_array([[1, 2], [None], [3, 2, 1], [4]])
+        same = lambda x, y: x == y  # noqa: E731
+        assert pyaoi.search(values, [2, None, 3], same) == 1
+        assert pyaoi.search(values, [2, None, 3]) == 1
+        assert pyaoi.search(values, [1, 4], same) == 5
+        assert pyaoi.search(values, [None, 3, 2, 1, 4], same) == 2
+        assert pyaoi.search(values, [1, 2, None, 3, 2, 1, 4], same) == 0
+        assert pyaoi.search(values, [2, 1, 5], same) == -1
+
+    def test_filter_mask(self, pyarrow):
+        import pyaoi.arrow
+
+        values = pyarrow.chunked_array([[1, 2], [3]])
+        result = pyaoi.arrow.filter_mask(values, lambda x: x > 1)
+        assert result.to_pylist() == [2, 3]
+        result = pyaoi.arrow.filter_mask(values, lambda x: x > 1, False)
+        assert result.to_pylist() == [1]
+
+    def test_batch_predicate(self, pyarrow):
+        import pyarrow.compute
+
+        is_large = pyaoi.batch_predicate(
+            lambda chunk: pyarrow.compute.greater(chunk, 1)
+        )
+        values = pyarrow.chunked_array([[1, 2], [3]])
+        assert pyaoi.count_if(values, is_large) == 2
+        assert pyaoi.find_if(values, is_large) == 1
+
+    def test_table(self, pyarrow):
+        field = pyaoi.columns.field
+        table = pyarrow.table({"price": [50.0, 150.0, None], "symbol": ["a", "b", "c"]})
+        assert pyaoi.count_if(table, field("price") > 100) == 1
+        assert pyaoi.find_if(table, field("symbol").isin({"c"})) == 2
+        rows = pyaoi.copy_except_if(
+            table, (field("price") > 100) | (field("symbol") == "c")
+        )
+        assert rows.column("symbol").to_pylist() == ["a"]
+
+
+class TestRunLengthEncode:
+    def test_empty(self):
+        assert list(pyaoi.run_length_encode([])) == []
+
+    def test_runs(self):
+        assert list(pyaoi.run_length_encode("aaabcc")) == [("a", 3), ("b", 1), ("c", 2)]
+
+    def test_iterator(self):
+        assert list(pyaoi.run_length_encode(iter([1, 1, 2]))) == [(1, 2), (2, 1)]
+
+    def test_key(self):
+        assert list(pyaoi.run_length_encode(["a", "A", "b"], key=str.lower)) == [
+            ("a", 2),
+            ("b", 1),
+        ]
+
+    def test_long_run(self):
+        assert list(pyaoi.run_length_encode([0] * 10000)) == [(0, 10000)]
+
+    def test_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([3, 3, 1, 1, 1, 3])
+        assert list(pyaoi.run_length_encode(values)) == [(3, 2), (1, 3), (3, 1)]
+
+    def test_decode(self):
+        runs = [("a", 2), ("b", 0), ("c", 1)]
+        assert list(pyaoi.run_length_decode(runs)) == ["a", "a", "c"]
+
+
+class TestGroupConsecutive:
+    def test_empty(self):
+        assert list(pyaoi.group_consecutive([])) == []
+
+    def test_list_views(self):
+        groups = list(pyaoi.group_consecutive([1, 1, 2, 1]))
+        assert all(isinstance(group, pyaoi.SequenceView) for group in groups)
+        assert groups == [[1, 1], [2], [1]]
+        assert groups[0][1:] == [1]
+
+    def test_key(self):
+        groups = pyaoi.group_consecutive([1, 3, 2, 4, 5], key=lambda x: x % 2)
+        assert [list(group) for group in groups] == [[1, 3], [2, 4], [5]]
+
+    def test_str(self):
+        assert list(pyaoi.group_consecutive("aab")) == ["aa", "b"]
+
+    def test_bytes(self):
+        groups = list(pyaoi.group_consecutive(b"aab"))
+        assert isinstance(groups[0], memoryview)
+        assert [bytes(group) for group in groups] == [b"aa", b"b"]
+
+    def test_iterator(self):
+        assert list(pyaoi.group_consecutive(iter("aab"))) == [["a", "a"], ["b"]]
+
+    def test_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        values = numpy.array([1, 1, 2])
+        groups = list(pyaoi.group_consecutive(values))
+        assert groups[0].base is values
+        assert [group.tolist() for group in groups] == [[1, 1], [2]]
+
+
+class TestRunLength:
+    values = [0, 0, 0, 1, 1, 0, 2, 2, 2, 2]
+
+    def test_sequence(self):
+        encoded = pyaoi.RunLength.encode(self.values)
+        assert len(encoded) == len(self.values)
+        assert list(encoded) == self.values
+        assert encoded[-1] == 2 and encoded[3] == 1
+        assert list(encoded.runs()) == [(0, 3), (1, 2), (0, 1), (2, 4)]
+
+    def test_slice(self):
+        encoded = pyaoi.RunLength.encode(self.values)
+        assert encoded[2:7] == self.values[2:7]
+        assert encoded[::-3] == self.values[::-3]
+
+    def test_merges_runs(self):
+        assert pyaoi.RunLength([(1, 1), (1, 2)]) == pyaoi.RunLength([(1, 3)])
+
+    def test_count(self):
+        encoded = pyaoi.RunLength.encode(self.values)
+        assert pyaoi.count(encoded, 0) == 4
+        assert pyaoi.count(encoded, 5) == 0
+
+    def test_find(self):
+        encoded = pyaoi.RunLength.encode(self.values)
+        assert pyaoi.find(encoded, 2) == 6
+        assert pyaoi.find(encoded, 5) == -1
+        assert encoded.index(0, 4) == 5
+
+    def test_search_n(self):
+        encoded = pyaoi.RunLength.encode(self.values)
+        assert pyaoi.search_n(encoded, 2, 3) == 6
+        assert pyaoi.search_n(encoded, 0, 4) == -1
+        assert pyaoi.search_n(encoded, 1, 4, operator.le) == 0
+
+    def test_same_results_as_lists(self):
+        for length in range(6):
+            for values in itertools.product(range(3), repeat=length):
+                values = list(values)
+                encoded = pyaoi.RunLength.encode(values)
+
+                for value in range(3):
+                    assert pyaoi.count(encoded, value) == pyaoi.count(values, value)
+                    assert pyaoi.find(encoded, value) == pyaoi.find(values, value)
+
+                    for num_elements in range(length + 2):
+                        assert pyaoi.search_n(
+                            encoded, value, num_elements
+                        ) == pyaoi.search_n(values, value, num_elements), (
+                            values,
+                            value,
+                            num_elements,
+                        )
+
+
+class TestResultCache:
+    def test_hits_and_misses(self):
+        calls = []
+
+        def count_calls(data, target):
+            calls.append(target)
+            return pyaoi.count(data, target)
+
+        results = pyaoi.cache.ResultCache()
+        counted = results.wrap(count_calls)
+        data = (1, 2, 1)
+        assert counted(data, 1) == 2
+        assert counted(data, 1) == 2
+        assert counted(data, target=2) == 1
+        assert calls == [1, 2]
+        stats = results.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+
+    def test_content_fingerprint(self):
+        search = pyaoi.cache.cached(pyaoi.search)
+        haystack = b"ab" * 1000
+        assert search(haystack, b"ba") == 1
+        assert search(bytes(bytearray(haystack)), b"ba") == 1
+        assert search.cache.stats().hits == 1
+
+    def test_mutable_results_are_not_shared(self):
+        rotate_copy = pyaoi.cache.cached(pyaoi.rotate_copy)
+        rotated = rotate_copy((1, 2, 3), 1)
+        rotated.append(4)
+        assert rotate_copy((1, 2, 3), 1) == collections.deque([3, 1, 2])
+        assert rotate_copy.cache.stats().hits == 1
+
+    def test_ndarray_results_are_read_only(self):
+        numpy = pytest.importorskip("numpy")
+        results = pyaoi.cache.ResultCache()
+        first = results.call(numpy.arange, 3)
+        second = results.call(numpy.arange, 3)
+        assert second is first and not second.flags.writeable
+
+        with pytest.raises(ValueError):
+            second[0] = 5
+
+    def test_rejects_mutable(self):
+        results = pyaoi.cache.ResultCache()
+
+        for data in ([1, 2], bytearray(b"ab"), array.array("i", [1]), ([1], 2)):
+            with pytest.raises(TypeError):
+                results.call(pyaoi.count, data, 1)
+
+    def test_tuples_by_value(self):
+        results = pyaoi.cache.ResultCache()
+        assert results.call(pyaoi.count, (1, 2, 1), 1) == 2
+        assert results.call(pyaoi.count, tuple([1, 2, 1]), 1) == 2
+        assert results.call(pyaoi.count, (1, 2, 2), 1) == 1
+        assert results.stats().hits == 1
+
+    def test_read_only_memoryview(self, tmp_path):
+        path = tmp_path / "data"
+        path.write_bytes(b"ab" * 1000)
+        results = pyaoi.cache.ResultCache()
+
+        with open(str(path), "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            with memoryview(mapped) as view:
+                assert results.call(pyaoi.count, view, ord("a")) == 1000
+
+        assert results.call(pyaoi.count, memoryview(b"ab" * 1000), ord("a")) == 1000
+        assert results.call(pyaoi.count, memoryview(b"ab" * 1000)[::2], 97) == 1000
+        assert results.stats().hits == 1
+
+        with pytest.raises(TypeError):
+            results.call(pyaoi.count, memoryview(bytearray(b"ab")), ord("a"))
+
+    def test_memory_tier_does_not_import_sqlite3(self):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, pyaoi.cache; pyaoi.cache.ResultCache().call(len, b'a');"
+                "print('sqlite3' in sys.modules)",
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        assert completed.stdout.strip() == "False"
+
+    def test_frozen_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        results = pyaoi.cache.ResultCache()
+        values = numpy.arange(10)
+
+        with pytest.raises(TypeError):
+            results.call(pyaoi.count, values, 3)
+
+        values.flags.writeable = False
+        assert results.call(pyaoi.count, values, 3) == 1
+
+    def test_lazy_results(self):
+        results = pyaoi.cache.ResultCache()
+        data = (1, 2, 3)
+
+        for _ in range(2):
+            copied = results.call(pyaoi.copy_except_if, data, operator.truth)
+            assert list(copied) == []
+
+        assert results.stats().hits == 1
+
+    def test_eviction(self):
+        results = pyaoi.cache.ResultCache(max_bytes=1000)
+
+        for target in range(100):
+            results.call(pyaoi.find_end, b"abc" * 100, bytes([target]))
+
+        stats = results.stats()
+        assert stats.evictions > 0
+        assert stats.bytes <= 1000
+
+    def test_disk(self, tmp_path):
+        path = str(tmp_path / "results.sqlite")
+        data = b"xy" * 500
+
+        with pyaoi.cache.ResultCache(path=path) as results:
+            assert results.call(pyaoi.count, data, ord("x")) == 500
+
+        with pyaoi.cache.ResultCache(path=path) as results:
+            assert results.call(pyaoi.count, data, ord("x")) == 500
+            assert results.stats().disk_hits == 1
+
+
+class TestLazyImport:
+    def test_import_loads_no_backends(self):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import pyaoi; print(sorted(pyaoi.backends_loaded().items()));"
+                "pyaoi.count([1], 1); print(pyaoi.backends_loaded()['pyaoi.dispatch'])",
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        before, after = completed.stdout.splitlines()
+        loaded = dict(ast.literal_eval(before))
+        assert not loaded["numpy"] and not loaded["multiprocessing"]
+        assert not loaded["pyaoi.shared"] and not loaded["pyaoi.columns"]
+        # The dispatcher is only built on the first call of a dispatched function
+        assert not loaded["pyaoi.dispatch"] and after == "True"
+
+    def test_lazy_exports(self):
+        from pyaoi import SharedPool, diff, find_if
+
+        assert SharedPool is pyaoi.shared.SharedPool
+        assert diff is pyaoi._diff.diff
+        assert find_if([1, 2], lambda x: x > 1) == 1
+        assert "run_length_encode" in dir(pyaoi)
+        assert pyaoi.backends_loaded()["pyaoi.shared"]
+
+    def test_missing_attribute(self):
+        with pytest.raises(AttributeError):
+            pyaoi.does_not_exist